@@ -1,7 +1,9 @@
 
-import { X, Pill, Building2, FileText, Info, Beaker, Tag } from 'lucide-react';
+import { useState } from 'react';
+import { X, Pill, Building2, FileText, Info, Beaker, Tag, Bot, Loader2 } from 'lucide-react';
 import { motion } from 'framer-motion';
 import type { Medicine } from '../types/Medicine';
+import { streamAI } from '../lib/aiStream';
 
 interface MedicineDetailsModalProps {
     medicine: Medicine;
@@ -9,6 +11,20 @@ interface MedicineDetailsModalProps {
 }
 
 const MedicineDetailsModal = ({ medicine, onClose }: MedicineDetailsModalProps) => {
+    const [explanation, setExplanation] = useState('');
+    const [isExplaining, setIsExplaining] = useState(false);
+
+    const handleExplain = async () => {
+        setIsExplaining(true);
+        try {
+            await streamAI('genmedai.api.explain_medicine', { medicine: medicine.name }, setExplanation);
+        } catch (error) {
+            console.error("Explanation failed", error);
+        } finally {
+            setIsExplaining(false);
+        }
+    };
+
     return (
         <div className="fixed inset-0 z-50 flex items-center justify-center p-4 bg-black/60 backdrop-blur-sm">
             <motion.div
@@ -127,6 +143,24 @@ const MedicineDetailsModal = ({ medicine, onClose }: MedicineDetailsModalProps)
                                 </div>
                             )}
 
+                            <div className="bg-gray-50 dark:bg-gray-800 p-4 rounded-xl border border-gray-100 dark:border-gray-700">
+                                <h3 className="text-sm font-semibold text-gray-500 dark:text-gray-400 uppercase tracking-wider mb-3 flex items-center gap-2">
+                                    <Bot className="w-4 h-4" /> AI Explanation
+                                </h3>
+                                {explanation ? (
+                                    <p className="text-sm text-gray-700 dark:text-gray-300 leading-relaxed">{explanation}</p>
+                                ) : (
+                                    <button
+                                        onClick={handleExplain}
+                                        disabled={isExplaining}
+                                        className="flex items-center gap-1.5 px-3 py-1.5 bg-gray-100 dark:bg-gray-700 hover:bg-gray-200 dark:hover:bg-gray-600 rounded-full text-xs font-medium text-gray-600 dark:text-gray-300 transition-colors"
+                                    >
+                                        {isExplaining ? <Loader2 className="w-3 h-3 animate-spin" /> : <Bot className="w-3 h-3" />}
+                                        Explain this medicine
+                                    </button>
+                                )}
+                            </div>
+
                             <div className="bg-gray-50 dark:bg-gray-800 p-4 rounded-xl border border-gray-100 dark:border-gray-700">
                                 <h3 className="text-sm font-semibold text-gray-500 dark:text-gray-400 uppercase tracking-wider mb-3 flex items-center gap-2">
                                     <Info className="w-4 h-4" /> Metadata
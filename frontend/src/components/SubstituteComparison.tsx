@@ -1,6 +1,7 @@
 import { useFrappeGetCall } from 'frappe-react-sdk';
 import { Pill, Check, TrendingDown } from 'lucide-react';
 import { useMemo } from 'react';
+import { MATCH_LABELS, isEquivalent } from '../lib/substitutes';
 
 interface ComponentProps {
     medicine: any;
@@ -12,12 +13,15 @@ const SubstituteComparison = ({ medicine }: ComponentProps) => {
         {
             medicine_id: medicine.id,
             salt_composition: medicine.salt_composition,
-            current_price: medicine.original_price || medicine.price
+            current_price: medicine.original_price || medicine.price,
+            dosage_form: medicine.type,
+            pack_size_label: medicine.pack_size_label
         }
     );
 
     const substitutes = (substitutesData as any[]) || [];
-    const bestSubstitute = substitutes.length > 0 ? substitutes[0] : null;
+    // Other strengths or forms are listed, never put forward as the best substitute
+    const bestSubstitute = substitutes.find(sub => !sub.match || isEquivalent(sub)) || null;
 
     const cleanPrice = (price: any) => {
         if (!price) return 0;
@@ -25,8 +29,11 @@ const SubstituteComparison = ({ medicine }: ComponentProps) => {
     };
 
     const originalPrice = cleanPrice(medicine.price);
-    const bestPrice = bestSubstitute ? cleanPrice(bestSubstitute.price) : originalPrice;
-    const savings = originalPrice - bestPrice;
+    // The server compares per unit for the same quantity (`savings`), and only for equivalents:
+    // other strengths or forms have none. AI suggestions (no `match`) compare pack prices.
+    const getSavings = (sub: any) => sub.match ? (sub.savings ?? 0) : originalPrice - cleanPrice(sub.price);
+    const equivalents = substitutes.filter(isEquivalent);
+    const savings = equivalents.length > 0 ? Math.round(Math.max(...equivalents.map(getSavings)) * 100) / 100 : 0;
     const savePercentage = originalPrice > 0 ? Math.round((savings / originalPrice) * 100) : 0;
 
     if (isLoading) {
@@ -98,8 +105,8 @@ const SubstituteComparison = ({ medicine }: ComponentProps) => {
 
                             {substitutes.slice(0, 3).map((sub, idx) => {
                                 const subPrice = cleanPrice(sub.price);
-                                const isBest = idx === 0;
-                                const subSavingsPercent = Math.round(((originalPrice - subPrice) / originalPrice) * 100);
+                                const isBest = sub === bestSubstitute;
+                                const subSavingsPercent = originalPrice > 0 ? Math.round((getSavings(sub) / originalPrice) * 100) : 0;
 
                                 return (
                                     <div
@@ -112,6 +119,11 @@ const SubstituteComparison = ({ medicine }: ComponentProps) => {
                                         <div className="mb-2 sm:mb-0">
                                             <h4 className="font-bold text-gray-900 dark:text-white text-lg">{sub.brand_name} {sub.strength}</h4>
                                             <p className="text-xs text-gray-500">{sub.manufacturer}</p>
+                                            {MATCH_LABELS[sub.match] && (
+                                                <span className="inline-block text-[10px] font-bold uppercase text-amber-700 bg-amber-100 dark:bg-amber-900/30 dark:text-amber-300 px-1.5 py-0.5 rounded mt-1">
+                                                    {MATCH_LABELS[sub.match]}
+                                                </span>
+                                            )}
                                         </div>
                                         <div className="text-right">
                                             <div className="font-bold text-gray-900 dark:text-white text-xl">₹{subPrice}</div>
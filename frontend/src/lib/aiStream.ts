@@ -0,0 +1,38 @@
+// Reads a streamed AI answer (Server-Sent Events from a `stream=1` API call),
+// calling onText with the text received so far after every chunk.
+export const streamAI = async (method: string, params: Record<string, string>, onText: (text: string) => void) => {
+    const response = await fetch(`/api/method/${method}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-Frappe-CSRF-Token': (window as any).csrf_token || '',
+        },
+        body: JSON.stringify({ ...params, stream: 1 }),
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Streaming ${method} failed: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+
+        for (const event of events) {
+            if (event.startsWith('event: done')) return text;
+            const data = event.split('\n').find(line => line.startsWith('data: '));
+            if (!data) continue;
+            text += JSON.parse(data.slice(6)).text || '';
+            onText(text);
+        }
+    }
+    return text;
+};
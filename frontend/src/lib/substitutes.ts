@@ -0,0 +1,35 @@
+// Savings of the best equivalent substitute of many catalog medicines, for "cheaper
+// alternative" badges: one genmedai.api.get_substitutes_bulk call per 50 medicines.
+const BULK_SUBSTITUTE_IDS = 50;
+
+// Same ingredients and strengths, same dosage form or family: the only rows that come with `savings`
+export const isEquivalent = (substitute: any) => substitute?.match === 'exact' || substitute?.match === 'same_family';
+
+// How a substitute differs from the medicine, by its `match` tier (exact matches need no label)
+export const MATCH_LABELS: Record<string, string> = {
+    same_family: 'Similar Form',
+    other_form: 'Different Form',
+    other_strength: 'Different Strength',
+};
+
+export const fetchBestSavings = async (ids: string[]): Promise<Record<string, number>> => {
+    const chunks: string[][] = [];
+    for (let i = 0; i < ids.length; i += BULK_SUBSTITUTE_IDS) {
+        chunks.push(ids.slice(i, i + BULK_SUBSTITUTE_IDS));
+    }
+
+    const savings: Record<string, number> = {};
+    await Promise.all(chunks.map(async (chunk) => {
+        const params = new URLSearchParams({ medicine_ids: JSON.stringify(chunk), page_length: '1' });
+        const response = await fetch(`/api/method/genmedai.api.get_substitutes_bulk?${params}`);
+        if (!response.ok) return;
+
+        const substitutes = (await response.json())?.message || {};
+        for (const id of chunk) {
+            // Ranked best first, an equivalent if there is one
+            const best = substitutes[id]?.[0];
+            savings[id] = isEquivalent(best) && best.savings > 0 ? best.savings : 0;
+        }
+    }));
+    return savings;
+};
@@ -2,11 +2,14 @@
 import { useState, useEffect, useCallback } from 'react';
 import { useFrappeGetCall, useFrappePostCall } from 'frappe-react-sdk';
 import { motion, AnimatePresence } from 'framer-motion';
-import { Search, Filter, Grid, List, Pill, ArrowUpDown, X, ChevronDown, Loader2, ImageIcon } from 'lucide-react';
+import { Search, Filter, Grid, List, Pill, ArrowUpDown, X, ChevronDown, Loader2, ImageIcon, TrendingDown } from 'lucide-react';
 
 import type { Medicine } from '../types/Medicine';
 import MedicineDetailsModal from '../components/MedicineDetailsModal';
 import MedicineCardSkeleton from '../components/MedicineCardSkeleton';
+import { fetchBestSavings } from '../lib/substitutes';
+
+type FacetValue = { value: string, count: number };
 
 const Medicines = () => {
     // 1. States for Data & UI
@@ -14,15 +17,22 @@ const Medicines = () => {
     const [isLoading, setIsLoading] = useState(true);
     const [page, setPage] = useState(0);
     const [hasMore, setHasMore] = useState(true);
+    // Keyset cursor of the last loaded page, cheaper than an offset for deep pages
+    const [nextAfter, setNextAfter] = useState<string | null>(null);
 
     // Filters & Search
     const [searchQuery, setSearchQuery] = useState('');
     const [debouncedSearch, setDebouncedSearch] = useState('');
     const [selectedManufacturer, setSelectedManufacturer] = useState<string>('');
     const [selectedDosageForm, setSelectedDosageForm] = useState<string>('');
+    const [manufacturerQuery, setManufacturerQuery] = useState('');
+    const [debouncedManufacturerQuery, setDebouncedManufacturerQuery] = useState('');
     const [sortBy, setSortBy] = useState<'name' | 'price_low' | 'price_high' | 'newest'>('newest');
     const [showOnlyWithImage, setShowOnlyWithImage] = useState(false);
 
+    // Savings of the best substitute per medicine, fetched in bulk for the loaded pages
+    const [bestSavings, setBestSavings] = useState<Record<string, number>>({});
+
     // UI Toggles
     const [viewMode, setViewMode] = useState<'grid' | 'list'>('grid');
     const [isFilterOpen, setIsFilterOpen] = useState(false);
@@ -39,11 +49,24 @@ const Medicines = () => {
         return () => clearTimeout(timer);
     }, [searchQuery]);
 
+    useEffect(() => {
+        const timer = setTimeout(() => {
+            setDebouncedManufacturerQuery(manufacturerQuery.trim());
+        }, 300);
+        return () => clearTimeout(timer);
+    }, [manufacturerQuery]);
+
     // 4. Fetch Filters (Manufacturers & Dosages)
-    // We fetch this once independently.
-    const { data: filterOptions } = useFrappeGetCall<{ message: { manufacturers: string[], dosage_forms: string[] } }>('genmedai.api.get_catalog_filters');
+    // We fetch this once independently. Only the largest manufacturers come with it,
+    // the others are looked up by prefix as the user types.
+    const { data: filterOptions } = useFrappeGetCall<{ message: { manufacturers: FacetValue[], dosage_forms: FacetValue[], total_manufacturers: number } }>('genmedai.api.get_catalog_filters');
+    const { data: manufacturerMatches } = useFrappeGetCall<{ message: FacetValue[] }>(
+        'genmedai.api.search_manufacturers',
+        { prefix: debouncedManufacturerQuery, limit: 30 },
+        debouncedManufacturerQuery ? undefined : null
+    );
 
-    const manufacturers = filterOptions?.message?.manufacturers || [];
+    const manufacturers = (debouncedManufacturerQuery ? manufacturerMatches?.message : filterOptions?.message?.manufacturers) || [];
     const dosageForms = filterOptions?.message?.dosage_forms || [];
 
     // 5. Main Fetch Logic
@@ -65,6 +88,7 @@ const Medicines = () => {
 
             if (response && response.message) {
                 const newMedicines = response.message;
+                setNextAfter((response as any).next_after || null);
 
                 if (reset) {
                     setMedicines(newMedicines);
@@ -132,10 +156,12 @@ const Medicines = () => {
                 manufacturer: selectedManufacturer,
                 dosage_form: selectedDosageForm,
                 has_image: showOnlyWithImage,
-                order_by: getOrderByString(sortBy)
+                order_by: getOrderByString(sortBy),
+                ...(nextAfter ? { after: nextAfter } : {})
             });
             if (response && response.message) {
                 const newMedicines = response.message;
+                setNextAfter((response as any).next_after || null);
                 setMedicines(prev => [...prev, ...newMedicines]);
                 if (newMedicines.length < 30) setHasMore(false);
             }
@@ -146,6 +172,15 @@ const Medicines = () => {
         }
     };
 
+    useEffect(() => {
+        const ids = medicines.map(m => m.name).filter(id => !(id in bestSavings));
+        if (!ids.length) return;
+
+        fetchBestSavings(ids)
+            .then(savings => setBestSavings(prev => ({ ...prev, ...savings })))
+            .catch(e => console.error("Failed to fetch substitutes", e));
+    }, [medicines]);
+
     const handleResetFilters = () => {
         setSelectedManufacturer('');
         setSelectedDosageForm('');
@@ -349,13 +384,13 @@ const Medicines = () => {
                                         All Forms
                                     </span>
                                 </label>
-                                {dosageForms.map((d) => (
+                                {dosageForms.map(({ value: d, count }) => (
                                     <label key={d} className="flex items-center gap-3 cursor-pointer group p-2 hover:bg-gray-50 dark:hover:bg-gray-800/50 rounded-lg transition-colors">
                                         <div className={`w-5 h-5 rounded-full border-2 flex items-center justify-center transition-all ${selectedDosageForm === d ? 'border-brand-teal bg-brand-teal' : 'border-gray-300 dark:border-gray-600 group-hover:border-brand-teal'}`}>
                                             {selectedDosageForm === d && <div className="w-2 h-2 bg-white rounded-full" />}
                                         </div>
                                         <span className={`text-sm ${selectedDosageForm === d ? 'text-gray-900 dark:text-white font-semibold' : 'text-gray-600 dark:text-gray-400'}`}>
-                                            {d}
+                                            {d} <span className="text-xs text-gray-400">({count})</span>
                                         </span>
                                     </label>
                                 ))}
@@ -370,6 +405,13 @@ const Medicines = () => {
                                 <div className="w-4 h-4 rounded bg-orange-100 flex items-center justify-center text-orange-600 text-[10px] font-bold">M</div>
                                 Manufacturer
                             </h3>
+                            <input
+                                type="text"
+                                value={manufacturerQuery}
+                                onChange={(e) => setManufacturerQuery(e.target.value)}
+                                placeholder={`Search ${filterOptions?.message?.total_manufacturers || ''} manufacturers...`}
+                                className="w-full mb-3 px-3 py-2 text-sm rounded-lg border border-gray-200 dark:border-gray-700 bg-white dark:bg-gray-900 text-gray-900 dark:text-white focus:outline-none focus:border-brand-teal"
+                            />
                             <div className="space-y-1 max-h-80 overflow-y-auto pr-2 custom-scrollbar">
                                 <label className="flex items-center gap-3 cursor-pointer group p-2 hover:bg-gray-50 dark:hover:bg-gray-800/50 rounded-lg transition-colors">
                                     <div className={`w-4 h-4 rounded border flex items-center justify-center transition-all ${selectedManufacturer === '' ? 'border-brand-teal bg-brand-teal' : 'border-gray-300 dark:border-gray-600 group-hover:border-brand-teal'}`}>
@@ -379,13 +421,13 @@ const Medicines = () => {
                                         All Manufacturers
                                     </span>
                                 </label>
-                                {manufacturers.map((m) => (
+                                {manufacturers.map(({ value: m, count }) => (
                                     <label key={m} className="flex items-center gap-3 cursor-pointer group p-2 hover:bg-gray-50 dark:hover:bg-gray-800/50 rounded-lg transition-colors">
                                         <div className={`w-4 h-4 rounded border flex items-center justify-center transition-all ${selectedManufacturer === m ? 'border-brand-teal bg-brand-teal' : 'border-gray-300 dark:border-gray-600 group-hover:border-brand-teal'}`}>
                                             {selectedManufacturer === m && <span className="text-white text-[10px] font-bold">✓</span>}
                                         </div>
                                         <span className={`text-sm ${selectedManufacturer === m ? 'text-gray-900 dark:text-white font-semibold' : 'text-gray-600 dark:text-gray-400'}`}>
-                                            {m}
+                                            {m} <span className="text-xs text-gray-400">({count})</span>
                                         </span>
                                     </label>
                                 ))}
@@ -488,6 +530,11 @@ const Medicines = () => {
                                             <div>
                                                 <p className="text-[10px] font-bold text-gray-400 uppercase tracking-widest mb-0.5">MRP</p>
                                                 <p className="text-xl font-bold text-brand-teal tracking-tight">₹{medicine.price}</p>
+                                                {bestSavings[medicine.name] > 0 && (
+                                                    <p className="mt-1 inline-flex items-center gap-1 text-[11px] font-bold text-green-700 dark:text-green-300 bg-green-100 dark:bg-green-900/40 px-2 py-0.5 rounded-full">
+                                                        <TrendingDown className="w-3 h-3" /> Cheaper alternative: save ₹{bestSavings[medicine.name]}
+                                                    </p>
+                                                )}
                                             </div>
                                             <button
                                                 onClick={(e) => {
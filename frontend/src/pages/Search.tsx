@@ -1,9 +1,14 @@
 
 import { useState, useEffect } from 'react';
-import { Search as SearchIcon, Pill, Sparkles, Bot, Languages, Loader2 } from 'lucide-react';
-import { useFrappeGetCall, useFrappePostCall } from 'frappe-react-sdk';
+import { Search as SearchIcon, Pill, Sparkles, Bot, Languages, Loader2, TrendingDown } from 'lucide-react';
+import { useFrappeGetCall } from 'frappe-react-sdk';
 import { useSearchParams } from 'react-router-dom';
 import SubstituteComparison from '../components/SubstituteComparison';
+import { streamAI } from '../lib/aiStream';
+import { MATCH_LABELS, fetchBestSavings, isEquivalent } from '../lib/substitutes';
+
+// Languages served by genmedai.api.translate_text
+const TRANSLATION_LANGUAGES = ['Hindi', 'Bengali', 'Marathi', 'Telugu', 'Tamil', 'Gujarati', 'Kannada', 'Malayalam', 'Punjabi', 'Odia', 'Assamese', 'Urdu'];
 
 const Search = () => {
     const [searchParams, setSearchParams] = useSearchParams();
@@ -11,16 +16,44 @@ const Search = () => {
     const [triggeredQuery, setTriggeredQuery] = useState(searchParams.get('query') || '');
     const [results, setResults] = useState<any[]>([]);
     const [translations, setTranslations] = useState<Record<string, string>>({});
+    const [language, setLanguage] = useState('Hindi');
     const [translatingId, setTranslatingId] = useState<string | null>(null);
 
+    const [aiToken, setAiToken] = useState<string | null>(null);
+
+    // Autocomplete while typing, served from the in-memory suggest index
+    const [suggestions, setSuggestions] = useState<{ label: string, value: string, type: string }[]>([]);
+    const [showSuggestions, setShowSuggestions] = useState(false);
+
+    useEffect(() => {
+        const term = query.trim();
+        if (!showSuggestions || term.length < 2) {
+            setSuggestions([]);
+            return;
+        }
+
+        const controller = new AbortController();
+        const timer = setTimeout(async () => {
+            try {
+                const response = await fetch(`/api/method/genmedai.api.suggest?query=${encodeURIComponent(term)}`, { signal: controller.signal });
+                setSuggestions((await response.json())?.message || []);
+            } catch (error) {
+                if ((error as Error).name !== 'AbortError') console.error("Suggestions failed", error);
+            }
+        }, 120);
+
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [query, showSuggestions]);
+
+    // Local matches come back immediately, AI insights are fetched in the background (defer_ai)
     const { data, isLoading } = useFrappeGetCall(
         triggeredQuery ? 'genmedai.api.get_medicines' : null as any,
-        { query: triggeredQuery }
+        { query: triggeredQuery, defer_ai: 1 }
     );
 
-    // Translation Mutation
-    const { call: translate } = useFrappePostCall('genmedai.api.translate_text');
-
     const handleTranslate = async (id: string, text: string) => {
         if (translations[id]) {
             // Toggle back to original? Or just ignore? Let's toggle.
@@ -32,10 +65,10 @@ const Search = () => {
 
         setTranslatingId(id);
         try {
-            const result = await translate({ text, target_language: 'Hindi' });
-            if (result?.message) {
-                setTranslations(prev => ({ ...prev, [id]: result.message }));
-            }
+            // The translation is shown as it is generated, instead of after the whole answer
+            await streamAI('genmedai.api.translate_text', { text, target_language: language }, partial => {
+                setTranslations(prev => ({ ...prev, [id]: partial }));
+            });
         } catch (error) {
             console.error("Translation failed", error);
         } finally {
@@ -43,36 +76,63 @@ const Search = () => {
         }
     };
 
+    const mapMedicine = (item: any) => ({
+        id: item.name,
+        name: item.brand_name + (item.strength ? ' ' + item.strength : ''),
+        manufacturer: item.manufacturer,
+        price: `₹${item.price} `,
+        type: item.dosage_form,
+        salt_composition: item.salt_composition,
+        short_composition1: item.short_composition1,
+        short_composition2: item.short_composition2,
+        is_ai_generated: item.is_ai_generated,
+        substitutes: "View",
+        original_price: item.price,
+        explanation: item.explanation,
+        affiliate_link: item.affiliate_link,
+        is_discontinued: item.is_discontinued,
+        pack_size_label: item.pack_size_label,
+        is_generic: item.is_generic,
+        has_substitutes: item.has_substitutes
+    });
+
     useEffect(() => {
         const rawData = data as any;
-        const listData = Array.isArray(rawData) ? rawData : (rawData?.message || []);
+        const payload = rawData?.message ?? rawData;
+        const listData = Array.isArray(payload) ? payload : (payload?.results || []);
+
+        setAiToken(payload?.ai_status === 'pending' ? payload.ai_token : null);
 
         if (listData && Array.isArray(listData)) {
-            const mappedResults = listData.map((item: any) => ({
-                id: item.name,
-                name: item.brand_name + (item.strength ? ' ' + item.strength : ''),
-                manufacturer: item.manufacturer,
-                price: `₹${item.price} `,
-                type: item.dosage_form,
-                salt_composition: item.salt_composition,
-                short_composition1: item.short_composition1,
-                short_composition2: item.short_composition2,
-                is_ai_generated: item.is_ai_generated,
-                substitutes: "View",
-                original_price: item.price,
-                explanation: item.explanation,
-                affiliate_link: item.affiliate_link,
-                is_discontinued: item.is_discontinued,
-                pack_size_label: item.pack_size_label,
-                is_generic: item.is_generic,
-                has_substitutes: item.has_substitutes
-            }));
-            setResults(mappedResults);
+            setResults(listData.map(mapMedicine));
         } else {
             setResults([]);
         }
     }, [data]);
 
+    // Poll for the deferred AI insights of the current search
+    useEffect(() => {
+        if (!aiToken) return;
+
+        let attempts = 0;
+        const timer = setInterval(async () => {
+            attempts += 1;
+            try {
+                const response = await fetch(`/api/method/genmedai.api.get_ai_enrichment?ai_token=${encodeURIComponent(aiToken)}`);
+                const enrichment = (await response.json())?.message;
+                if (enrichment?.status !== 'pending') {
+                    setResults(prev => [...prev, ...(enrichment?.results || []).map(mapMedicine)]);
+                    setAiToken(null);
+                }
+            } catch (error) {
+                console.error("Fetching AI insights failed", error);
+            }
+            if (attempts >= 30) setAiToken(null);
+        }, 1500);
+
+        return () => clearInterval(timer);
+    }, [aiToken]);
+
     // Effect to handle URL query parameter changes
     useEffect(() => {
         const urlQuery = searchParams.get('query');
@@ -90,6 +150,7 @@ const Search = () => {
 
     const handleSearch = (e: React.FormEvent) => {
         e.preventDefault();
+        setShowSuggestions(false);
         if (query.trim()) {
             setTriggeredQuery(query);
             setTranslations({}); // Reset translations on new search
@@ -106,13 +167,30 @@ const Search = () => {
         {
             medicine_id: selectedMedicine?.id,
             salt_composition: selectedMedicine?.salt_composition,
-            current_price: selectedMedicine?.original_price
+            current_price: selectedMedicine?.original_price,
+            dosage_form: selectedMedicine?.type,
+            pack_size_label: selectedMedicine?.pack_size_label
         }
     );
 
     const dbResults = results.filter(r => !r.is_ai_generated);
     const aiResults = results.filter(r => r.is_ai_generated);
 
+    // "Cheaper alternative" badges for all local results, in one bulk call
+    const [bestSavings, setBestSavings] = useState<Record<string, number>>({});
+    const dbResultIds = dbResults.filter(r => r.has_substitutes).map(r => r.id);
+    const dbResultKey = JSON.stringify(dbResultIds);
+    useEffect(() => {
+        setBestSavings({});
+        if (!dbResultIds.length) return;
+
+        let cancelled = false;
+        fetchBestSavings(dbResultIds)
+            .then(savings => { if (!cancelled) setBestSavings(savings); })
+            .catch(error => console.error("Substitutes failed", error));
+        return () => { cancelled = true; };
+    }, [dbResultKey]);
+
     return (
         <div className="flex flex-col items-center min-h-[calc(100vh-80px)] px-4 bg-gradient-to-b from-white to-blue-50 dark:from-gray-950 dark:to-gray-900 py-10">
             <div className={`w-full max-w-3xl text-center space-y-8 animate-in fade-in zoom-in duration-500 transition-all ${triggeredQuery ? 'mb-8' : 'mb-0 min-h-[60vh] flex flex-col justify-center'}`}>
@@ -132,7 +210,11 @@ const Search = () => {
                     <input
                         type="text"
                         value={query}
-                        onChange={(e) => setQuery(e.target.value)}
+                        onChange={(e) => {
+                            setQuery(e.target.value);
+                            setShowSuggestions(true);
+                        }}
+                        onBlur={() => setTimeout(() => setShowSuggestions(false), 150)}
                         placeholder="Search for a medicine (e.g. Dolo, Pan D)..."
                         className="block w-full pl-14 pr-48 py-6 bg-white dark:bg-gray-800 border-2 border-gray-100 dark:border-gray-700 rounded-full text-xl shadow-lg hover:shadow-xl focus:ring-4 focus:ring-brand-teal/20 focus:border-brand-teal outline-none transition-all"
                         autoFocus
@@ -154,6 +236,29 @@ const Search = () => {
                             </>
                         )}
                     </button>
+                    {showSuggestions && suggestions.length > 0 && (
+                        <ul className="absolute z-20 left-0 right-0 mt-2 bg-white dark:bg-gray-800 border border-gray-100 dark:border-gray-700 rounded-2xl shadow-xl overflow-hidden text-left">
+                            {suggestions.map((s) => (
+                                <li key={`${s.type}:${s.value}`}>
+                                    <button
+                                        type="button"
+                                        onMouseDown={(e) => e.preventDefault()}
+                                        onClick={() => {
+                                            setQuery(s.label);
+                                            setShowSuggestions(false);
+                                            setTriggeredQuery(s.label);
+                                            setTranslations({});
+                                            setSearchParams({ query: s.label });
+                                        }}
+                                        className="w-full flex items-center justify-between px-6 py-3 hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors"
+                                    >
+                                        <span className="text-gray-900 dark:text-white">{s.label}</span>
+                                        <span className="text-xs text-gray-400">{s.type === 'salt' ? 'Salt' : 'Medicine'}</span>
+                                    </button>
+                                </li>
+                            ))}
+                        </ul>
+                    )}
                 </form>
 
                 <div className="flex flex-wrap justify-center gap-3">
@@ -197,7 +302,7 @@ const Search = () => {
                                 Analyzing medicine details, checking alternatives, and comparing prices.
                             </p>
                         </div>
-                    ) : results.length > 0 ? (
+                    ) : results.length > 0 || aiToken ? (
                         <div className="grid grid-cols-1 lg:grid-cols-2 gap-8 pb-10 items-start">
                             {/* Left Column: Database Results */}
                             <div className="space-y-4">
@@ -245,6 +350,11 @@ const Search = () => {
                                                     </div>
                                                     <div className="flex flex-col items-end gap-2">
                                                         <div className="text-xl font-bold text-brand-teal">{medicine.price}</div>
+                                                        {bestSavings[medicine.id] > 0 && (
+                                                            <span className="inline-flex items-center gap-1 text-xs font-bold text-green-700 dark:text-green-300 bg-green-100 dark:bg-green-900/40 px-2 py-0.5 rounded-full">
+                                                                <TrendingDown className="w-3 h-3" /> Save ₹{bestSavings[medicine.id]}
+                                                            </span>
+                                                        )}
                                                         {medicine.has_substitutes && (
                                                             <button
                                                                 onClick={() => setSelectedMedicine(medicine)}
@@ -275,7 +385,12 @@ const Search = () => {
                                     </h3>
                                 </div>
 
-                                {aiResults.length > 0 ? (
+                                {aiToken && aiResults.length === 0 ? (
+                                    <div className="flex flex-col items-center py-12 px-4">
+                                        <Sparkles className="h-6 w-6 text-brand-teal animate-pulse" />
+                                        <p className="mt-3 text-gray-500">Consulting AI...</p>
+                                    </div>
+                                ) : aiResults.length > 0 ? (
                                     <div className="space-y-6">
                                         {aiResults.map((medicine, index) => (
                                             <div
@@ -290,7 +405,17 @@ const Search = () => {
                                                             <Bot className="w-6 h-6" />
                                                         </div>
                                                         <div className="bg-white dark:bg-gray-800 rounded-2xl rounded-tl-none p-6 shadow-sm border border-gray-100 dark:border-gray-700 relative flex-grow group hover:border-brand-teal/30 transition-colors">
-                                                            <div className="flex justify-end mb-2">
+                                                            <div className="flex justify-end gap-2 mb-2">
+                                                                <select
+                                                                    value={language}
+                                                                    onChange={(e) => {
+                                                                        setLanguage(e.target.value);
+                                                                        setTranslations({});
+                                                                    }}
+                                                                    className="px-2 py-1.5 bg-gray-100 dark:bg-gray-700 rounded-full text-xs font-medium text-gray-600 dark:text-gray-300 border-none focus:ring-0"
+                                                                >
+                                                                    {TRANSLATION_LANGUAGES.map(lang => <option key={lang} value={lang}>{lang}</option>)}
+                                                                </select>
                                                                 <button
                                                                     onClick={() => handleTranslate(medicine.id, medicine.explanation)}
                                                                     disabled={translatingId === medicine.id}
@@ -301,7 +426,7 @@ const Search = () => {
                                                                     ) : (
                                                                         <Languages className="w-3 h-3" />
                                                                     )}
-                                                                    {translations[medicine.id] ? "Show Original" : "Translate to Hindi"}
+                                                                    {translations[medicine.id] ? "Show Original" : `Translate to ${language}`}
                                                                 </button>
                                                             </div>
                                                             <p className="text-gray-700 dark:text-gray-200 text-lg leading-relaxed">
@@ -421,36 +546,46 @@ const Search = () => {
                                     <p className="text-sm text-gray-500">Finding cheaper alternatives...</p>
                                 </div>
                             ) : substitutesData && (substitutesData as any[]).length > 0 ? (
-                                (substitutesData as any[]).map((sub, idx) => (
-                                    <div key={idx} className="flex items-center justify-between p-4 rounded-xl bg-green-50 dark:bg-green-900/10 border border-green-100 dark:border-green-900/30">
-                                        <div className="flex items-start gap-3">
-                                            <div className="w-10 h-10 rounded-full bg-white dark:bg-gray-800 flex items-center justify-center text-brand-green shadow-sm">
-                                                <Pill className="w-5 h-5" />
-                                            </div>
-                                            <div>
-                                                <div className="flex items-center gap-2">
-                                                    <h4 className="font-bold text-gray-900 dark:text-white">{sub.brand_name} {sub.strength}</h4>
-                                                    {sub.is_discontinued === 1 && <span className="text-[10px] bg-red-100 text-red-600 px-1 py-0.5 rounded border border-red-200">DISCONTINUED</span>}
+                                (substitutesData as any[]).map((sub, idx) => {
+                                    const sourcePrice = parseFloat(String(selectedMedicine.price).replace(/[^\d.]/g, ''));
+                                    // Ranked rows come with per-unit `savings`, equivalents only; AI suggestions compare pack prices
+                                    const saving = sub.match
+                                        ? (sub.savings ?? 0)
+                                        : sourcePrice - parseFloat(String(sub.price).replace(/[^\d.]/g, ''));
+                                    const savePercent = sourcePrice > 0 ? Math.round((saving / sourcePrice) * 100) : 0;
+
+                                    return (
+                                        <div key={idx} className={`flex items-center justify-between p-4 rounded-xl border ${!sub.match || isEquivalent(sub) ? 'bg-green-50 dark:bg-green-900/10 border-green-100 dark:border-green-900/30' : 'bg-gray-50 dark:bg-gray-800/50 border-gray-100 dark:border-gray-700'}`}>
+                                            <div className="flex items-start gap-3">
+                                                <div className="w-10 h-10 rounded-full bg-white dark:bg-gray-800 flex items-center justify-center text-brand-green shadow-sm">
+                                                    <Pill className="w-5 h-5" />
+                                                </div>
+                                                <div>
+                                                    <div className="flex items-center gap-2">
+                                                        <h4 className="font-bold text-gray-900 dark:text-white">{sub.brand_name} {sub.strength}</h4>
+                                                        {sub.is_discontinued === 1 && <span className="text-[10px] bg-red-100 text-red-600 px-1 py-0.5 rounded border border-red-200">DISCONTINUED</span>}
+                                                        {MATCH_LABELS[sub.match] && <span className="text-[10px] bg-amber-100 text-amber-700 px-1 py-0.5 rounded border border-amber-200">{MATCH_LABELS[sub.match].toUpperCase()}</span>}
+                                                    </div>
+                                                    <p className="text-xs text-gray-500">
+                                                        {sub.manufacturer} {sub.pack_size_label ? ` • ${sub.pack_size_label}` : ''} {sub.is_generic ? ' • Generic' : ''}
+                                                    </p>
                                                 </div>
-                                                <p className="text-xs text-gray-500">
-                                                    {sub.manufacturer} {sub.pack_size_label ? ` • ${sub.pack_size_label}` : ''} {sub.is_generic ? ' • Generic' : ''}
-                                                </p>
+                                            </div>
+                                            <div className="text-right">
+                                                <div className="font-bold text-brand-green text-lg">₹{sub.price}</div>
+                                                {savePercent > 0 ? (
+                                                    <span className="text-xs font-bold text-brand-teal bg-teal-100 dark:bg-teal-900/30 px-2 py-0.5 rounded-full">
+                                                        Save {savePercent}%
+                                                    </span>
+                                                ) : !MATCH_LABELS[sub.match] && (
+                                                    <span className="text-xs font-bold text-gray-500 bg-gray-100 dark:bg-gray-800 px-2 py-0.5 rounded-full">
+                                                        Matching Composition
+                                                    </span>
+                                                )}
                                             </div>
                                         </div>
-                                        <div className="text-right">
-                                            <div className="font-bold text-brand-green text-lg">₹{sub.price}</div>
-                                            {parseFloat(String(sub.price).replace(/[^\d.]/g, '')) < parseFloat(String(selectedMedicine.price).replace(/[^\d.]/g, '')) ? (
-                                                <span className="text-xs font-bold text-brand-teal bg-teal-100 dark:bg-teal-900/30 px-2 py-0.5 rounded-full">
-                                                    Save {(100 - (parseFloat(String(sub.price).replace(/[^\d.]/g, '')) / parseFloat(String(selectedMedicine.price).replace(/[^\d.]/g, '')) * 100)).toFixed(0)}%
-                                                </span>
-                                            ) : (
-                                                <span className="text-xs font-bold text-gray-500 bg-gray-100 dark:bg-gray-800 px-2 py-0.5 rounded-full">
-                                                    Matching Composition
-                                                </span>
-                                            )}
-                                        </div>
-                                    </div>
-                                ))
+                                    );
+                                })
                             ) : (
                                 <div className="text-center py-10">
                                     <p className="text-gray-500">No matching alternatives found.</p>
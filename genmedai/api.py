@@ -1,11 +1,63 @@
 import frappe
+from frappe.utils import cint, flt
 from frappe.core.doctype.user.user import sign_up as frappe_sign_up
-import requests
+import base64
 import json
+import time
 
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent"
+from genmedai.genmedai.utils.ai_cache import get_cached_response, make_cache_key, set_cached_response
+from genmedai.genmedai.utils.ai_coalescer import batch as coalesce_batch, single_flight
+from genmedai.genmedai.utils.ai_client import CircuitOpenError, get_client, get_metrics as get_provider_metrics
+from genmedai.genmedai.utils.ai_stream import sse_response, stream_gemini, stream_openai
+from genmedai.genmedai.utils.ai_metrics import get_stats as get_ai_call_stats, get_token_usage, record_ai_call
+from genmedai.genmedai.utils.http_cache import http_cache
+from genmedai.genmedai.utils.catalog_facets import get_facets, search_manufacturers as find_manufacturers
+from genmedai.genmedai.utils.cheapest_equivalent import get_cheapest_equivalents
+from genmedai.genmedai.utils.composition import count_by_composition_key, get_cheapest_by_composition
+from genmedai.genmedai.utils.medicine_cache import get_medicine, get_medicines as get_cached_medicines
+from genmedai.genmedai.utils.medicine_enrichment import get_stored_enrichment
+from genmedai.genmedai.utils.medicine_search import RESULT_FIELDS as SEARCH_RESULT_FIELDS, resolve_medicines, search_medicines
+from genmedai.genmedai.utils.prescription_image import prepare_prescription_image
+from genmedai.genmedai.utils.read_replica import read_from_replica
+from genmedai.genmedai.utils.search_log import log_cached_search, log_search
+from genmedai.genmedai.utils.substitutes import find_substitutes, find_substitutes_bulk
+from genmedai.genmedai.utils.suggest import suggest as get_suggestions
+from genmedai.genmedai.utils.translation_memory import (
+    LANGUAGES as TRANSLATION_LANGUAGES,
+    build_translate_prompt,
+    get_translations,
+    normalize_text,
+    set_translations,
+    translate_texts as translate_with_memory,
+    validate_language,
+)
+
+GEMINI_MODEL = "gemini-flash-latest"
+OPENAI_MODEL = "gpt-4o-mini"
+
+GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
 
+# Sort fields that are never NULL, so they can be paged with a keyset cursor
+KEYSET_SORT_FIELDS = ('name', 'brand_name', 'price', 'modified', 'creation')
+
+SUBSTITUTE_FIELDS = ["name", "brand_name", "salt_composition", "strength", "dosage_form", "manufacturer_name", "type", "price", "is_generic", "image", "pack_size_label", "is_discontinued"]
+
+# Names taken from one prescription image
+MAX_PRESCRIPTION_ITEMS = 20
+
+# Texts per translate_texts request
+MAX_TRANSLATE_TEXTS = 50
+
+# Medicines per get_substitutes_bulk request, and substitutes returned per medicine
+MAX_BULK_SUBSTITUTE_IDS = 50
+MAX_BULK_SUBSTITUTES_PER_ITEM = 10
+
+# Deferred AI results of a search (defer_ai), polled by token
+AI_ENRICHMENT_PREFIX = "genmedai:ai_enrichment"
+AI_ENRICHMENT_TTL = 600
+
 def get_ai_config():
     # Fetch from settings, ignoring permissions (System User only by default)
     try:
@@ -25,17 +77,70 @@ def get_ai_config():
         # Fallback to config if settings fail
         return "Google Gemini", frappe.conf.get("GEMINI_API_KEY")
 
+def get_ai_model(provider):
+    return OPENAI_MODEL if provider == "OpenAI" else GEMINI_MODEL
+
 def query_ai(prompt):
     provider, api_key = get_ai_config()
+    model = get_ai_model(provider)
+    
+    # Repeat prompts (popular searches, same explanation translated again) are served from cache
+    start = time.perf_counter()
+    hit, cached_response = get_cached_response(provider, model, prompt)
+    if hit:
+        record_ai_call(provider, model, time.perf_counter() - start, "cache_hit", prompt, cached_response, cache_hit=True)
+        return cached_response
     
     if not api_key:
         frappe.log_error(message=f"GenMedAI: No API Key found for {provider}", title="GenMedAI Debug")
         return None
     
+    def call_provider():
+        # Read by get_medicines for the search log: this request paid for a provider call
+        frappe.flags.ai_provider_called = True
+        if provider == "OpenAI":
+            return query_openai(api_key, prompt)
+        return query_gemini_internal(api_key, prompt)
+    
+    # Concurrent callers of the same prompt (a trending search) share one provider call
+    response = single_flight(make_cache_key(provider, model, prompt), call_provider)
+    
+    # Failed calls return None and are not cached, so they are retried next time
+    if response is not None:
+        set_cached_response(provider, model, prompt, response)
+    
+    return response
+
+def stream_ai(prompt):
+    """
+    query_ai, yielding the answer while the model generates it. A cached answer
+    comes as a single chunk; only completed answers are cached. Returns the complete
+    answer (None if the stream broke off).
+    """
+    provider, api_key = get_ai_config()
+    model = get_ai_model(provider)
+    
+    start = time.perf_counter()
+    hit, cached_response = get_cached_response(provider, model, prompt)
+    if hit:
+        record_ai_call(provider, model, time.perf_counter() - start, "cache_hit", prompt, cached_response, cache_hit=True)
+        if cached_response:
+            yield cached_response
+        return cached_response
+    
+    if not api_key:
+        frappe.log_error(message=f"GenMedAI: No API Key found for {provider}", title="GenMedAI Debug")
+        return None
+    
+    frappe.flags.ai_provider_called = True
     if provider == "OpenAI":
-        return query_openai(api_key, prompt)
+        response = yield from stream_openai(api_key, prompt, OPENAI_MODEL, OPENAI_API_URL)
     else:
-        return query_gemini_internal(api_key, prompt)
+        response = yield from stream_gemini(api_key, prompt, GEMINI_MODEL, GEMINI_STREAM_URL)
+    
+    if response is not None:
+        set_cached_response(provider, model, prompt, response)
+    return response
 
 def query_openai(api_key, prompt):
     headers = {
@@ -43,7 +148,7 @@ def query_openai(api_key, prompt):
         "Authorization": f"Bearer {api_key}"
     }
     payload = {
-        "model": "gpt-4o-mini",
+        "model": OPENAI_MODEL,
         "messages": [
             {"role": "system", "content": "You are a helpful medical assistant that outputs strictly JSON."},
             {"role": "user", "content": prompt}
@@ -51,20 +156,36 @@ def query_openai(api_key, prompt):
         "temperature": 0.7
     }
     
+    start = time.perf_counter()
+    data = text = None
+    outcome = "ok"
     try:
-        response = requests.post(OPENAI_API_URL, headers=headers, json=payload, timeout=15)
+        response = get_client("OpenAI").post(OPENAI_API_URL, headers=headers, json=payload, timeout=15)
         
         if response.status_code != 200:
+            outcome = f"http_{response.status_code}"
             frappe.log_error(f"GenMedAI OpenAI Error {response.status_code}: {response.text}", "GenMedAI Debug")
         
         response.raise_for_status()
         data = response.json()
-        return data['choices'][0]['message']['content']
+        text = data['choices'][0]['message']['content']
+        return text
+    except CircuitOpenError:
+        # Provider is failing, serve local results only until it recovers
+        outcome = "circuit_open"
+        return None
     except Exception as e:
+        if outcome == "ok":
+            outcome = "error"
         frappe.log_error(message=f"OpenAI API Error: {str(e)}", title="GenMedAI OpenAI Error")
         return None
+    finally:
+        record_ai_call(
+            "OpenAI", OPENAI_MODEL, time.perf_counter() - start, outcome, prompt, text,
+            *get_token_usage("OpenAI", data)
+        )
 
-def query_gemini_internal(api_key, prompt, image_base64=None):
+def query_gemini_internal(api_key, prompt, image_base64=None, mime_type="image/jpeg"):
     headers = {"Content-Type": "application/json"}
     
     parts = [{"text": prompt}]
@@ -76,7 +197,7 @@ def query_gemini_internal(api_key, prompt, image_base64=None):
             
         parts.append({
             "inline_data": {
-                "mime_type": "image/jpeg", # Assuming JPEG or generic image
+                "mime_type": mime_type,
                 "data": image_base64
             }
         })
@@ -87,25 +208,122 @@ def query_gemini_internal(api_key, prompt, image_base64=None):
         }]
     }
     
+    start = time.perf_counter()
+    data = text = None
+    outcome = "ok"
     try:
         url = f"{GEMINI_API_URL}?key={api_key}"
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = get_client("Google Gemini").post(url, headers=headers, json=payload, timeout=30)
         
         if response.status_code != 200:
+            outcome = f"http_{response.status_code}"
             frappe.log_error(f"GenMedAI Gemini Error {response.status_code}: {response.text}", "GenMedAI Debug")
         
         response.raise_for_status()
         data = response.json()
-        return data['candidates'][0]['content']['parts'][0]['text']
+        text = data['candidates'][0]['content']['parts'][0]['text']
+        return text
+    except CircuitOpenError:
+        outcome = "circuit_open"
+        return None
     except Exception as e:
+        if outcome == "ok":
+            outcome = "error"
         frappe.log_error(message=f"Gemini API Error: {str(e)}", title="GenMedAI Gemini Error")
         return None
+    finally:
+        # Image bytes are not counted in the prompt size, the tokens reported include them
+        record_ai_call(
+            "Google Gemini", GEMINI_MODEL, time.perf_counter() - start, outcome, prompt, text,
+            *get_token_usage("Google Gemini", data)
+        )
+
+@frappe.whitelist()
+def get_ai_provider_metrics():
+    """Latency / error metrics and circuit state of the AI providers, as seen by this worker."""
+    frappe.only_for("System Manager")
+    return get_provider_metrics()
+
+@frappe.whitelist()
+def get_ai_stats(days=1):
+    """
+    AI usage per endpoint (search, substitutes, translate, prescription) across all
+    workers: calls, cache hits, errors, tokens, sizes and rolling p50/p95/p99 latency.
+    """
+    frappe.only_for("System Manager")
+    return get_ai_call_stats(days)
 
 @frappe.whitelist(allow_guest=True)
 def analyze_prescription(image_base64):
     if not image_base64:
         frappe.throw("No image data provided")
-        
+
+    return extract_prescription_names(image_base64)
+
+@frappe.whitelist(allow_guest=True)
+def analyze_prescription_batch(image_base64, substitutes_per_item=3):
+    """
+    Prescription image -> medicines -> substitutes -> savings, in one request:
+    a single model call, one query resolving every name against the local catalog,
+    one grouped query for the cheapest substitutes of all of them, and one lookup of
+    their cheapest equivalents per unit for the savings.
+    """
+    if not image_base64:
+        frappe.throw("No image data provided")
+
+    per_item = min(max(cint(substitutes_per_item) or 3, 1), 10)
+    names = [n for n in extract_prescription_names(image_base64) if isinstance(n, str) and n.strip()]
+    names = names[:MAX_PRESCRIPTION_ITEMS]
+
+    fields = list(SEARCH_RESULT_FIELDS) + ["pack_unit", "unit_count"]
+    resolved = resolve_medicines(names, fields=fields)
+
+    # One extra row per key, the medicine itself may be among the cheapest
+    cheapest = get_cheapest_by_composition(
+        (m.composition_key for m in resolved if m), SUBSTITUTE_FIELDS, per_key=per_item + 1
+    )
+    equivalents = get_cheapest_equivalents((m.composition_key, m.pack_unit) for m in resolved if m)
+
+    items = []
+    total_price = total_best_price = 0
+    for extracted_name, medicine in zip(names, resolved):
+        item = {"extracted_name": extracted_name, "medicine": None, "substitutes": [], "savings": 0}
+        items.append(item)
+        if not medicine:
+            continue
+
+        composition_key, pack_unit, unit_count = medicine.pop("composition_key"), medicine.pop("pack_unit"), medicine.pop("unit_count")
+        substitutes = [
+            s for s in cheapest.get(composition_key, []) if s.name != medicine.name
+        ][:per_item]
+        for s in substitutes:
+            s["manufacturer"] = s.get("manufacturer_name")
+
+        # Best price for the same quantity: the cheapest equivalent per unit, times the units
+        # of the prescribed pack, so a 15-tablet strip doesn't compare with a 10-tablet one
+        price = flt(medicine.price)
+        best_price = price
+        equivalent = equivalents.get((composition_key, pack_unit))
+        if price and equivalent and unit_count:
+            best_price = min(price, flt(equivalent.unit_price * unit_count, 2))
+            medicine["cheapest_equivalent"] = equivalent.medicine
+        elif price:
+            best_price = min([price] + [flt(s.price) for s in substitutes])
+        medicine["manufacturer"] = medicine.get("manufacturer_name")
+
+        item.update(medicine=medicine, substitutes=substitutes, savings=flt(price - best_price, 2))
+        total_price += price
+        total_best_price += best_price
+
+    return {
+        "items": items,
+        "total_price": flt(total_price, 2),
+        "total_best_price": flt(total_best_price, 2),
+        "total_savings": flt(total_price - total_best_price, 2),
+    }
+
+def extract_prescription_names(image_base64):
+    """Medicine names read off a prescription image, in a single Gemini call."""
     prompt = """
     Analyze this prescription image. Identify the medicines prescribed.
     Return strictly a JSON LIST of strings, where each string is a medicine name.
@@ -118,15 +336,28 @@ def analyze_prescription(image_base64):
         # Force fallback or error if OpenAI (vision support varies, simplified here for Gemini default)
         # For now, let's assume Gemini is used or switch key if available
         pass
-        
-    result = query_gemini_internal(api_key, prompt, image_base64)
+
+    image = prepare_prescription_image(image_base64)
+
+    # Keyed by the uploaded bytes, so re-uploading the same photo costs no model call
+    cache_prompt = f"{prompt}\n[image sha256:{image.content_hash}]"
+    start = time.perf_counter()
+    hit, result = get_cached_response("Google Gemini", GEMINI_MODEL, cache_prompt)
+    if hit:
+        record_ai_call("Google Gemini", GEMINI_MODEL, time.perf_counter() - start, "cache_hit", prompt, result, cache_hit=True)
+    else:
+        result = query_gemini_internal(api_key, prompt, image.data, mime_type=image.mime_type)
+        if result is not None:
+            set_cached_response("Google Gemini", GEMINI_MODEL, cache_prompt, result)
     
     if result:
         try:
             start_index = result.find('[')
             end_index = result.rfind(']')
             if start_index != -1 and end_index != -1:
-                return json.loads(result[start_index:end_index+1])
+                names = json.loads(result[start_index:end_index+1])
+                if isinstance(names, list):
+                    return names
         except:
             pass
             
@@ -172,15 +403,55 @@ def register_user(email, full_name, mobile_no, gender, redirect_to=None):
     
 
 @frappe.whitelist(allow_guest=True)
-def get_medicines(query=None):
+def suggest(query=None, limit=8):
+    """
+    Autocomplete for the search box: brand names and salts matching the typed
+    prefix, tolerating typos. Served from an in-process index, no DB or AI calls.
+    """
+    limit = min(max(cint(limit) or 8, 1), 20)
+    return get_suggestions(query, limit)
+
+@frappe.whitelist(allow_guest=True)
+# Private: every search reaches the server and is logged, even when answered with a 304
+@http_cache(private=True, on_hit=lambda query=None, defer_ai=0: log_cached_search(query) if query else None)
+def get_medicines(query=None, defer_ai=0):
     if not query:
         return []
 
-    # Enable debug logging
-    frappe.log_error(f"GenMedAI Search Query: {query}", "GenMedAI Search")
+    start = time.perf_counter()
     
     # 1. Search Local Database
+    local_results = search_catalog(query)
+    
+    # 2. AI Fallback / Augmentation
+    # We ask AI to identify the medicine and provide details.
+    # With defer_ai the worker is released right after the DB search and the AI call runs in a job.
+    # Popular medicines are enriched ahead of time (enrich_top_medicines), no AI call needed
+    stored = get_stored_enrichment(query, local_results)
+    if stored:
+        results = local_results + [stored]
+        log_search(query, len(local_results), (time.perf_counter() - start) * 1000, ai_used=False)
+        return {"results": results, "ai_status": "done"} if cint(defer_ai) else results
+
+    if cint(defer_ai):
+        # A pending AI job logs the search itself, once it knows if it called the provider
+        return defer_ai_results(query, local_results, (time.perf_counter() - start) * 1000)
     
+    ai_text = identify_medicine(query)
+    if ai_text is None:
+        # The provider failed or was short-circuited: the next request must try again,
+        # not be answered a 304 for this answer without AI until the catalog changes
+        frappe.flags.no_http_cache = True
+    ai_results = parse_ai_results(ai_text)
+
+    # Always append AI results to ensure they are shown
+    final_results = local_results + ai_results
+    log_search(query, len(local_results), (time.perf_counter() - start) * 1000, ai_used=frappe.flags.ai_provider_called)
+    return final_results
+
+@read_from_replica
+def search_catalog(query):
+    """Local matches of a search, on the read replica when the site has one."""
     clean_query = query.strip()
     is_exact_search = False
     
@@ -198,65 +469,32 @@ def get_medicines(query=None):
             "short_composition2": clean_query,
             "manufacturer_name": clean_query
         }
+
+        local_results = frappe.get_list(
+            "Medicine",
+            fields=list(SEARCH_RESULT_FIELDS),
+            or_filters=or_filters,
+            limit_page_length=20,
+            ignore_permissions=True
+        )
     else:
-        # Broad Match Strategy (LIKE)
-        or_filters = {
-            "brand_name": ["like", f"%{query}%"],
-            "salt_composition": ["like", f"%{query}%"],
-            "short_composition1": ["like", f"%{query}%"],
-            "short_composition2": ["like", f"%{query}%"],
-            "manufacturer_name": ["like", f"%{query}%"],
-            "type": ["like", f"%{query}%"],
-            "strength": ["like", f"%{query}%"],
-            "dosage_form": ["like", f"%{query}%"],
-            "pack_size_label": ["like", f"%{query}%"],
-            "description": ["like", f"%{query}%"]
-        }
-    
-    local_results = frappe.get_list(
-        "Medicine",
-        fields=[
-            "name", "brand_name", "salt_composition", "short_composition1", "short_composition2",
-            "strength", "dosage_form", "manufacturer_name", "type", 
-            "price", "is_generic", "image", "is_discontinued", "pack_size_label"
-        ],
-        or_filters=or_filters,
-        limit_page_length=20,
-        ignore_permissions=True
-    )
+        # Broad Match Strategy (FULLTEXT, ranked with prefix matching)
+        local_results = search_medicines(clean_query, limit=20)
     
     # Map fields for frontend compatibility
     for r in local_results:
+        r.pop('score', None)
         r['manufacturer'] = r.get('manufacturer_name')
         if not r.get('dosage_form') and r.get('type'):
             r['dosage_form'] = r['type']
         # Ensure boolean for is_discontinued
         r['is_discontinued'] = 1 if r.get('is_discontinued') else 0
 
-        # Check for substitutes
-        r['has_substitutes'] = False
-        if r.get('salt_composition'):
-            raw_salt = r['salt_composition']
-            base_salt = raw_salt.split('(')[0].strip()
-            if not base_salt:
-                base_salt = raw_salt.strip()
-            
-            if base_salt:
-                count = frappe.db.count("Medicine", filters={
-                    "salt_composition": ["like", f"%{base_salt}%"],
-                    "name": ["!=", r["name"]]
-                })
-                if count > 0:
-                    r['has_substitutes'] = True
-    
-    # 2. AI Fallback / Augmentation
-    # We ask AI to identify the medicine and provide details
-    ai_results = []
-    
-    # Check if we should skip AI to save tokens/time if we found a perfect match? 
-    # User requested AI results too, so we proceed.
-    
-    prompt = f"""
+    set_has_substitutes(local_results)
+    return local_results
+
+def build_identify_prompt(query):
+    return f"""
     You are a medical assistant JSON API.
     Identify the medicine "{query}" available in India.
     Return a JSON object (and ONLY JSON, no markdown) with details.
@@ -281,8 +519,79 @@ def get_medicines(query=None):
     If the term is nonsense or not a medicine, return null.
     For the affiliate_link, generate a valid search URL for a major Indian online pharmacy (like 1mg, Pharmeasy, or Apollo) with the medicine name query.
     """
+
+def identify_medicine(query):
+    """
+    AI identification of a search term. Terms searched at the same moment (by any
+    worker) are identified together in one batch prompt, see ai_coalescer.batch.
+    """
+    provider, _ = get_ai_config()
+    prompt = build_identify_prompt(query)
+
+    hit, _ = get_cached_response(provider, get_ai_model(provider), prompt, track_miss=False)
+    if not hit:
+        found, ai_text = coalesce_batch("identify", query, identify_medicines_batch)
+        if found:
+            return ai_text
+
+    # Cached, or the batch did not answer for this term
+    return query_ai(prompt)
+
+def identify_medicines_batch(queries):
+    """One AI call for several search terms. Returns the single-term answer text of each."""
+    if len(queries) == 1:
+        return [query_ai(build_identify_prompt(queries[0]))]
+
+    ai_text = query_ai(build_identify_batch_prompt(queries))
+    try:
+        start_index = ai_text.find('[')
+        end_index = ai_text.rfind(']')
+        items = json.loads(ai_text[start_index:end_index+1])
+    except Exception:
+        return [None] * len(queries)
+
+    if not isinstance(items, list) or len(items) != len(queries):
+        return [None] * len(queries)
+
+    # Cache every answer under its single-term prompt, as if asked on its own
+    provider, _ = get_ai_config()
+    model = get_ai_model(provider)
+    texts = []
+    for query, item in zip(queries, items):
+        text = json.dumps(item) if isinstance(item, dict) else "null"
+        set_cached_response(provider, model, build_identify_prompt(query), text)
+        texts.append(text)
+    return texts
+
+def build_identify_batch_prompt(queries):
+    return f"""
+    You are a medical assistant JSON API.
+    Identify each of these medicine search terms, as available in India:
+    {json.dumps(queries, ensure_ascii=False)}
+    
+    Return a JSON LIST (and ONLY JSON, no markdown) with exactly one entry per term, in the same order.
+    Each entry is either null (if the term is nonsense or not a medicine) or an object:
+    {{
+        "brand_name": "Standard Brand Name",
+        "salt_composition": "Active Ingredients",
+        "strength": "e.g. 500mg",
+        "dosage_form": "Tablet/Capsule/Syrup",
+        "pack_size_label": "e.g. 10 Tablet Strip",
+        "manufacturer": "Company Name",
+        "price": 100.00,
+        "is_generic": false,
+        "is_discontinued": false,
+        "image": null,
+        "explanation": "A detailed explanation (3-4 sentences) of what this medicine is, its primary uses, how it works, and key precautions.",
+        "affiliate_link": "https://www.1mg.com/search/all?name=<the term>"
+    }}
     
-    ai_text = query_ai(prompt)
+    If strict details are unknown, estimate based on common market data in India.
+    For the affiliate_link, generate a valid search URL for a major Indian online pharmacy (like 1mg, Pharmeasy, or Apollo) with the medicine name query.
+    """
+
+def parse_ai_results(ai_text):
+    ai_results = []
     
     if ai_text:
         try:
@@ -318,12 +627,80 @@ def get_medicines(query=None):
         except Exception as e:
             frappe.log_error(message=f"GenMedAI JSON Parse Error: {str(e)} | Text: {ai_text}", title="GenMedAI Debug")
 
-    # Always append AI results to ensure they are shown
-    final_results = local_results + ai_results
-    return final_results
+    return ai_results
+
+def defer_ai_results(query, local_results, latency_ms):
+    provider, _ = get_ai_config()
+    prompt = build_identify_prompt(query)
+    
+    # Answer inline when the AI response is already cached, no job needed
+    hit, ai_text = get_cached_response(provider, get_ai_model(provider), prompt, track_miss=False)
+    if hit:
+        log_search(query, len(local_results), latency_ms, ai_used=False)
+        return {"results": local_results + parse_ai_results(ai_text), "ai_status": "done"}
+    
+    ai_token = frappe.generate_hash(length=20)
+    frappe.cache().set_value(f"{AI_ENRICHMENT_PREFIX}:{ai_token}", {"status": "pending"}, expires_in_sec=AI_ENRICHMENT_TTL)
+    # The token is this search's own, a later search must start its own AI job
+    frappe.flags.no_http_cache = True
+    
+    frappe.enqueue(
+        "genmedai.api.run_ai_enrichment",
+        queue="short",
+        ai_token=ai_token,
+        query=query,
+        user=frappe.session.user,
+        search_log={"result_count": len(local_results), "latency_ms": latency_ms}
+    )
+    
+    return {"results": local_results, "ai_status": "pending", "ai_token": ai_token}
+
+def run_ai_enrichment(ai_token, query, user=None, search_log=None):
+    ai_results = parse_ai_results(identify_medicine(query))
+    if search_log:
+        log_search(query, search_log["result_count"], search_log["latency_ms"], ai_used=frappe.flags.ai_provider_called)
+    
+    frappe.cache().set_value(
+        f"{AI_ENRICHMENT_PREFIX}:{ai_token}",
+        {"status": "done", "results": ai_results},
+        expires_in_sec=AI_ENRICHMENT_TTL
+    )
+    
+    # Logged in users get the results pushed, guests poll get_ai_enrichment
+    if user and user != "Guest":
+        frappe.publish_realtime(
+            "genmedai_ai_enrichment",
+            {"ai_token": ai_token, "status": "done", "results": ai_results},
+            user=user
+        )
+
+@frappe.whitelist(allow_guest=True)
+def get_ai_enrichment(ai_token=None):
+    """Poll the AI results of a search made with defer_ai."""
+    enrichment = frappe.cache().get_value(f"{AI_ENRICHMENT_PREFIX}:{ai_token}") if ai_token else None
+    if not enrichment:
+        return {"status": "expired", "results": []}
+    
+    return {"status": enrichment["status"], "results": enrichment.get("results", [])}
+
+def set_has_substitutes(medicines):
+    # One grouped count for the whole result set instead of a count per row.
+    # By composition key, not base salt: substitutes have the same ingredients, and the
+    # base salt is only the first ingredient of a combination
+    counts = count_by_composition_key(m.get('composition_key') for m in medicines)
+    for m in medicines:
+        composition_key = m.pop('composition_key', None)
+        # The medicine itself is part of its composition group
+        m['has_substitutes'] = bool(composition_key) and counts.get(composition_key.lower(), 0) > 1
 
 @frappe.whitelist(allow_guest=True)
-def get_substitutes(medicine_id=None, salt_composition=None, current_price=None):
+@http_cache(max_age=300, server_cache_ttl=600)
+def get_substitutes(medicine_id=None, salt_composition=None, current_price=None, dosage_form=None, pack_size_label=None, start=0, page_length=10):
+    """
+    Substitutes ranked by the substitute engine: same ingredients and strengths first
+    (same dosage form before other forms), cheapest per unit within each tier.
+    Rows carry their `match` tier and `unit_price`.
+    """
     if not medicine_id:
         return []
 
@@ -339,55 +716,20 @@ def get_substitutes(medicine_id=None, salt_composition=None, current_price=None)
         source_med = frappe._dict({
             "brand_name": "Selected Medicine", # Placeholder
             "salt_composition": salt_composition,
-            "strength": "", # We might not have this, searching broadly
-            "dosage_form": "", 
-            "price": float(current_price) if current_price else 999999
+            "dosage_form": dosage_form or "",
+            "pack_size_label": pack_size_label or "",
+            # Unknown without a current price: no savings are computed against it
+            "price": flt(current_price) or None
         })
-    else:
-        try:
-            source_med = frappe.get_doc("Medicine", medicine_id)
-        except frappe.DoesNotExistError:
-            frappe.throw("Medicine not found")
 
-    # Core logic: Same Salt Match
-    # 1. Clean the salt (remove strength info inside parenthesis if present to find broader matches)
-    #    e.g. "Acebrophylline (100mg)" -> "Acebrophylline"
-    #    This handles formatting differences like spaces or strength variations better
-    
-    raw_salt = source_med.salt_composition or ""
-    base_salt = raw_salt.split('(')[0].strip()
-    
-    if not base_salt:
-        base_salt = raw_salt.strip()
-
-    filters = {
-        "salt_composition": ["like", f"%{base_salt}%"]
-    }
-    
-    # If real DB item, avoid showing itself
-    if not medicine_id.startswith("AI_GENERATED_"):
-        filters["name"] = ["!=", medicine_id]
-
-    substitutes = frappe.get_list(
-        "Medicine",
-        fields=["name", "brand_name", "salt_composition", "strength", "dosage_form", "manufacturer_name", "type", "price", "is_generic", "image", "pack_size_label", "is_discontinued"],
-        filters=filters,
-        order_by="price asc",
-        limit_page_length=10
-    )
-    
-    # Map fields for frontend compatibility
-    for sub in substitutes:
-        sub['manufacturer'] = sub.get('manufacturer_name')
-        if not sub.get('dosage_form') and sub.get('type'):
-            sub['dosage_form'] = sub.get('type')
-        sub['is_discontinued'] = 1 if sub.get('is_discontinued') else 0
+    source_med, substitutes = search_substitutes(medicine_id, source_med, cint(start), cint(page_length) or 10)
+    set_substitute_fields(substitutes)
 
-    if not substitutes:
+    if not substitutes and not cint(start):
         # AI Fallback for Substitutes
         prompt = f"""
         Find cheaper substitutes for medicine with Salt: "{source_med.salt_composition}" available in India.
-        Reference Price to beat: INR {source_med.price}.
+        Reference Price to beat: INR {source_med.price or "unknown"}.
         Return a JSON LIST (ONLY JSON) of 3-5 objects:
         [{{
             "name": "AI_SUB_1",
@@ -418,15 +760,124 @@ def get_substitutes(medicine_id=None, salt_composition=None, current_price=None)
 
     return substitutes
 
+@read_from_replica
+def search_substitutes(medicine_id, source_med, start, page_length):
+    """
+    (source, ranked substitutes) of a catalog medicine, or of an AI item's `source_med`.
+    Cache misses are read from the read replica when the site has one.
+    """
+    if source_med is None:
+        # Hot medicines are served from the worker or Redis, without a query
+        source_med = get_medicine(medicine_id)
+        if not source_med:
+            frappe.throw("Medicine not found")
+
+    substitutes = find_substitutes(
+        source_med, source_med.salt_composition, exclude=medicine_id, start=start, page_length=page_length
+    )
+    return source_med, substitutes
+
 @frappe.whitelist(allow_guest=True)
-def translate_text(text, target_language="Hindi"):
-    if not text:
+@http_cache(max_age=300)
+@read_from_replica
+def get_substitutes_bulk(medicine_ids, start=0, page_length=3):
+    """
+    The best substitutes of several catalog medicines at once, e.g. for "cheaper
+    alternative" badges or the savings of a cart: {medicine_id: [substitutes]}, ranked
+    as in get_substitutes. At most MAX_BULK_SUBSTITUTE_IDS ids per call, page through
+    each medicine's substitutes with start and page_length.
+    """
+    if isinstance(medicine_ids, str):
+        medicine_ids = json.loads(medicine_ids)
+    if not isinstance(medicine_ids, list) or len(medicine_ids) > MAX_BULK_SUBSTITUTE_IDS:
+        frappe.throw(f"Pass a list of at most {MAX_BULK_SUBSTITUTE_IDS} medicine ids", frappe.ValidationError)
+
+    page_length = min(max(cint(page_length) or 3, 1), MAX_BULK_SUBSTITUTES_PER_ITEM)
+
+    # One query (or none, when cached) for the medicines, one per group field for their substitutes
+    medicines = get_cached_medicines(str(m) for m in medicine_ids if m)
+    substitutes = find_substitutes_bulk(medicines.values(), start=cint(start), page_length=page_length)
+    for rows in substitutes.values():
+        set_substitute_fields(rows)
+    return substitutes
+
+def set_substitute_fields(substitutes):
+    # Map fields for frontend compatibility
+    for sub in substitutes:
+        sub['manufacturer'] = sub.get('manufacturer_name')
+        if not sub.get('dosage_form') and sub.get('type'):
+            sub['dosage_form'] = sub.get('type')
+        sub['is_discontinued'] = 1 if sub.get('is_discontinued') else 0
+
+@frappe.whitelist(allow_guest=True)
+def translate_text(text, target_language="Hindi", stream=0):
+    """
+    Translation from the translation memory, or from the AI provider (then remembered).
+    Pass stream=1 to receive it as Server-Sent Events while it is generated.
+    """
+    if not normalize_text(text):
         return ""
+    validate_language(target_language)
+    
+    if not cint(stream):
+        return translate_with_memory([text], target_language)[0]
+    
+    translation = get_translations([text], target_language).get(normalize_text(text))
+    if translation is not None:
+        return sse_response(lambda: iter([translation]), "translate")
+    
+    def stream_and_remember():
+        translation = yield from stream_ai(build_translate_prompt(text, target_language))
+        if translation:
+            set_translations({text: translation}, target_language)
+    
+    return sse_response(stream_and_remember, "translate")
+
+@frappe.whitelist(allow_guest=True)
+def translate_texts(texts, target_language="Hindi"):
+    """Translations of a JSON list of texts, in order; the untranslated ones in one AI call per batch."""
+    if isinstance(texts, str):
+        texts = json.loads(texts)
+    if not isinstance(texts, list) or len(texts) > MAX_TRANSLATE_TEXTS:
+        frappe.throw(f"Pass a list of at most {MAX_TRANSLATE_TEXTS} texts", frappe.ValidationError)
+    
+    return translate_with_memory([str(text or "") for text in texts], target_language)
+
+@frappe.whitelist(allow_guest=True)
+def get_translation_languages():
+    return TRANSLATION_LANGUAGES
+
+@frappe.whitelist(allow_guest=True)
+def explain_medicine(medicine, stream=0):
+    """
+    Plain language explanation of a catalog medicine, the stored AI explanation when
+    it has one. Pass stream=1 to receive it as Server-Sent Events.
+    """
+    details = frappe.db.get_value(
+        "Medicine", medicine, ["brand_name", "salt_composition", "dosage_form", "ai_explanation"], as_dict=True
+    )
+    if not details:
+        frappe.throw("Medicine not found", frappe.DoesNotExistError)
+    
+    if details.ai_explanation:
+        explanation = details.ai_explanation
+        return sse_response(lambda: iter([explanation]), "explanation") if cint(stream) else explanation
     
-    prompt = f"Translate the following medical text to {target_language}. Keep it simple and easy to understand. Return ONLY the translated text.\n\nText: {text}"
+    prompt = build_explanation_prompt(details)
+    if cint(stream):
+        return sse_response(lambda: stream_ai(prompt), "explanation")
     return query_ai(prompt)
 
+def build_explanation_prompt(medicine):
+    return f"""
+    Explain the medicine {medicine.brand_name} ({medicine.dosage_form or "medicine"}, contains {medicine.salt_composition or "unknown ingredients"}), as sold in India.
+    In 3-4 simple sentences: what it is, its primary uses, how it works, and key precautions.
+    Return ONLY the explanation as plain text, no markdown.
+    """
+
 @frappe.whitelist(allow_guest=True)
+# Versioned with the catalog, bumped on save by a doc event (see hooks.py)
+@http_cache(max_age=3600)
 def get_contact_us_settings():
     """Fetch Contact Us Settings for public display safely."""
     try:
@@ -510,7 +961,15 @@ def submit_contact_query(email, message, query_type="Other"):
     return {"status": "success", "message": "Your message has been sent successfully."}
 
 @frappe.whitelist(allow_guest=True)
-def browse_medicines(start=0, limit=20, search_text=None, manufacturer=None, dosage_form=None, has_image=None, order_by='modified desc'):
+@http_cache(max_age=60, server_cache_ttl=300)
+@read_from_replica
+def browse_medicines(start=0, limit=20, search_text=None, manufacturer=None, dosage_form=None, has_image=None, order_by='modified desc', after=None):
+    """
+    Catalog listing. Pages either by offset (`start`) or, cheaper for deep pages,
+    by the opaque `after` cursor returned as `next_after` with every full page.
+    Cursors are only given for the KEYSET_SORT_FIELDS sorts, `after` with another
+    sort is rejected.
+    """
     start = int(start)
     limit = int(limit)
     
@@ -539,13 +998,31 @@ def browse_medicines(start=0, limit=20, search_text=None, manufacturer=None, dos
         conditions.append("(brand_name LIKE %s OR salt_composition LIKE %s OR manufacturer_name LIKE %s)")
         values.extend([search_term, search_term, search_term])
         
-    where_clause = " AND ".join(conditions)
-    
     # Validate order_by to prevent SQL injection
     valid_sort_fields = ['name', 'brand_name', 'price', 'modified', 'creation', 'salt_composition', 'strength']
-    sort_field = order_by.split(' ')[0]
-    if sort_field not in valid_sort_fields:
-        order_by = 'modified desc'
+    sort_field, _, sort_order = (order_by or '').strip().partition(' ')
+    sort_order = sort_order.strip().lower() or 'asc'
+    if sort_field not in valid_sort_fields or sort_order not in ('asc', 'desc'):
+        sort_field, sort_order = 'modified', 'desc'
+    
+    # 3. Keyset pagination: continue after the (sort value, name) of the previous page's last row.
+    # Ties on the sort field are broken by name, so the order is total and no row is skipped.
+    use_keyset = sort_field in KEYSET_SORT_FIELDS
+    if after and not use_keyset:
+        frappe.throw(f"Pagination cursors are not supported when sorting by {sort_field}, use start", frappe.ValidationError)
+    cursor = decode_cursor(after) if after else None
+    if cursor:
+        op = '<' if sort_order == 'desc' else '>'
+        if sort_field == 'name':
+            conditions.append(f"name {op} %s")
+            values.append(cursor[1])
+        else:
+            conditions.append(f"({sort_field} {op} %s OR ({sort_field} = %s AND name {op} %s))")
+            values.extend([cursor[0], cursor[0], cursor[1]])
+        start = 0
+        
+    where_clause = " AND ".join(conditions)
+    order_by = f"{sort_field} {sort_order}" if sort_field == 'name' else f"{sort_field} {sort_order}, name {sort_order}"
         
     sql_query = f"""
         SELECT 
@@ -562,6 +1039,10 @@ def browse_medicines(start=0, limit=20, search_text=None, manufacturer=None, dos
     
     medicines = frappe.db.sql(sql_query, tuple(values), as_dict=True)
     
+    if use_keyset and len(medicines) == limit:
+        last = medicines[-1]
+        frappe.response["next_after"] = encode_cursor(last.get(sort_field), last.name)
+    
     # Post-processing
     for m in medicines:
         if not m.get('dosage_form') and m.get('type'):
@@ -573,32 +1054,28 @@ def browse_medicines(start=0, limit=20, search_text=None, manufacturer=None, dos
         
     return medicines
 
+def encode_cursor(sort_value, name):
+    payload = json.dumps([sort_value, name], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(after):
+    try:
+        sort_value, name = json.loads(base64.urlsafe_b64decode(after.encode()))
+        return sort_value, name
+    except Exception:
+        frappe.throw("Invalid pagination cursor")
+
 @frappe.whitelist(allow_guest=True)
+@http_cache(max_age=300)
+@read_from_replica
 def get_catalog_filters():
-    # Efficiently fetch distinct values for filters
-    # Limit to top 500 active manufacturers to avoid freezing
-    
-    manufacturers = frappe.db.sql("""
-        SELECT DISTINCT manufacturer_name 
-        FROM `tabMedicine` 
-        WHERE manufacturer_name IS NOT NULL AND manufacturer_name != ''
-        ORDER BY manufacturer_name ASC 
-        LIMIT 1000
-    """, as_dict=True)
-    
-    # Limit list size in python if needed or keep full list if < few thousands. 
-    # For 3 lakhs rows, distinct manufacturers might be 5k-10k. 
-    # Sending 5k strings is ~100KB gzipped. It's acceptable for a "catalog app".
-    
-    dosage_forms = frappe.db.sql("""
-        SELECT DISTINCT dosage_form 
-        FROM `tabMedicine` 
-        WHERE dosage_form IS NOT NULL AND dosage_form != ''
-        ORDER BY dosage_form ASC 
-        LIMIT 1000
-    """, as_dict=True)
-    
-    return {
-        "manufacturers": [m.manufacturer_name for m in manufacturers],
-        "dosage_forms": [d.dosage_form for d in dosage_forms]
-    }
+    """
+    Dosage forms and the largest manufacturers with their Medicine counts, from the
+    maintained "Catalog Facet" summary. Other manufacturers: search_manufacturers.
+    """
+    return get_facets()
+
+@frappe.whitelist(allow_guest=True)
+@http_cache(max_age=300, server_cache_ttl=600)
+def search_manufacturers(prefix=None, limit=20):
+    return find_manufacturers(prefix, limit)
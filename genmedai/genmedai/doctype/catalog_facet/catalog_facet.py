@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+class CatalogFacet(Document):
+	pass
+
+
+def on_doctype_update():
+	# Manufacturer prefix lookup, most common first
+	frappe.db.add_index("Catalog Facet", ["facet", "value"])
@@ -4,6 +4,13 @@
 import frappe
 from frappe.model.document import Document
 
+from genmedai.genmedai.utils.catalog_facets import update_facets
+from genmedai.genmedai.utils.cheapest_equivalent import get_pack_values, update_cheapest_equivalent
+from genmedai.genmedai.utils.composition import derive_composition
+from genmedai.genmedai.utils.http_cache import bump_catalog_version
+from genmedai.genmedai.utils.medicine_cache import invalidate_medicine
+from genmedai.genmedai.utils.suggest import record_medicine_change
+
 class Medicine(Document):
 	def validate(self):
 		if not self.brand_name:
@@ -24,3 +31,44 @@ class Medicine(Document):
 			# Only throw if we still don't have it (optional: or just allow empty)
 			# frappe.throw("Salt Composition is required")
 			pass
+
+		self.set_composition()
+		self.set_unit_price()
+
+	def set_composition(self):
+		composition = derive_composition(self.salt_composition)
+		self.base_salt = composition.base_salt
+		self.composition_key = composition.composition_key
+		self.set("ingredients", composition.ingredients)
+
+	def set_unit_price(self):
+		self.update(get_pack_values(self.pack_size_label, self.price))
+
+	def on_update(self):
+		update_facets(self)
+		update_cheapest_equivalent(self)
+		record_medicine_change(self)
+		invalidate_medicine(self)
+		bump_catalog_version()
+
+	def on_trash(self):
+		update_facets(self, deleted=True)
+		update_cheapest_equivalent(self, deleted=True)
+		record_medicine_change(self, deleted=True)
+		invalidate_medicine(self, deleted=True)
+		bump_catalog_version()
+
+
+def on_doctype_update():
+	# Substitute lookup: equality on composition_key, already ordered by price
+	frappe.db.add_index("Medicine", ["composition_key", "price"])
+	# Cheapest equivalent refresh: one composition group and pack unit, by unit price
+	frappe.db.add_index("Medicine", ["composition_key", "pack_unit", "unit_price"])
+
+	# Catalog browsing (browse_medicines): filter + sort paths served in index order.
+	# InnoDB appends the primary key (name) to each index, which is the keyset tie-breaker.
+	frappe.db.add_index("Medicine", ["manufacturer_name", "dosage_form", "price"])
+	frappe.db.add_index("Medicine", ["manufacturer_name", "dosage_form", "modified"])
+	frappe.db.add_index("Medicine", ["dosage_form", "price"])
+	frappe.db.add_index("Medicine", ["dosage_form", "modified"])
+	frappe.db.add_index("Medicine", ["price"])
@@ -1,9 +1,40 @@
 # Copyright (c) 2025, Adimyra Systems Private Limited and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from genmedai.genmedai.utils.composition import get_composition_key, parse_composition
+
 
 class TestMedicine(FrappeTestCase):
-	pass
+	def test_parse_composition(self):
+		self.assertEqual(
+			parse_composition("Amoxycillin  (500mg) +  Clavulanic Acid (125mg)"),
+			[
+				{"ingredient": "Amoxycillin", "strength": "500mg"},
+				{"ingredient": "Clavulanic Acid", "strength": "125mg"},
+			],
+		)
+		self.assertEqual(parse_composition("Paracetamol"), [{"ingredient": "Paracetamol", "strength": ""}])
+		self.assertEqual(parse_composition(""), [])
+
+	def test_composition_key_is_order_insensitive(self):
+		a = get_composition_key(parse_composition("Amoxycillin (500mg) + Clavulanic Acid (125 mg)"))
+		b = get_composition_key(parse_composition("clavulanic acid (125mg) + Amoxycillin (500mg)"))
+		c = get_composition_key(parse_composition("Amoxycillin (250mg) + Clavulanic Acid (125mg)"))
+		self.assertEqual(a, b)
+		self.assertNotEqual(a, c)
+
+	def test_composition_set_on_save(self):
+		doc = frappe.get_doc({
+			"doctype": "Medicine",
+			"brand_name": "_Test Augmentin 625",
+			"short_composition1": "Amoxycillin (500mg)",
+			"short_composition2": "Clavulanic Acid (125mg)",
+			"price": 200,
+		}).insert(ignore_permissions=True)
+
+		self.assertEqual(doc.base_salt, "Amoxycillin")
+		self.assertTrue(doc.composition_key)
+		self.assertEqual([d.ingredient for d in doc.ingredients], ["Amoxycillin", "Clavulanic Acid"])
@@ -0,0 +1,9 @@
+frappe.ui.form.on('Medicine Import Run', {
+    refresh: function (frm) {
+        if (["Running", "Failed", "Partially Failed"].includes(frm.doc.status)) {
+            frm.add_custom_button(__("Resume"), function () {
+                frm.call("resume").then(() => frm.reload_doc());
+            });
+        }
+    }
+});
@@ -0,0 +1,250 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+# For license information, please see license.txt
+
+import csv
+import os
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+from genmedai.genmedai.utils.catalog_facets import rebuild_facets
+from genmedai.genmedai.utils.cheapest_equivalent import rebuild_cheapest_equivalents
+from genmedai.genmedai.utils.http_cache import bump_catalog_version
+from genmedai.genmedai.utils.import_medicines import BulkMedicineImporter
+from genmedai.genmedai.utils.medicine_cache import clear_medicine_cache
+from genmedai.genmedai.utils.suggest import reset_suggest_index
+
+# A chunk is processed by one job at a time, under a lock renewed at every checkpoint:
+# the lock of a worker that died expires, and the chunk can be resumed
+CHUNK_LOCK_PREFIX = "genmedai:medicine_import_chunk"
+CHUNK_LOCK_TTL = 600
+
+class MedicineImportRun(Document):
+	"""
+	A catalog CSV import split into byte ranges, each processed by its own `long`
+	queue job that checkpoints the offset it has committed. Failed or interrupted
+	chunks resume from their last checkpoint.
+
+	Rows must not contain quoted line breaks, since chunks are split on lines.
+	"""
+
+	def validate(self):
+		if not os.path.isfile(self.file_path or ""):
+			frappe.throw(f"File not found: {self.file_path}")
+
+		self.parallel_jobs = max(cint(self.parallel_jobs), 1)
+		self.batch_size = max(cint(self.batch_size), 1)
+
+	def before_insert(self):
+		self.plan_chunks()
+
+	def after_insert(self):
+		self.enqueue_chunks()
+
+	def plan_chunks(self):
+		size = os.path.getsize(self.file_path)
+
+		with open(self.file_path, "rb") as f:
+			f.readline()  # header
+			boundaries = [f.tell()]
+			step = max((size - boundaries[0]) // self.parallel_jobs, 1)
+
+			for i in range(1, self.parallel_jobs):
+				# Move each boundary forward to the start of the next line
+				f.seek(max(boundaries[0] + step * i - 1, boundaries[-1]))
+				f.readline()
+				if boundaries[-1] < f.tell() < size:
+					boundaries.append(f.tell())
+
+		boundaries.append(size)
+
+		self.set("chunks", [])
+		for start, end in zip(boundaries, boundaries[1:]):
+			self.append("chunks", {
+				"status": "Pending",
+				"start_offset": start,
+				"end_offset": end,
+				"committed_offset": start,
+			})
+
+	@frappe.whitelist()
+	def resume(self):
+		# "Running" is allowed too: chunks of a worker that died mid-run stay Running.
+		# Those still held by a live job are left to it (see is_chunk_locked).
+		if self.status == "Completed":
+			frappe.throw("This import run is already completed")
+
+		self.enqueue_chunks()
+
+	def enqueue_chunks(self):
+		for chunk in self.chunks:
+			if chunk.status == "Completed" or is_chunk_locked(chunk.name):
+				continue
+
+			frappe.db.set_value("Medicine Import Chunk", chunk.name, {"status": "Queued", "error": None})
+			frappe.enqueue(
+				"genmedai.genmedai.doctype.medicine_import_run.medicine_import_run.process_chunk",
+				queue="long",
+				timeout=4 * 3600,
+				enqueue_after_commit=True,
+				run_name=self.name,
+				chunk_name=chunk.name,
+			)
+
+		self.db_set("status", "Queued")
+
+
+def start_import_run(file_path, parallel_jobs=4, batch_size=2000, dry_run=0):
+	"""
+	Usage: bench execute genmedai.genmedai.doctype.medicine_import_run.medicine_import_run.start_import_run --kwargs "{'file_path': '/path/to/file.csv', 'parallel_jobs': 8}"
+	"""
+	run = frappe.get_doc({
+		"doctype": "Medicine Import Run",
+		"file_path": file_path,
+		"parallel_jobs": parallel_jobs,
+		"batch_size": batch_size,
+		"dry_run": cint(dry_run),
+	}).insert(ignore_permissions=True)
+	frappe.db.commit()
+
+	print(f"Started {run.name} with {len(run.chunks)} chunks")
+	return run.name
+
+
+def get_chunk_lock_key(chunk_name):
+	return frappe.cache().make_key(f"{CHUNK_LOCK_PREFIX}:{chunk_name}")
+
+
+def is_chunk_locked(chunk_name):
+	return bool(frappe.cache().exists(get_chunk_lock_key(chunk_name)))
+
+
+def process_chunk(run_name, chunk_name):
+	cache = frappe.cache()
+	lock_key = get_chunk_lock_key(chunk_name)
+	lock_token = frappe.generate_hash(length=10)
+	if not cache.set(lock_key, lock_token, nx=True, ex=CHUNK_LOCK_TTL):
+		# Another job is importing this chunk, a second one would import its rows twice
+		return
+
+	try:
+		_process_chunk(run_name, chunk_name, lambda: cache.expire(lock_key, CHUNK_LOCK_TTL))
+	finally:
+		if frappe.safe_decode(cache.get(lock_key)) == lock_token:
+			cache.delete(lock_key)
+
+
+def _process_chunk(run_name, chunk_name, renew_lock):
+	run = frappe.db.get_value(
+		"Medicine Import Run", run_name, ["file_path", "batch_size", "dry_run", "started_on"], as_dict=True
+	)
+	chunk = frappe.db.get_value(
+		"Medicine Import Chunk", chunk_name,
+		["idx", "end_offset", "committed_offset", "rows_imported", "rows_failed", "error_file"],
+		as_dict=True
+	)
+
+	frappe.db.set_value("Medicine Import Chunk", chunk_name, "status", "Running", update_modified=False)
+	if not run.started_on:
+		frappe.db.set_value("Medicine Import Run", run_name, {"status": "Running", "started_on": now_datetime()})
+	else:
+		frappe.db.set_value("Medicine Import Run", run_name, "status", "Running")
+	frappe.db.commit()
+
+	importer = BulkMedicineImporter(dry_run=cint(run.dry_run), autocommit=False)
+	error_file = chunk.error_file or frappe.get_site_path("private", "files", f"{run_name}-chunk-{chunk.idx}-errors.csv")
+
+	try:
+		with open(run.file_path, "rb") as f:
+			fieldnames = [name.strip() for name in next(csv.reader([f.readline().decode("utf-8-sig")]))]
+			f.seek(chunk.committed_offset)
+
+			while f.tell() < chunk.end_offset:
+				lines = []
+				while len(lines) < run.batch_size and f.tell() < chunk.end_offset:
+					line = f.readline()
+					if not line:
+						break
+					lines.append(line.decode("utf-8"))
+
+				if not lines:
+					break
+
+				before = dict(importer.stats)
+				importer.import_rows(list(csv.DictReader(lines, fieldnames=fieldnames)))
+
+				chunk.rows_imported += (importer.stats["inserted"] - before["inserted"]) + (importer.stats["updated"] - before["updated"])
+				chunk.rows_failed += importer.stats["errors"] - before["errors"]
+				if importer.rejected:
+					write_rejected_rows(error_file, fieldnames, importer.rejected)
+					chunk.error_file = error_file
+					importer.rejected = []
+
+				# Checkpoint in the same transaction as the rows it covers
+				frappe.db.set_value("Medicine Import Chunk", chunk_name, {
+					"committed_offset": f.tell(),
+					"rows_imported": chunk.rows_imported,
+					"rows_failed": chunk.rows_failed,
+					"error_file": chunk.error_file,
+				}, update_modified=False)
+				frappe.db.commit()
+				renew_lock()
+
+		frappe.db.set_value("Medicine Import Chunk", chunk_name, "status", "Completed", update_modified=False)
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		frappe.db.set_value("Medicine Import Chunk", chunk_name, {
+			"status": "Failed",
+			"error": frappe.get_traceback(),
+		}, update_modified=False)
+		frappe.db.commit()
+	finally:
+		update_run_status(run_name)
+
+
+def write_rejected_rows(error_file, fieldnames, rejected):
+	is_new = not os.path.exists(error_file)
+	with open(error_file, "a", newline="", encoding="utf-8") as f:
+		writer = csv.DictWriter(f, fieldnames=[*fieldnames, "error"], extrasaction="ignore")
+		if is_new:
+			writer.writeheader()
+		for row, reason in rejected:
+			writer.writerow({**row, "error": reason})
+
+
+def update_run_status(run_name):
+	chunks = frappe.get_all(
+		"Medicine Import Chunk",
+		filters={"parent": run_name, "parenttype": "Medicine Import Run"},
+		fields=["status", "rows_imported", "rows_failed"],
+	)
+	statuses = {c.status for c in chunks}
+
+	values = {
+		"rows_imported": sum(c.rows_imported for c in chunks),
+		"rows_failed": sum(c.rows_failed for c in chunks),
+	}
+
+	if statuses & {"Pending", "Queued", "Running"}:
+		values["status"] = "Running"
+	else:
+		if statuses == {"Completed"}:
+			values["status"] = "Completed"
+		elif "Completed" in statuses:
+			values["status"] = "Partially Failed"
+		else:
+			values["status"] = "Failed"
+		values["finished_on"] = now_datetime()
+
+	frappe.db.set_value("Medicine Import Run", run_name, values)
+	frappe.db.commit()
+
+	# The last chunk to finish refreshes what Medicine events would have maintained
+	if values["status"] != "Running" and not cint(frappe.db.get_value("Medicine Import Run", run_name, "dry_run")):
+		bump_catalog_version()
+		clear_medicine_cache()
+		rebuild_facets()
+		rebuild_cheapest_equivalents()
+		reset_suggest_index()
@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+class SearchLog(Document):
+	pass
+
+
+def on_doctype_update():
+	# Top queries / zero result reports group by query over a date range
+	frappe.db.add_index("Search Log", ["searched_on", "query"])
@@ -0,0 +1,14 @@
+// Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["AI Usage"] = {
+	filters: [
+		{
+			fieldname: "days",
+			label: __("Days"),
+			fieldtype: "Int",
+			default: 1,
+			reqd: 1,
+		},
+	],
+};
@@ -0,0 +1,36 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+# For license information, please see license.txt
+
+from frappe import _
+
+from genmedai.genmedai.utils.ai_metrics import get_stats
+
+
+def execute(filters=None):
+	filters = filters or {}
+
+	data = get_stats(filters.get("days"))
+	for row in data:
+		row["cache_hit_rate"] *= 100
+		row["error_rate"] *= 100
+
+	return get_columns(), data
+
+
+def get_columns():
+	return [
+		{"fieldname": "endpoint", "label": _("Endpoint"), "fieldtype": "Data", "width": 140},
+		{"fieldname": "calls", "label": _("Calls"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "cache_hits", "label": _("Cache Hits"), "fieldtype": "Int", "width": 100},
+		{"fieldname": "cache_hit_rate", "label": _("Cache Hit Rate"), "fieldtype": "Percent", "width": 120},
+		{"fieldname": "errors", "label": _("Errors"), "fieldtype": "Int", "width": 90},
+		{"fieldname": "error_rate", "label": _("Error Rate"), "fieldtype": "Percent", "width": 100},
+		{"fieldname": "prompt_tokens", "label": _("Prompt Tokens"), "fieldtype": "Int", "width": 120},
+		{"fieldname": "completion_tokens", "label": _("Completion Tokens"), "fieldtype": "Int", "width": 140},
+		{"fieldname": "prompt_chars", "label": _("Prompt Chars"), "fieldtype": "Int", "width": 120},
+		{"fieldname": "response_chars", "label": _("Response Chars"), "fieldtype": "Int", "width": 130},
+		{"fieldname": "avg_latency_ms", "label": _("Avg (ms)"), "fieldtype": "Float", "width": 90},
+		{"fieldname": "p50_ms", "label": _("p50 (ms)"), "fieldtype": "Float", "width": 90},
+		{"fieldname": "p95_ms", "label": _("p95 (ms)"), "fieldtype": "Float", "width": 90},
+		{"fieldname": "p99_ms", "label": _("p99 (ms)"), "fieldtype": "Float", "width": 90},
+	]
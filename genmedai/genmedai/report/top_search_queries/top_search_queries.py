@@ -0,0 +1,45 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	return get_columns(), get_data(filters)
+
+
+def get_columns():
+	return [
+		{"fieldname": "query", "label": _("Query"), "fieldtype": "Data", "width": 260},
+		{"fieldname": "searches", "label": _("Searches"), "fieldtype": "Int", "width": 100},
+		{"fieldname": "avg_results", "label": _("Avg Results"), "fieldtype": "Float", "width": 110},
+		{"fieldname": "zero_result_searches", "label": _("Zero Result Searches"), "fieldtype": "Int", "width": 160},
+		{"fieldname": "ai_searches", "label": _("AI Used"), "fieldtype": "Int", "width": 100},
+		{"fieldname": "avg_latency_ms", "label": _("Avg Latency (ms)"), "fieldtype": "Float", "width": 140},
+		{"fieldname": "last_searched_on", "label": _("Last Searched On"), "fieldtype": "Datetime", "width": 170},
+	]
+
+
+def get_data(filters):
+	return frappe.db.sql("""
+		SELECT
+			query,
+			COUNT(*) AS searches,
+			AVG(result_count) AS avg_results,
+			SUM(result_count = 0) AS zero_result_searches,
+			SUM(ai_used) AS ai_searches,
+			AVG(latency_ms) AS avg_latency_ms,
+			MAX(searched_on) AS last_searched_on
+		FROM `tabSearch Log`
+		WHERE searched_on >= %(from_date)s AND searched_on < %(to_date)s
+		GROUP BY query
+		ORDER BY searches DESC
+		LIMIT %(limit)s
+	""", {
+		"from_date": getdate(filters.from_date),
+		"to_date": add_days(getdate(filters.to_date), 1),
+		"limit": cint(filters.limit) or 100,
+	}, as_dict=True)
@@ -0,0 +1,27 @@
+// Copyright (c) 2026, Adimyra Systems Private Limited and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Zero Result Searches"] = {
+	filters: [
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.add_days(frappe.datetime.get_today(), -7),
+			reqd: 1,
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.get_today(),
+			reqd: 1,
+		},
+		{
+			fieldname: "limit",
+			label: __("Limit"),
+			fieldtype: "Int",
+			default: 100,
+		},
+	],
+};
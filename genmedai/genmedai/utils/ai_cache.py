@@ -0,0 +1,234 @@
+import hashlib
+import time
+
+import frappe
+from frappe.utils import add_to_date, cint, flt, get_datetime, now_datetime
+
+# Two tiers: Redis (fast, LRU bounded) in front of the "AI Response Cache" table,
+# which survives Redis restarts and is used on its own when Redis is unavailable.
+# Writes to the table run in `short` jobs, so a request never waits for them or commits.
+CACHE_PREFIX = "genmedai:ai_cache"
+LRU_KEY = f"{CACHE_PREFIX}:lru"
+STATS_KEY = f"{CACHE_PREFIX}:stats"
+
+DEFAULT_TTL_HOURS = 168
+DEFAULT_NEGATIVE_TTL_HOURS = 24
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def get_cache_settings():
+    try:
+        settings = frappe.get_cached_doc("GenMedAI Settings")
+    except Exception:
+        settings = frappe._dict()
+
+    return frappe._dict(
+        enabled=not cint(settings.get("disable_ai_cache")),
+        ttl=cint(settings.get("ai_cache_ttl_hours") or DEFAULT_TTL_HOURS) * 3600,
+        negative_ttl=cint(settings.get("ai_cache_negative_ttl_hours") or DEFAULT_NEGATIVE_TTL_HOURS) * 3600,
+        max_entries=cint(settings.get("ai_cache_max_entries") or DEFAULT_MAX_ENTRIES),
+    )
+
+
+def normalize_prompt(prompt):
+    # Whitespace doesn't change the answer ("Dolo 650" vs "Dolo  650"). Case can: a
+    # translation keeps the case of the text, drug and brand names are case sensitive
+    return " ".join((prompt or "").split())
+
+
+def make_cache_key(provider, model, prompt):
+    raw = "\x00".join((provider or "", model or "", normalize_prompt(prompt)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_null_response(response):
+    """The prompts ask the model to answer `null` for unknown / nonsense terms."""
+    cleaned = (response or "").strip().strip("`").strip()
+    if cleaned.lower().startswith("json"):
+        cleaned = cleaned[4:].strip()
+    return cleaned.lower() in ("null", "none", "")
+
+
+def get_cached_response(provider, model, prompt, track_miss=True):
+    """
+    Returns a (hit, response) tuple for the given provider, model and prompt.
+    Pass track_miss=False for a peek that will be followed by a real lookup.
+    """
+    settings = get_cache_settings()
+    if not settings.enabled:
+        return False, None
+
+    key = make_cache_key(provider, model, prompt)
+    entry = _redis_get(key)
+
+    if entry is None:
+        entry = _db_get(key)
+        if entry is not None:
+            _redis_set(key, entry, entry.pop("ttl"), settings.max_entries)
+    else:
+        _redis_touch(key)
+
+    if entry is None:
+        if track_miss:
+            _incr_stat("misses")
+        return False, None
+
+    _incr_stat("negative_hits" if entry.get("is_negative") else "hits")
+    return True, entry["response"]
+
+
+def set_cached_response(provider, model, prompt, response):
+    settings = get_cache_settings()
+    if not settings.enabled or response is None:
+        return
+
+    key = make_cache_key(provider, model, prompt)
+    is_negative = is_null_response(response)
+    entry = {"response": response, "is_negative": int(is_negative)}
+    ttl = settings.negative_ttl if is_negative else settings.ttl
+
+    _redis_set(key, entry, ttl, settings.max_entries)
+    _enqueue_db_write(
+        _db_set, key=key, provider=provider, model=model, prompt=prompt, entry=entry,
+        expires_on=add_to_date(now_datetime(), seconds=ttl),
+    )
+
+
+@frappe.whitelist()
+def get_cache_stats():
+    frappe.only_for("System Manager")
+
+    stats = {name: _get_stat(name) for name in ("hits", "negative_hits", "misses")}
+    lookups = sum(stats.values())
+    stats["hit_rate"] = flt((stats["hits"] + stats["negative_hits"]) / lookups, 4) if lookups else 0
+
+    try:
+        cache = frappe.cache()
+        stats["redis_entries"] = cache.zcard(cache.make_key(LRU_KEY))
+    except Exception:
+        stats["redis_entries"] = None
+
+    stats["db_entries"] = frappe.db.count("AI Response Cache")
+    return stats
+
+
+def trim_db_cache():
+    """Daily: drop expired rows and evict the least recently used beyond the size limit."""
+    settings = get_cache_settings()
+
+    frappe.db.delete("AI Response Cache", {"expires_on": ("<", now_datetime())})
+
+    overflow = frappe.db.count("AI Response Cache") - settings.max_entries
+    if overflow > 0:
+        frappe.db.sql("""
+            DELETE FROM `tabAI Response Cache`
+            ORDER BY last_accessed ASC
+            LIMIT %s
+        """, overflow)
+
+
+def _redis_get(key):
+    try:
+        return frappe.cache().get_value(f"{CACHE_PREFIX}:{key}")
+    except Exception:
+        return None
+
+
+def _redis_set(key, entry, ttl, max_entries):
+    try:
+        cache = frappe.cache()
+        cache.set_value(f"{CACHE_PREFIX}:{key}", entry, expires_in_sec=ttl)
+
+        lru = cache.make_key(LRU_KEY)
+        cache.zadd(lru, {key: time.time()})
+
+        overflow = cache.zcard(lru) - max_entries
+        if overflow > 0:
+            victims = [frappe.safe_decode(v) for v in cache.zrange(lru, 0, overflow - 1)]
+            cache.delete_value([f"{CACHE_PREFIX}:{v}" for v in victims])
+            cache.zrem(lru, *victims)
+    except Exception:
+        # Redis being down must never break a search, the DB tier still works
+        pass
+
+
+def _redis_touch(key):
+    try:
+        cache = frappe.cache()
+        cache.zadd(cache.make_key(LRU_KEY), {key: time.time()})
+    except Exception:
+        pass
+
+
+def _db_get(key):
+    row = frappe.db.get_value(
+        "AI Response Cache", key, ["response", "is_negative", "expires_on"], as_dict=True
+    )
+    if not row:
+        return None
+
+    remaining = (get_datetime(row.expires_on) - now_datetime()).total_seconds() if row.expires_on else 0
+    if remaining <= 0:
+        return None
+
+    _enqueue_db_write(_db_touch, key=key, accessed_on=now_datetime())
+    return {"response": row.response, "is_negative": row.is_negative, "ttl": int(remaining)}
+
+
+def _enqueue_db_write(fn, **kwargs):
+    try:
+        frappe.enqueue(f"{__name__}.{fn.__name__}", queue="short", **kwargs)
+    except Exception:
+        # No queue without Redis: the table is the only tier left, write it in the request
+        fn(**kwargs)
+        # Guest searches are GET requests, which Frappe doesn't commit by default
+        frappe.local.flags.commit = True
+
+
+def _db_touch(key, accessed_on):
+    frappe.db.sql("""
+        UPDATE `tabAI Response Cache`
+        SET last_accessed = %(accessed_on)s, hit_count = hit_count + 1
+        WHERE name = %(key)s
+    """, {"key": key, "accessed_on": accessed_on})
+
+
+def _db_set(key, provider, model, prompt, entry, expires_on):
+    values = {
+        "response": entry["response"],
+        "is_negative": entry["is_negative"],
+        "expires_on": expires_on,
+        "last_accessed": now_datetime(),
+    }
+
+    try:
+        if frappe.db.exists("AI Response Cache", key):
+            frappe.db.set_value("AI Response Cache", key, values, update_modified=False)
+        else:
+            frappe.get_doc({
+                "doctype": "AI Response Cache",
+                "cache_key": key,
+                "provider": provider,
+                "model": model,
+                "prompt": prompt,
+                **values,
+            }).insert(ignore_permissions=True)
+    except frappe.DuplicateEntryError:
+        # Another worker cached the same prompt first
+        pass
+
+
+def _incr_stat(name):
+    try:
+        cache = frappe.cache()
+        cache.incr(cache.make_key(f"{STATS_KEY}:{name}"))
+    except Exception:
+        pass
+
+
+def _get_stat(name):
+    try:
+        cache = frappe.cache()
+        return cint(cache.get(cache.make_key(f"{STATS_KEY}:{name}")))
+    except Exception:
+        return 0
@@ -0,0 +1,204 @@
+"""
+HTTP client for the AI providers.
+
+One pooled keep-alive session per provider and process, bounded retries with
+jittered backoff on 429/5xx and connection errors, and a circuit breaker so a
+provider outage costs searches nothing instead of a full request timeout.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens when at least `failure_rate` of the last `window` calls failed
+    (with a minimum of `min_calls`), then lets a single trial call through
+    after `cooldown` seconds. A successful trial closes the circuit again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, cooldown=30):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+
+        self.state = self.CLOSED
+        self.opened_at = 0
+        self.results = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+
+            # Open, or a half-open trial is already in flight
+            return False
+
+    def record(self, success):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                if success:
+                    self.state = self.CLOSED
+                    self.results.clear()
+                else:
+                    self._open()
+                return
+
+            self.results.append(bool(success))
+            failures = self.results.count(False)
+            if len(self.results) >= self.min_calls and failures / len(self.results) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+
+class ProviderClient:
+    def __init__(self, name, max_retries=2, backoff=0.5, max_backoff=4.0, pool_size=10, breaker=None):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.latencies = deque(maxlen=500)
+
+    @property
+    def session(self):
+        # Gunicorn/RQ fork workers: never share a connection pool across processes
+        if self._session is None or self._session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def post(self, url, json=None, headers=None, timeout=15, stream=False):
+        """
+        POST with retries. Returns the final response, which may still be an error
+        status once retries are exhausted. Raises CircuitOpenError without making a
+        request when the provider is failing, and re-raises the last connection error.
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        start = time.perf_counter()
+        response = error = None
+        success = False
+
+        # Every call is recorded, whatever it raises: a half-open circuit waits for its trial
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = error = None
+                try:
+                    response = self.session.post(url, json=json, headers=headers, timeout=timeout, stream=stream)
+                except requests.Timeout as e:
+                    # Waiting out another full timeout is worse than failing over to local results
+                    error = e
+                    break
+                except requests.ConnectionError as e:
+                    error = e
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        break
+
+                if attempt < self.max_retries:
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(self._get_delay(attempt, response))
+                    if response is not None:
+                        # A streamed response holds its connection until closed
+                        response.close()
+
+            success = error is None and response is not None and response.status_code < 400
+        finally:
+            self._record(success, time.perf_counter() - start)
+
+        if error is not None:
+            raise error
+        return response
+
+    def get_metrics(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 1)
+
+        return {
+            "provider": self.name,
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+        }
+
+    def _get_delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+
+        # Full jitter, so workers retrying together don't hit the provider in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _record(self, success, elapsed):
+        self.breaker.record(success)
+        with self._lock:
+            self.calls += 1
+            if not success:
+                self.errors += 1
+            self.latencies.append(elapsed)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider):
+    with _clients_lock:
+        if provider not in _clients:
+            _clients[provider] = ProviderClient(provider)
+        return _clients[provider]
+
+
+def get_metrics():
+    return [client.get_metrics() for client in list(_clients.values())]
@@ -0,0 +1,171 @@
+"""
+Coalescing of AI calls made at the same moment, across threads and worker processes.
+
+single_flight: callers of the same prompt share one provider call. Threads of a
+process wait on one Future; other processes wait for the leader's result in Redis.
+
+batch: distinct items (e.g. search terms to identify) arriving within BATCH_WINDOW
+are handed to one `run_batch` call, whose results are fanned back out through Redis.
+
+Both fall back to calling the provider directly if Redis is unavailable, and waiters
+give up after WAIT_TIMEOUT, so a crashed leader costs time but never an answer.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import frappe
+
+PREFIX = "genmedai:ai_coalesce"
+
+# Longer than a provider call with its retries
+LEADER_TTL = 45
+WAIT_TIMEOUT = 40
+RESULT_TTL = 30
+POLL_INTERVAL = 0.05
+
+BATCH_WINDOW = 0.15
+MAX_BATCH = 8
+
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+def single_flight(key, compute):
+    """Run `compute` once for concurrent callers with the same `key`, and share its result."""
+    with _futures_lock:
+        future = _futures.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = _futures[key] = Future()
+
+    if not is_leader:
+        try:
+            return future.result(timeout=WAIT_TIMEOUT)
+        except Exception:
+            return compute()
+
+    try:
+        result = _redis_single_flight(key, compute)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _futures_lock:
+            _futures.pop(key, None)
+
+
+def batch(namespace, item, run_batch):
+    """
+    Submit `item` to be processed together with the other items of `namespace` that
+    arrive within BATCH_WINDOW. `run_batch(items)` returns one result per item, None
+    for items it could not answer. Returns (found, result); callers should process the
+    item on their own when nothing was found.
+    """
+    try:
+        cache = frappe.cache()
+        pending_key = cache.make_key(f"{PREFIX}:{namespace}:pending")
+        leader_key = cache.make_key(f"{PREFIX}:{namespace}:leader")
+
+        item_id = frappe.generate_hash(length=16)
+        cache.rpush(pending_key, json.dumps({"id": item_id, "item": item}))
+        cache.expire(pending_key, LEADER_TTL)
+    except Exception:
+        return False, None
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            found, result = _get_result(cache, namespace, item_id)
+            if found:
+                return result is not None, result
+
+            # Nobody is collecting a batch: this caller does, for everyone waiting
+            if cache.set(leader_key, 1, nx=True, ex=LEADER_TTL):
+                try:
+                    # A caller alone in the list doesn't wait for company
+                    if cache.llen(pending_key) > 1:
+                        time.sleep(BATCH_WINDOW)
+                    pipe = cache.pipeline(transaction=True)
+                    pipe.lrange(pending_key, 0, MAX_BATCH - 1)
+                    pipe.ltrim(pending_key, MAX_BATCH, -1)
+                    entries = [json.loads(e) for e in pipe.execute()[0]]
+                finally:
+                    # The next window can open while this batch is with the provider
+                    cache.delete(leader_key)
+
+                if entries:
+                    _run_batch(cache, namespace, entries, run_batch)
+                continue
+
+            time.sleep(POLL_INTERVAL)
+    except Exception:
+        pass
+
+    return False, None
+
+
+def _redis_single_flight(key, compute):
+    # Only Redis errors fall back to calling on our own: errors of `compute` are the
+    # caller's, and a result must never be computed twice because it couldn't be shared
+    try:
+        cache = frappe.cache()
+        lock_key = cache.make_key(f"{PREFIX}:flight:{key}")
+        result_key = cache.make_key(f"{PREFIX}:flight:{key}:result")
+        is_leader = cache.get(result_key) is None and cache.set(lock_key, 1, nx=True, ex=LEADER_TTL)
+    except Exception:
+        return compute()
+
+    if is_leader:
+        try:
+            result = compute()
+            try:
+                cache.set(result_key, json.dumps({"result": result}), ex=RESULT_TTL)
+            except Exception:
+                # The waiters call on their own once the lock is gone
+                pass
+            return result
+        finally:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                pass
+
+    # Another worker is calling the provider for this key
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            value = cache.get(result_key)
+            if value is not None:
+                return json.loads(value)["result"]
+            if not cache.exists(lock_key):
+                break
+            time.sleep(POLL_INTERVAL)
+    except Exception:
+        pass
+
+    return compute()
+
+
+def _run_batch(cache, namespace, entries, run_batch):
+    try:
+        results = run_batch([e["item"] for e in entries])
+    except Exception:
+        frappe.log_error(title="GenMedAI AI Batch Error")
+        results = [None] * len(entries)
+
+    pipe = cache.pipeline()
+    for entry, result in zip(entries, results):
+        pipe.set(cache.make_key(f"{PREFIX}:{namespace}:result:{entry['id']}"), json.dumps({"result": result}), ex=RESULT_TTL)
+    pipe.execute()
+
+
+def _get_result(cache, namespace, item_id):
+    value = cache.get(cache.make_key(f"{PREFIX}:{namespace}:result:{item_id}"))
+    if value is None:
+        return False, None
+    return True, json.loads(value)["result"]
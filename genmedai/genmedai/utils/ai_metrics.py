@@ -0,0 +1,158 @@
+import json
+import time
+
+import frappe
+from frappe.utils import add_days, cint, flt, nowdate
+
+# Per endpoint: daily counters (Redis hashes, kept for RETENTION_DAYS) and a rolling
+# window of the latest provider call latencies, from which the percentiles are taken.
+METRICS_PREFIX = "genmedai:ai_metrics"
+ENDPOINTS_KEY = f"{METRICS_PREFIX}:endpoints"
+RECENT_CALLS_KEY = f"{METRICS_PREFIX}:recent"
+LATENCY_WINDOW = 1000
+RECENT_CALLS = 500
+RETENTION_DAYS = 35
+
+COUNTERS = (
+    "calls", "cache_hits", "errors", "prompt_tokens", "completion_tokens",
+    "prompt_chars", "response_chars", "latency_ms",
+)
+
+# Whitelisted method -> endpoint name used in the stats
+ENDPOINTS = {
+    "get_medicines": "search",
+    "run_ai_enrichment": "search",
+    "get_substitutes": "substitutes",
+    "translate_text": "translate",
+    "translate_texts": "translate",
+    "explain_medicine": "explanation",
+    "analyze_prescription": "prescription",
+    "analyze_prescription_batch": "prescription",
+}
+
+
+def get_endpoint():
+    """The endpoint an AI call is made for: set explicitly, or taken from the request / job."""
+    if frappe.flags.ai_endpoint:
+        return frappe.flags.ai_endpoint
+
+    method = (frappe.form_dict.get("cmd") if frappe.form_dict else None) or ""
+    if not method and getattr(frappe.local, "job", None):
+        method = frappe.local.job.get("method") or ""
+
+    method = str(method).rsplit(".", 1)[-1]
+    return ENDPOINTS.get(method, method or "other")
+
+
+def get_token_usage(provider, data):
+    """(prompt tokens, completion tokens) reported in a provider response body."""
+    data = data or {}
+    if provider == "OpenAI":
+        usage = data.get("usage") or {}
+        return cint(usage.get("prompt_tokens")), cint(usage.get("completion_tokens"))
+
+    usage = data.get("usageMetadata") or {}
+    return cint(usage.get("promptTokenCount")), cint(usage.get("candidatesTokenCount"))
+
+
+def record_ai_call(provider, model, elapsed, outcome, prompt="", response="",
+        prompt_tokens=0, completion_tokens=0, cache_hit=False):
+    """Record one AI call. `outcome` is "ok", "cache_hit", or an error kind."""
+    endpoint = get_endpoint()
+    latency_ms = round(elapsed * 1000, 1)
+
+    counters = {
+        "calls": 1,
+        "cache_hits": int(cache_hit),
+        "errors": int(outcome not in ("ok", "cache_hit")),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "prompt_chars": len(prompt or ""),
+        "response_chars": len(response or ""),
+        "latency_ms": 0 if cache_hit else int(latency_ms),
+    }
+    call = {
+        "timestamp": time.time(),
+        "endpoint": endpoint,
+        "provider": provider,
+        "model": model,
+        "outcome": outcome,
+        "cache_hit": int(cache_hit),
+        "latency_ms": latency_ms,
+        "prompt_chars": counters["prompt_chars"],
+        "response_chars": counters["response_chars"],
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+    }
+
+    try:
+        cache = frappe.cache()
+        daily_key = cache.make_key(f"{METRICS_PREFIX}:daily:{nowdate()}:{endpoint}")
+        latency_key = cache.make_key(f"{METRICS_PREFIX}:latency:{endpoint}")
+        recent_key = cache.make_key(RECENT_CALLS_KEY)
+
+        pipe = cache.pipeline()
+        for field, value in counters.items():
+            if value:
+                pipe.hincrby(daily_key, field, value)
+        pipe.expire(daily_key, RETENTION_DAYS * 86400)
+        pipe.sadd(cache.make_key(ENDPOINTS_KEY), endpoint)
+        if not cache_hit:
+            # Percentiles describe provider round trips, cache hits would hide slow paths
+            pipe.lpush(latency_key, latency_ms)
+            pipe.ltrim(latency_key, 0, LATENCY_WINDOW - 1)
+        pipe.lpush(recent_key, json.dumps(call))
+        pipe.ltrim(recent_key, 0, RECENT_CALLS - 1)
+        pipe.execute()
+    except Exception:
+        # Metrics must never fail an AI call
+        pass
+
+
+def get_stats(days=1):
+    """Per endpoint totals over the last `days` days, with rolling latency percentiles."""
+    days = min(max(cint(days) or 1, 1), RETENTION_DAYS)
+    cache = frappe.cache()
+
+    endpoints = sorted(frappe.safe_decode(e) for e in cache.smembers(cache.make_key(ENDPOINTS_KEY)))
+    dates = [add_days(nowdate(), -i) for i in range(days)]
+
+    stats = []
+    for endpoint in endpoints:
+        totals = dict.fromkeys(COUNTERS, 0)
+        for date in dates:
+            values = cache.hgetall(cache.make_key(f"{METRICS_PREFIX}:daily:{date}:{endpoint}"))
+            for field, value in values.items():
+                field = frappe.safe_decode(field)
+                if field in totals:
+                    totals[field] += cint(value)
+
+        if not totals["calls"]:
+            continue
+
+        latencies = sorted(flt(v) for v in cache.lrange(cache.make_key(f"{METRICS_PREFIX}:latency:{endpoint}"), 0, -1))
+        provider_calls = totals["calls"] - totals["cache_hits"]
+
+        stats.append({
+            "endpoint": endpoint,
+            **totals,
+            "cache_hit_rate": flt(totals["cache_hits"] / totals["calls"], 4),
+            "error_rate": flt(totals["errors"] / provider_calls, 4) if provider_calls else 0,
+            "avg_latency_ms": flt(totals["latency_ms"] / provider_calls, 1) if provider_calls else None,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+        })
+
+    return stats
+
+
+def get_recent_calls(limit=100):
+    cache = frappe.cache()
+    return [json.loads(c) for c in cache.lrange(cache.make_key(RECENT_CALLS_KEY), 0, cint(limit) - 1)]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    return values[min(int(len(values) * p), len(values) - 1)]
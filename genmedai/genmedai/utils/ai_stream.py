@@ -0,0 +1,147 @@
+"""
+Streaming AI completions, forwarded to the browser as Server-Sent Events.
+
+The provider generators yield text deltas as the model produces them and return the
+full text only when the completion finished cleanly, so partial answers are never cached.
+"""
+
+import json
+import time
+
+import frappe
+from werkzeug.wrappers import Response
+
+from genmedai.genmedai.utils.ai_client import CircuitOpenError, get_client
+from genmedai.genmedai.utils.ai_metrics import get_token_usage, record_ai_call
+
+# Longest silence between two chunks before the stream is given up
+READ_TIMEOUT = 30
+
+
+def iter_sse_data(lines):
+    """JSON payloads of the `data:` lines of a provider event stream."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def stream_openai(api_key, prompt, model, url):
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "You are a helpful medical assistant."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+
+    def get_delta(event):
+        choices = event.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
+
+    return (yield from _stream("OpenAI", model, url, headers, payload, prompt, get_delta))
+
+
+def stream_gemini(api_key, prompt, model, url):
+    headers = {"Content-Type": "application/json"}
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+
+    def get_delta(event):
+        candidates = event.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or [{}]
+        return parts[0].get("text")
+
+    return (yield from _stream("Google Gemini", model, f"{url}?alt=sse&key={api_key}", headers, payload, prompt, get_delta))
+
+
+def _stream(provider, model, url, headers, payload, prompt, get_delta):
+    start = time.perf_counter()
+    chunks = []
+    usage = None
+    outcome = "ok"
+    try:
+        response = get_client(provider).post(url, headers=headers, json=payload, timeout=(5, READ_TIMEOUT), stream=True)
+
+        # Entered first, so an error response gives its connection back too
+        with response:
+            if response.status_code != 200:
+                outcome = f"http_{response.status_code}"
+                frappe.log_error(f"GenMedAI {provider} Stream Error {response.status_code}: {response.text}", "GenMedAI Debug")
+                return None
+
+            for event in iter_sse_data(response.iter_lines()):
+                # Token counts come with the last event (OpenAI) or every event (Gemini)
+                if event.get("usage") or event.get("usageMetadata"):
+                    usage = event
+
+                delta = get_delta(event)
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        return "".join(chunks)
+    except CircuitOpenError:
+        outcome = "circuit_open"
+        return None
+    except GeneratorExit:
+        # The browser went away, the provider connection is closed with the response
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        outcome = "error"
+        frappe.log_error(message=f"{provider} Stream Error: {str(e)}", title="GenMedAI Stream Error")
+        return None
+    finally:
+        record_ai_call(
+            provider, model, time.perf_counter() - start, outcome, prompt, "".join(chunks),
+            *get_token_usage(provider, usage)
+        )
+
+
+def sse_response(stream, endpoint):
+    """
+    Response sending the chunks of `stream` as `data:` events, then an `event: done`.
+
+    Frappe tears down the site context before the response body is sent, so the
+    stream runs in a context of its own, initialised for the same site.
+    """
+    site, sites_path = frappe.local.site, frappe.local.sites_path
+    user = frappe.session.user
+
+    def generate():
+        frappe.init(site=site, sites_path=sites_path)
+        frappe.connect()
+        # frappe.connect runs as Administrator, the stream's logs and metrics are the caller's
+        frappe.set_user(user)
+        frappe.flags.ai_endpoint = endpoint
+        chunks = stream()
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+            frappe.db.commit()
+            yield "event: done\ndata: {}\n\n"
+        finally:
+            # A disconnect stops the provider call while the site context is still up
+            chunks.close()
+            frappe.destroy()
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Otherwise nginx buffers the whole answer, which is what streaming avoids
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
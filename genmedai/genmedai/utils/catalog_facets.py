@@ -0,0 +1,171 @@
+import hashlib
+
+import frappe
+from frappe.utils import cint
+
+from genmedai.genmedai.utils.http_cache import is_read_current
+from genmedai.genmedai.utils.medicine_search import escape_like
+
+# Filter values of the catalog page with their Medicine counts. The "Catalog Facet"
+# table is kept up to date from Medicine events (and rebuilt after bulk imports), so
+# a page load reads a few hundred summary rows, or nothing at all when Redis has them.
+FACET_FIELDS = ("manufacturer_name", "dosage_form")
+FACETS_CACHE_KEY = "genmedai:catalog_facets"
+
+# Manufacturers run into the thousands: only the largest ship with the facets,
+# the rest are found with search_manufacturers()
+TOP_MANUFACTURERS = 50
+
+
+def get_facets():
+    """Returns the cached facets payload."""
+    try:
+        payload = frappe.cache().get_value(FACETS_CACHE_KEY)
+    except Exception:
+        payload = None
+
+    if payload is None:
+        payload = build_facets()
+        # Read from a replica, it may not have the latest change yet
+        if not is_read_current():
+            return payload
+        try:
+            frappe.cache().set_value(FACETS_CACHE_KEY, payload)
+        except Exception:
+            pass
+
+    return payload
+
+
+def build_facets():
+    dosage_forms = frappe.db.sql("""
+        SELECT value, medicine_count AS count
+        FROM `tabCatalog Facet`
+        WHERE facet = 'dosage_form'
+        ORDER BY value
+    """, as_dict=True)
+
+    manufacturers = frappe.db.sql("""
+        SELECT value, medicine_count AS count
+        FROM `tabCatalog Facet`
+        WHERE facet = 'manufacturer_name'
+        ORDER BY medicine_count DESC, value
+        LIMIT %s
+    """, TOP_MANUFACTURERS, as_dict=True)
+
+    total_manufacturers = frappe.db.sql(
+        "SELECT COUNT(*) FROM `tabCatalog Facet` WHERE facet = 'manufacturer_name'"
+    )[0][0]
+
+    return {
+        "dosage_forms": dosage_forms,
+        "manufacturers": manufacturers,
+        "total_manufacturers": total_manufacturers,
+    }
+
+
+def search_manufacturers(prefix, limit=20):
+    """Manufacturers starting with `prefix`, most common first."""
+    prefix = (prefix or "").strip()
+    limit = min(max(cint(limit) or 20, 1), 100)
+
+    return frappe.db.sql("""
+        SELECT value, medicine_count AS count
+        FROM `tabCatalog Facet`
+        WHERE facet = 'manufacturer_name' AND value LIKE %s
+        ORDER BY medicine_count DESC, value
+        LIMIT %s
+    """, (f"{escape_like(prefix)}%", limit), as_dict=True)
+
+
+def update_facets(doc, deleted=False):
+    """Apply the facet changes of one saved (or deleted) Medicine."""
+    before = doc if deleted else doc.get_doc_before_save()
+
+    changed = False
+    for field in FACET_FIELDS:
+        old = _clean(before.get(field)) if before else None
+        new = None if deleted else _clean(doc.get(field))
+        if (old or "").lower() == (new or "").lower():
+            continue
+
+        if old:
+            _increment(field, old, -1)
+        if new:
+            _increment(field, new, 1)
+        changed = True
+
+    if changed:
+        clear_facets_cache()
+
+
+def rebuild_facets():
+    """
+    Recount every facet from `tabMedicine`. Used after bulk imports, which bypass
+    Medicine events, and daily to correct any drift.
+    Usage: bench execute genmedai.genmedai.utils.catalog_facets.rebuild_facets
+    """
+    now = frappe.utils.now()
+    counts = {}
+
+    for field in FACET_FIELDS:
+        for value, count in frappe.db.sql(f"""
+            SELECT `{field}`, COUNT(*)
+            FROM `tabMedicine`
+            WHERE `{field}` IS NOT NULL AND `{field}` != ''
+            GROUP BY `{field}`
+        """):
+            value = _clean(value)
+            if value:
+                name = _get_name(field, value)
+                if name in counts:
+                    counts[name][2] += count
+                else:
+                    counts[name] = [field, value, count]
+
+    rows = [
+        (name, now, now, "Administrator", "Administrator", field, value, count)
+        for name, (field, value, count) in counts.items()
+    ]
+
+    frappe.db.delete("Catalog Facet")
+    if rows:
+        frappe.db.bulk_insert(
+            "Catalog Facet",
+            ("name", "creation", "modified", "modified_by", "owner", "facet", "value", "medicine_count"),
+            rows,
+        )
+
+    frappe.db.commit()
+    clear_facets_cache()
+
+
+def clear_facets_cache():
+    try:
+        frappe.cache().delete_value(FACETS_CACHE_KEY)
+    except Exception:
+        pass
+
+
+def _increment(field, value, delta):
+    name = _get_name(field, value)
+    now = frappe.utils.now()
+
+    frappe.db.sql("""
+        INSERT INTO `tabCatalog Facet` (name, creation, modified, modified_by, owner, facet, value, medicine_count)
+        VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, %(facet)s, %(value)s, GREATEST(%(delta)s, 0))
+        ON DUPLICATE KEY UPDATE medicine_count = GREATEST(medicine_count + %(delta)s, 0), modified = %(now)s
+    """, {"name": name, "now": now, "user": frappe.session.user, "facet": field, "value": value, "delta": delta})
+
+    if delta < 0:
+        frappe.db.sql("DELETE FROM `tabCatalog Facet` WHERE name = %s AND medicine_count = 0", name)
+
+
+def _get_name(field, value):
+    # Deterministic, so concurrent saves upsert the same row. Lowercased like the
+    # case-insensitive collation groups values in `tabMedicine`.
+    return hashlib.sha1(f"{field}\x00{value.lower()}".encode("utf-8")).hexdigest()[:20]
+
+
+def _clean(value):
+    return (value or "").strip() or None
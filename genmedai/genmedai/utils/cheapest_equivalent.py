@@ -0,0 +1,123 @@
+import hashlib
+
+import frappe
+
+from genmedai.genmedai.utils.substitute_ranking import get_unit_price, parse_pack_size
+
+# The cheapest available Medicine per unit, for every composition key and pack unit
+# (tablet, ml, ...), kept in "Cheapest Equivalent". Medicine events refresh the groups
+# a save touches, bulk imports rebuild the table, so the best price of a medicine is a
+# primary key lookup instead of a sort over its composition group.
+EQUIVALENT_FIELDS = (
+    "name", "creation", "modified", "modified_by", "owner",
+    "composition_key", "pack_unit", "medicine", "price", "unit_count", "unit_price", "equivalent_count",
+)
+
+
+def get_pack_values(pack_size_label, price):
+    """unit_count, pack_unit and unit_price of a Medicine, derived from its pack label."""
+    pack = parse_pack_size(pack_size_label)
+    return frappe._dict(
+        unit_count=pack[0] if pack else 0,
+        pack_unit=pack[1] if pack else None,
+        unit_price=get_unit_price(price, pack) or 0,
+    )
+
+
+def get_cheapest_equivalents(groups):
+    """{(composition_key, pack_unit): row} for the given pairs, in one query."""
+    names = {_get_name(key, unit): (key, unit) for key, unit in groups if key and unit}
+    if not names:
+        return {}
+
+    rows = frappe.get_all(
+        "Cheapest Equivalent",
+        filters={"name": ("in", list(names))},
+        fields=["name", "medicine", "price", "unit_count", "unit_price", "equivalent_count"],
+    )
+    return {names[row.pop("name")]: row for row in rows}
+
+
+def update_cheapest_equivalent(doc, deleted=False):
+    """Refresh the groups one saved (or deleted) Medicine leaves and joins."""
+    before = doc if deleted else doc.get_doc_before_save()
+    if not deleted and before and _get_state(before) == _get_state(doc):
+        return
+
+    groups = set()
+    if before:
+        groups.add((before.get("composition_key"), before.get("pack_unit")))
+    if not deleted:
+        groups.add((doc.composition_key, doc.pack_unit))
+
+    for key, unit in groups:
+        if key and unit:
+            refresh_group(key, unit, exclude=doc.name if deleted else None)
+
+
+def refresh_group(composition_key, pack_unit, exclude=None):
+    rows = frappe.db.sql("""
+        SELECT name, price, unit_count, unit_price, COUNT(*) OVER () AS equivalent_count
+        FROM `tabMedicine`
+        WHERE composition_key = %(key)s AND pack_unit = %(unit)s
+            AND unit_price > 0 AND is_discontinued = 0 AND name != %(exclude)s
+        ORDER BY unit_price, name
+        LIMIT 1
+    """, {"key": composition_key, "unit": pack_unit, "exclude": exclude or ""}, as_dict=True)
+
+    name = _get_name(composition_key, pack_unit)
+    if not rows:
+        frappe.db.delete("Cheapest Equivalent", name)
+        return
+
+    best = rows[0]
+    now = frappe.utils.now()
+    frappe.db.sql("""
+        INSERT INTO `tabCheapest Equivalent`
+            (name, creation, modified, modified_by, owner, composition_key, pack_unit,
+            medicine, price, unit_count, unit_price, equivalent_count)
+        VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, %(key)s, %(unit)s,
+            %(medicine)s, %(price)s, %(unit_count)s, %(unit_price)s, %(count)s)
+        ON DUPLICATE KEY UPDATE medicine = VALUES(medicine), price = VALUES(price),
+            unit_count = VALUES(unit_count), unit_price = VALUES(unit_price),
+            equivalent_count = VALUES(equivalent_count), modified = VALUES(modified)
+    """, {
+        "name": name, "now": now, "user": frappe.session.user, "key": composition_key, "unit": pack_unit,
+        "medicine": best.name, "price": best.price, "unit_count": best.unit_count,
+        "unit_price": best.unit_price, "count": best.equivalent_count,
+    })
+
+
+def rebuild_cheapest_equivalents():
+    """
+    Recompute the whole table from `tabMedicine`, after bulk imports.
+    Usage: bench execute genmedai.genmedai.utils.cheapest_equivalent.rebuild_cheapest_equivalents
+    """
+    now = frappe.utils.now()
+    rows = frappe.db.sql("""
+        SELECT composition_key, pack_unit, name, price, unit_count, unit_price, equivalent_count
+        FROM (
+            SELECT composition_key, pack_unit, name, price, unit_count, unit_price,
+                ROW_NUMBER() OVER (PARTITION BY composition_key, pack_unit ORDER BY unit_price, name) AS _rank,
+                COUNT(*) OVER (PARTITION BY composition_key, pack_unit) AS equivalent_count
+            FROM `tabMedicine`
+            WHERE composition_key IS NOT NULL AND pack_unit IS NOT NULL AND pack_unit != ''
+                AND unit_price > 0 AND is_discontinued = 0
+        ) ranked
+        WHERE _rank = 1
+    """)
+
+    frappe.db.delete("Cheapest Equivalent")
+    frappe.db.bulk_insert("Cheapest Equivalent", EQUIVALENT_FIELDS, [
+        (_get_name(key, unit), now, now, "Administrator", "Administrator", key, unit, *values)
+        for key, unit, *values in rows
+    ])
+    frappe.db.commit()
+
+
+def _get_state(doc):
+    return (doc.get("composition_key"), doc.get("pack_unit"), doc.get("unit_price"), doc.get("is_discontinued"))
+
+
+def _get_name(composition_key, pack_unit):
+    return hashlib.sha1(f"{composition_key}\x00{pack_unit}".encode("utf-8")).hexdigest()[:20]
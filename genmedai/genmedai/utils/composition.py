@@ -0,0 +1,126 @@
+import hashlib
+import re
+
+import frappe
+
+# "Clavulanic Acid (125mg)" -> ("Clavulanic Acid", "125mg")
+_INGREDIENT_RE = re.compile(r"^(?P<ingredient>[^(]+?)\s*(?:\((?P<strength>[^)]*)\))?\s*$")
+
+
+def get_base_salt(salt_composition):
+    """
+    Primary salt of a composition without its strength,
+    e.g. "Acebrophylline (100mg)" -> "Acebrophylline".
+    """
+    raw_salt = (salt_composition or "").strip()
+    base_salt = " ".join(raw_salt.split("(")[0].split())
+    return base_salt or raw_salt or None
+
+
+def parse_composition(salt_composition):
+    """
+    Split a salt composition into its ingredients.
+    "Amoxycillin (500mg) + Clavulanic Acid (125mg)" ->
+    [{"ingredient": "Amoxycillin", "strength": "500mg"}, {"ingredient": "Clavulanic Acid", "strength": "125mg"}]
+    """
+    ingredients = []
+    for part in _split_top_level(salt_composition or ""):
+        match = _INGREDIENT_RE.match(part)
+        if match:
+            ingredient, strength = match.group("ingredient"), match.group("strength") or ""
+        else:
+            ingredient, strength = part, ""
+
+        ingredient = " ".join(ingredient.split())
+        if ingredient:
+            ingredients.append({"ingredient": ingredient, "strength": " ".join(strength.split())})
+
+    return ingredients
+
+
+def get_composition_key(ingredients):
+    """
+    Order-insensitive key identifying an exact ingredient + strength set,
+    so "B (5mg) + A (10 mg)" and "A (10mg) + B (5mg)" share a key.
+    """
+    if not ingredients:
+        return None
+
+    canonical = " + ".join(sorted(
+        f"{d['ingredient'].lower()} ({''.join(d['strength'].split()).lower()})" for d in ingredients
+    ))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def derive_composition(salt_composition):
+    """All composition fields stored on a Medicine, derived from its salt composition."""
+    ingredients = parse_composition(salt_composition)
+    return frappe._dict(
+        base_salt=get_base_salt(salt_composition),
+        composition_key=get_composition_key(ingredients),
+        ingredients=ingredients,
+    )
+
+
+def count_by_composition_key(composition_keys):
+    """Number of Medicines per composition key, in a single grouped query."""
+    composition_keys = tuple({k for k in composition_keys if k})
+    if not composition_keys:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT composition_key, COUNT(*)
+        FROM `tabMedicine`
+        WHERE composition_key IN %(composition_keys)s
+        GROUP BY composition_key
+    """, {"composition_keys": composition_keys})
+
+    # The collation is case-insensitive, so key the result the same way
+    return {key.lower(): count for key, count in rows}
+
+
+def get_cheapest_by_composition(composition_keys, fields, per_key=3):
+    """
+    The `per_key` cheapest Medicines of each composition key, in a single query.
+    Returns {composition_key: [rows ordered by price]}.
+    """
+    composition_keys = tuple({k for k in composition_keys if k})
+    if not composition_keys:
+        return {}
+
+    columns = ", ".join(f"`{f}`" for f in fields)
+    rows = frappe.db.sql(f"""
+        SELECT * FROM (
+            SELECT {columns}, `composition_key` AS _key,
+                ROW_NUMBER() OVER (PARTITION BY composition_key ORDER BY price, name) AS _rank
+            FROM `tabMedicine`
+            WHERE composition_key IN %(keys)s AND price > 0 AND is_discontinued = 0
+        ) ranked
+        WHERE _rank <= %(per_key)s
+        ORDER BY _key, _rank
+    """, {"keys": composition_keys, "per_key": int(per_key)}, as_dict=True)
+
+    grouped = {}
+    for row in rows:
+        key = row.pop("_key")
+        row.pop("_rank")
+        grouped.setdefault(key, []).append(row)
+    return grouped
+
+
+def _split_top_level(text):
+    # Split on "+" but not inside parentheses, e.g. "A (1+1 mg) + B"
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == "+" and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
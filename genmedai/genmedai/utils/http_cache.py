@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import inspect
+import json
+import time
+
+import frappe
+from werkzeug.wrappers import Response
+
+# HTTP caching of the public read endpoints. ETags are derived from the request and a
+# version (by default the catalog version, bumped on every Medicine change), so a
+# conditional request is answered with a 304 before the endpoint runs at all.
+CATALOG_VERSION_KEY = "genmedai:catalog_version"
+CATALOG_CHANGED_KEY = "genmedai:catalog_changed_on"
+RESPONSE_CACHE_PREFIX = "genmedai:http_cache"
+
+
+def get_catalog_version():
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(CATALOG_VERSION_KEY)
+        version = cache.get(key)
+        if version is None:
+            # Lost with a Redis restart: start from a new value, so old ETags never match again
+            cache.set(key, int(time.time() * 1000), nx=True)
+            version = cache.get(key)
+        return frappe.safe_decode(version)
+    except Exception:
+        return None
+
+
+def bump_catalog_version():
+    """Invalidate cached catalog reads, once the current transaction is committed."""
+    def bump():
+        try:
+            cache = frappe.cache()
+            pipe = cache.pipeline()
+            pipe.incr(cache.make_key(CATALOG_VERSION_KEY))
+            pipe.set(cache.make_key(CATALOG_CHANGED_KEY), time.time())
+            pipe.execute()
+        except Exception:
+            pass
+
+    frappe.db.after_commit.add(bump)
+
+
+def on_public_settings_update(doc, method=None):
+    """doc_events: settings served by cached endpoints (get_contact_us_settings) share the catalog version."""
+    bump_catalog_version()
+
+
+def is_catalog_settled(seconds):
+    """True when the catalog didn't change in the last `seconds`, e.g. a replica's allowed lag."""
+    try:
+        cache = frappe.cache()
+        changed_on = cache.get(cache.make_key(CATALOG_CHANGED_KEY))
+        return not changed_on or time.time() - float(changed_on) > seconds
+    except Exception:
+        return False
+
+
+def http_cache(max_age=60, stale_while_revalidate=600, server_cache_ttl=0, get_version=get_catalog_version,
+    private=False, on_hit=None):
+    """
+    Cache a whitelisted GET endpoint in browsers and proxies (Cache-Control with
+    stale-while-revalidate, ETag, 304s) and, with `server_cache_ttl`, in Redis.
+    Place below @frappe.whitelist. The endpoint can set frappe.flags.no_http_cache
+    for a response that must not be cached (e.g. one still waiting for AI results).
+    Keys it adds to frappe.response (e.g. a pagination cursor) are sent and cached
+    along with the message.
+    With `private`, proxies don't store the response and browsers revalidate it on every
+    use, so each request reaches the server: `on_hit` is called with the endpoint's
+    arguments for those answered without running it (a 304 or a Redis body).
+    A response read from a replica right after a catalog change may predate it: it is
+    sent without ETag, as no-cache, and not kept in Redis (see read_replica.read_from_replica).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            request = getattr(frappe.local, "request", None)
+            version = get_version() if request and request.method in ("GET", "HEAD") else None
+            if version is None:
+                return fn(*args, **kwargs)
+
+            etag = hashlib.sha1(json.dumps(
+                [fn.__module__, fn.__name__, version, args, kwargs], sort_keys=True, default=str
+            ).encode()).hexdigest()
+
+            cache_control = "private, no-cache" if private else f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+            if request.if_none_match.contains(etag):
+                if on_hit:
+                    on_hit(*args, **kwargs)
+                return _build_response(etag, cache_control, status=304)
+
+            body = _get_cached_body(etag) if server_cache_ttl else None
+            if body is not None and on_hit:
+                on_hit(*args, **kwargs)
+            if body is None:
+                frappe.flags.no_http_cache = False
+                frappe.flags.read_from_replica = False
+                response_keys = set(frappe.response)
+                message = fn(*args, **kwargs)
+                if isinstance(message, Response) or frappe.flags.no_http_cache:
+                    return message
+
+                extra = {key: value for key, value in frappe.response.items() if key not in response_keys}
+                body = frappe.as_json({**extra, "message": message}, indent=None)
+                if not is_read_current():
+                    # Not to be reused: the next request may read the change
+                    return _build_response(None, "no-cache", body=body)
+                if server_cache_ttl:
+                    _set_cached_body(etag, body, server_cache_ttl)
+
+            return _build_response(etag, cache_control, body=body)
+
+        # Frappe passes request arguments by the parameters of the endpoint, not the wrapper's
+        wrapper.fnargs = list(inspect.signature(fn).parameters)
+        return wrapper
+
+    return decorator
+
+
+def is_read_current():
+    """
+    False when this request read from a replica (frappe.flags.read_from_replica, its
+    allowed lag in seconds) and the catalog changed within that lag.
+    """
+    return not frappe.flags.read_from_replica or is_catalog_settled(frappe.flags.read_from_replica)
+
+
+def _build_response(etag, cache_control, body=None, status=200):
+    response = Response(body, status=status, content_type="application/json")
+    if etag:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def _get_cached_body(etag):
+    try:
+        cache = frappe.cache()
+        body = cache.get(cache.make_key(f"{RESPONSE_CACHE_PREFIX}:{etag}"))
+        return frappe.safe_decode(body) if body is not None else None
+    except Exception:
+        return None
+
+
+def _set_cached_body(etag, body, ttl):
+    try:
+        cache = frappe.cache()
+        cache.set(cache.make_key(f"{RESPONSE_CACHE_PREFIX}:{etag}"), body, ex=ttl)
+    except Exception:
+        pass
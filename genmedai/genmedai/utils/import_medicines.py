@@ -1,6 +1,49 @@
 import frappe
 import csv
 import os
+import time
+
+from genmedai.genmedai.utils.catalog_facets import rebuild_facets
+from genmedai.genmedai.utils.cheapest_equivalent import get_pack_values, rebuild_cheapest_equivalents
+from genmedai.genmedai.utils.composition import derive_composition
+from genmedai.genmedai.utils.http_cache import bump_catalog_version
+from genmedai.genmedai.utils.medicine_cache import clear_medicine_cache
+from genmedai.genmedai.utils.suggest import reset_suggest_index
+
+# Columns written by bulk_import_medicines, besides name and the standard audit columns
+BULK_FIELDS = (
+    "brand_name", "type", "manufacturer_name", "pack_size_label",
+    "short_composition1", "short_composition2", "salt_composition",
+    "base_salt", "composition_key", "price", "is_discontinued",
+    "unit_count", "pack_unit", "unit_price"
+)
+
+INGREDIENT_FIELDS = (
+    "name", "creation", "modified", "modified_by", "owner", "docstatus",
+    "parent", "parentfield", "parenttype", "idx", "ingredient", "strength"
+)
+
+def map_row(row):
+    """Map a catalog CSV row to Medicine fields."""
+    # Handle Price
+    price_str = row.get("price(₹)", "0")
+    try:
+        price = float(price_str) if price_str else 0.0
+    except ValueError:
+        price = 0.0
+
+    # Handle Boolean
+    is_disc = row.get("Is_discontinued", "FALSE") or "FALSE"
+
+    return {
+        "type": row.get("type", ""),
+        "manufacturer_name": row.get("manufacturer_name", ""),
+        "pack_size_label": row.get("pack_size_label", ""),
+        "short_composition1": row.get("short_composition1", ""),
+        "short_composition2": row.get("short_composition2", ""),
+        "price": price,
+        "is_discontinued": 1 if is_disc.upper() == "TRUE" else 0,
+    }
 
 def import_medicines(file_path):
     """
@@ -43,22 +86,7 @@ def import_medicines(file_path):
                     doc.brand_name = brand_name
                 
                 # Map other fields
-                doc.type = row.get("type", "")
-                doc.manufacturer_name = row.get("manufacturer_name", "")
-                doc.pack_size_label = row.get("pack_size_label", "")
-                doc.short_composition1 = row.get("short_composition1", "")
-                doc.short_composition2 = row.get("short_composition2", "")
-                
-                # Handle Price
-                price_str = row.get("price(₹)", "0")
-                try:
-                    doc.price = float(price_str) if price_str else 0.0
-                except ValueError:
-                    doc.price = 0.0
-                    
-                # Handle Boolean
-                is_disc = row.get("Is_discontinued", "FALSE")
-                doc.is_discontinued = 1 if is_disc.upper() == "TRUE" else 0
+                doc.update(map_row(row))
                 
                 # Save
                 doc.flags.ignore_permissions = True
@@ -76,3 +104,212 @@ def import_medicines(file_path):
 
         frappe.db.commit()
         print(f"Import completed. Success: {count}, Errors: {errors}")
+
+def bulk_import_medicines(file_path, chunk_size=2000, dry_run=False):
+    """
+    Bulk import medicines from a CSV file, for full catalog refreshes.
+    Skips Document validation and hooks: rows are written with multi-row
+    INSERT ... ON DUPLICATE KEY UPDATE, the CSV being the source of truth.
+    Usage: bench execute genmedai.genmedai.utils.import_medicines.bulk_import_medicines --kwargs "{'file_path': '/path/to/file.csv', 'chunk_size': 5000}"
+    """
+    if not os.path.exists(file_path):
+        print(f"File not found: {file_path}")
+        return
+
+    chunk_size = int(chunk_size)
+    print(f"Starting bulk import from {file_path}{' (dry run)' if dry_run else ''}...")
+
+    importer = BulkMedicineImporter(dry_run=dry_run)
+    chunk = []
+
+    with open(file_path, mode='r', encoding='utf-8-sig') as csvfile:
+        reader = csv.DictReader(csvfile)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames]
+
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                importer.import_rows(chunk)
+                chunk = []
+                print(f"Processed {importer.stats['rows']} records ({importer.get_rate():.0f} rows/sec)...")
+
+        if chunk:
+            importer.import_rows(chunk)
+
+    stats = importer.finish()
+    if not dry_run:
+        # Rows were written without Medicine events
+        bump_catalog_version()
+        clear_medicine_cache()
+        rebuild_facets()
+        rebuild_cheapest_equivalents()
+        reset_suggest_index()
+    print(
+        f"Import completed in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec). "
+        f"Inserted: {stats['inserted']}, Updated: {stats['updated']}, Errors: {stats['errors']}"
+    )
+    return stats
+
+class BulkMedicineImporter:
+    """Writes batches of catalog CSV rows straight to `tabMedicine` and its ingredients."""
+
+    def __init__(self, dry_run=False, autocommit=True):
+        self.dry_run = dry_run
+        # Callers that checkpoint their progress commit themselves, in the same transaction
+        self.autocommit = autocommit
+        self.start = time.monotonic()
+        self.stats = {"rows": 0, "inserted": 0, "updated": 0, "errors": 0}
+        self.rejected = []
+
+        # One query for every existing key instead of an exists() per row
+        self.existing = {
+            brand_name.lower(): name
+            for brand_name, name in frappe.db.sql("SELECT brand_name, name FROM `tabMedicine`")
+        }
+
+    def import_rows(self, rows):
+        salt_compositions = self.get_salt_compositions(rows)
+        records = {}
+        for row in rows:
+            self.stats["rows"] += 1
+            try:
+                record = self.build_record(row, salt_compositions)
+            except Exception as e:
+                self.reject(row, str(e))
+                continue
+
+            if record:
+                # Last occurrence of a brand in the file wins
+                record["_row"] = row
+                records[record["brand_name"].lower()] = record
+
+        if not records:
+            return
+
+        if not self.dry_run:
+            written = self.write_batch(list(records.values()))
+            records = {key: r for key, r in records.items() if r["name"] in written}
+            if self.autocommit:
+                frappe.db.commit()
+
+        for key, record in records.items():
+            if key in self.existing:
+                self.stats["updated"] += 1
+            else:
+                self.stats["inserted"] += 1
+                self.existing[key] = record["name"]
+
+    def write_batch(self, records):
+        """Write records in one statement, or one by one to isolate the bad rows if that fails."""
+        try:
+            frappe.db.savepoint("medicine_bulk_import")
+            self.write(records)
+            return {r["name"] for r in records}
+        except Exception:
+            frappe.db.rollback(save_point="medicine_bulk_import")
+
+        written = set()
+        for record in records:
+            try:
+                frappe.db.savepoint("medicine_bulk_import")
+                self.write([record])
+                written.add(record["name"])
+            except Exception as e:
+                frappe.db.rollback(save_point="medicine_bulk_import")
+                self.reject(record["_row"], str(e))
+        return written
+
+    def get_salt_compositions(self, rows):
+        """{name: salt_composition} of the existing medicines of these rows that have one."""
+        names = {
+            self.existing[brand_name.lower()]
+            for brand_name in ((row.get("name") or "").strip() for row in rows)
+            if brand_name.lower() in self.existing
+        }
+        if not names:
+            return {}
+
+        return dict(frappe.db.sql("""
+            SELECT name, salt_composition FROM `tabMedicine`
+            WHERE name IN %(names)s AND IFNULL(salt_composition, '') != ''
+        """, {"names": tuple(names)}))
+
+    def build_record(self, row, salt_compositions=None):
+        brand_name = (row.get("name") or "").strip()
+        if not brand_name:
+            return None
+        if len(brand_name) > 140:
+            raise ValueError("Brand name is longer than 140 characters")
+
+        record = map_row(row)
+        record["brand_name"] = brand_name
+        record["name"] = self.existing.get(brand_name.lower(), brand_name)
+
+        # Same derivations as Medicine.validate: the short compositions only fill an empty salt composition
+        comps = [c for c in (record["short_composition1"], record["short_composition2"]) if c]
+        record["salt_composition"] = (salt_compositions or {}).get(record["name"]) or " + ".join(comps) or None
+
+        composition = derive_composition(record["salt_composition"])
+        record["base_salt"] = composition.base_salt
+        record["composition_key"] = composition.composition_key
+        record["ingredients"] = composition.ingredients
+        record.update(get_pack_values(record["pack_size_label"], record["price"]))
+        return record
+
+    def write(self, records):
+        now = frappe.utils.now()
+        user = frappe.session.user
+
+        columns = ("name", "creation", "modified", "modified_by", "owner", "docstatus", "idx") + BULK_FIELDS
+        updates = ", ".join(
+            # Never clear the salt composition of a medicine with a CSV row that has none
+            f"`{c}` = COALESCE(VALUES(`{c}`), `{c}`)" if c == "salt_composition" else f"`{c}` = VALUES(`{c}`)"
+            for c in ("modified", "modified_by") + BULK_FIELDS
+        )
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+        values = []
+        for record in records:
+            values.extend((record["name"], now, now, user, user, 0, 0))
+            values.extend(record[field] for field in BULK_FIELDS)
+
+        frappe.db.sql(f"""
+            INSERT INTO `tabMedicine` ({", ".join(f"`{c}`" for c in columns)})
+            VALUES {", ".join([placeholders] * len(records))}
+            ON DUPLICATE KEY UPDATE {updates}
+        """, tuple(values))
+
+        # Replace the ingredient rows of every written medicine
+        frappe.db.sql(
+            "DELETE FROM `tabMedicine Ingredient` WHERE parenttype = 'Medicine' AND parent IN %s",
+            (tuple(r["name"] for r in records),)
+        )
+
+        ingredient_rows = [
+            (
+                frappe.generate_hash(length=10), now, now, user, user, 0,
+                record["name"], "ingredients", "Medicine", idx, d["ingredient"], d["strength"]
+            )
+            for record in records
+            for idx, d in enumerate(record["ingredients"], start=1)
+        ]
+        if ingredient_rows:
+            frappe.db.bulk_insert("Medicine Ingredient", INGREDIENT_FIELDS, ingredient_rows)
+
+    def reject(self, row, reason):
+        self.stats["errors"] += 1
+        self.rejected.append((row, reason))
+        print(f"Error processing row {row.get('name')}: {reason}")
+
+    def get_rate(self):
+        elapsed = time.monotonic() - self.start
+        return self.stats["rows"] / elapsed if elapsed else 0
+
+    def finish(self):
+        elapsed = time.monotonic() - self.start
+        return {
+            **self.stats,
+            "dry_run": bool(self.dry_run),
+            "seconds": round(elapsed, 2),
+            "rows_per_sec": round(self.stats["rows"] / elapsed, 1) if elapsed else 0,
+        }
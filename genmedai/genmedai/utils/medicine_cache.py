@@ -0,0 +1,367 @@
+import json
+import threading
+from collections import OrderedDict
+
+import frappe
+
+from genmedai.genmedai.utils.composition import parse_composition
+from genmedai.genmedai.utils.http_cache import is_read_current
+from genmedai.genmedai.utils.substitute_ranking import Candidate
+
+# Read-through cache of Medicine rows and composition groups for the hot read paths
+# (substitutes, bulk lookups). Two tiers: compact records in a bounded LRU per worker,
+# backed by Redis hashes shared by all workers. Medicine events broadcast the names and
+# groups they touch through an invalidation log in Redis, which every worker replays
+# once per request before trusting its own tier.
+RECORD_FIELDS = (
+    "name", "brand_name", "salt_composition", "strength", "dosage_form", "manufacturer_name",
+    "type", "price", "is_generic", "image", "pack_size_label", "is_discontinued",
+    "composition_key", "base_salt", "unit_count", "pack_unit", "unit_price",
+)
+GROUP_KEYS = ("composition_key", "base_salt")
+
+MAX_RECORDS = 20000
+# Groups are bounded by their candidates, not their number: a base salt group can be
+# a thousand times the size of a composition group
+MAX_GROUP_CANDIDATES = 50000
+# Base salts like Paracetamol have thousands of brands, the cheapest per unit are enough
+MAX_GROUP_SIZE = 2000
+# Invalidations kept in Redis, a worker further behind drops its whole tier
+LOG_SIZE = 1000
+
+# The hashes have no TTL: they are bounded by the catalog and cleared by bulk imports
+CACHE_PREFIX = "genmedai:medicine_cache"
+RECORDS_KEY = f"{CACHE_PREFIX}:records"
+GROUPS_KEY = f"{CACHE_PREFIX}:groups"
+SEQ_KEY = f"{CACHE_PREFIX}:seq"
+LOG_KEY = f"{CACHE_PREFIX}:log"
+
+
+class MedicineRecord:
+    """A Medicine row in slots, a fraction of the size of a dict."""
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, values):
+        for field, value in zip(RECORD_FIELDS, values):
+            setattr(self, field, value)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def as_tuple(self):
+        return tuple(getattr(self, field) for field in RECORD_FIELDS)
+
+    def as_dict(self, fields=RECORD_FIELDS):
+        return frappe._dict((field, getattr(self, field)) for field in fields)
+
+
+class _SiteCache:
+    __slots__ = ("seq", "records", "groups", "group_candidates")
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.records = OrderedDict()
+        self.groups = OrderedDict()
+        self.group_candidates = 0
+
+    def pop_group(self, group_key):
+        group = self.groups.pop(group_key, None)
+        if group is not None:
+            self.group_candidates -= len(group)
+
+    def clear(self):
+        self.records.clear()
+        self.groups.clear()
+        self.group_candidates = 0
+
+
+_lock = threading.Lock()
+_sites = {}  # per site, a bench process serves several
+
+
+def get_medicine(name):
+    """The MedicineRecord of a Medicine, None if it doesn't exist."""
+    return get_medicines([name]).get(name)
+
+
+def get_medicines(names):
+    """{name: MedicineRecord} of the names that exist: from the worker, else Redis, else one query."""
+    names = list(dict.fromkeys(name for name in names if name))
+    site_cache = _get_site_cache()
+
+    found = {}
+    if site_cache:
+        with _lock:
+            for name in names:
+                record = site_cache.records.get(name)
+                if record:
+                    site_cache.records.move_to_end(name)
+                    found[name] = record
+
+    missing = [name for name in names if name not in found]
+    if missing and site_cache:
+        cached = _redis_get(RECORDS_KEY, missing)
+        records = {name: MedicineRecord(values) for name, values in cached.items()}
+        _put(site_cache, site_cache.records, records, MAX_RECORDS)
+        found.update(records)
+        missing = [name for name in missing if name not in records]
+
+    if missing:
+        rows = _get_db().sql(f"""
+            SELECT {", ".join(f"`{f}`" for f in RECORD_FIELDS)}
+            FROM `tabMedicine`
+            WHERE name IN %(names)s
+        """, {"names": tuple(missing)})
+        records = {row[0]: MedicineRecord(row) for row in rows}
+        if site_cache:
+            _redis_set(RECORDS_KEY, {name: r.as_tuple() for name, r in records.items()})
+            _put(site_cache, site_cache.records, records, MAX_RECORDS)
+        found.update(records)
+
+    return found
+
+
+def get_group(field, key):
+    """
+    Substitute candidates (substitute_ranking.Candidate) of all Medicines with this
+    composition_key or base_salt, cheapest per unit first, parsed once per worker.
+    """
+    return get_groups(field, [key]).get(key, [])
+
+
+def get_groups(field, keys):
+    """{key: candidates} of several groups of one field (see get_group), the uncached ones in one query."""
+    keys = list(dict.fromkeys(key for key in keys if key))
+    site_cache = _get_site_cache()
+
+    found = {}
+    if site_cache:
+        with _lock:
+            for key in keys:
+                candidates = site_cache.groups.get(_get_group_key(field, key))
+                if candidates is not None:
+                    site_cache.groups.move_to_end(_get_group_key(field, key))
+                    found[key] = candidates
+
+    missing = [key for key in keys if key not in found]
+    rows = {}
+    if missing and site_cache:
+        cached = _redis_get(GROUPS_KEY, [_get_group_key(field, key) for key in missing])
+        rows = {key: cached[_get_group_key(field, key)] for key in missing if _get_group_key(field, key) in cached}
+        missing = [key for key in missing if key not in rows]
+
+    if missing:
+        loaded = _load_groups(field, missing)
+        if site_cache:
+            _redis_set(GROUPS_KEY, {_get_group_key(field, key): group for key, group in loaded.items()})
+        rows.update(loaded)
+
+    groups = {}
+    for key, group in rows.items():
+        groups[_get_group_key(field, key)] = found[key] = [
+            Candidate(record, parse_composition(record.salt_composition))
+            for record in map(MedicineRecord, group)
+        ]
+    if site_cache:
+        _put_groups(site_cache, groups)
+
+    return found
+
+
+def invalidate_medicine(doc, deleted=False):
+    """Broadcast a saved (or deleted) Medicine and the groups it leaves and joins, once committed."""
+    before = None if deleted else doc.get_doc_before_save()
+    if before and _get_values(before) == _get_values(doc):
+        return
+
+    groups = set()
+    for d in filter(None, (before, doc)):
+        for field in GROUP_KEYS:
+            if d.get(field):
+                groups.add(_get_group_key(field, d.get(field)))
+
+    frappe.db.after_commit.add(lambda: _publish([doc.name], sorted(groups)))
+
+
+def clear_medicine_cache():
+    """Drop both tiers on every worker, after bulk writes that skip Medicine events."""
+    frappe.db.after_commit.add(lambda: _publish(None, None))
+
+
+def _publish(names, groups):
+    try:
+        cache = frappe.cache()
+        pipe = cache.pipeline()
+        if names is None:
+            pipe.delete(cache.make_key(RECORDS_KEY), cache.make_key(GROUPS_KEY))
+        else:
+            if names:
+                pipe.hdel(cache.make_key(RECORDS_KEY), *names)
+            if groups:
+                pipe.hdel(cache.make_key(GROUPS_KEY), *groups)
+        # The n-th entry from the end of the log is the invalidation of seq - n + 1
+        pipe.incr(cache.make_key(SEQ_KEY))
+        pipe.rpush(cache.make_key(LOG_KEY), json.dumps([names, groups]))
+        pipe.ltrim(cache.make_key(LOG_KEY), -LOG_SIZE, -1)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def _get_site_cache():
+    """
+    The worker tier of this site, synced with the invalidation log once per request
+    (frappe.flags.medicine_cache_seq is the seq synced to). None without Redis.
+    """
+    if "medicine_cache" not in frappe.flags:
+        frappe.flags.medicine_cache = _sync()
+    return frappe.flags.medicine_cache
+
+
+def _sync():
+    try:
+        cache = frappe.cache()
+        seq = frappe.flags.medicine_cache_seq = int(cache.get(cache.make_key(SEQ_KEY)) or 0)
+
+        site_cache = _sites.get(frappe.local.site)
+        if site_cache is None or seq < site_cache.seq:
+            # New worker, or Redis lost the log
+            site_cache = _sites[frappe.local.site] = _SiteCache(seq)
+            return site_cache
+        if seq == site_cache.seq:
+            return site_cache
+
+        behind = seq - site_cache.seq
+        events = []
+        if behind <= LOG_SIZE:
+            # Read as one snapshot, the log entries must be those of the seq read
+            pipe = cache.pipeline()
+            pipe.get(cache.make_key(SEQ_KEY))
+            pipe.lrange(cache.make_key(LOG_KEY), -behind, -1)
+            latest, events = pipe.execute()
+            if int(latest or 0) != seq:
+                events = []
+    except Exception:
+        return None
+
+    with _lock:
+        if len(events) < behind:
+            site_cache.clear()
+        else:
+            for event in events:
+                names, groups = json.loads(event)
+                if names is None:
+                    site_cache.clear()
+                    continue
+                for name in names:
+                    site_cache.records.pop(name, None)
+                for group_key in groups:
+                    site_cache.pop_group(group_key)
+        # Another request may have synced further meanwhile
+        site_cache.seq = max(site_cache.seq, seq)
+
+    return site_cache
+
+
+def _put(site_cache, entries, values, max_size):
+    """Keep rows read by this request, unless the worker replayed an invalidation since (it may predate them)."""
+    with _lock:
+        if site_cache.seq != frappe.flags.medicine_cache_seq:
+            return
+        for key, value in values.items():
+            entries[key] = value
+            entries.move_to_end(key)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+
+
+def _put_groups(site_cache, groups):
+    """_put for groups, evicting the least recently used until MAX_GROUP_CANDIDATES are left."""
+    with _lock:
+        if site_cache.seq != frappe.flags.medicine_cache_seq:
+            return
+        for group_key, group in groups.items():
+            site_cache.pop_group(group_key)
+            site_cache.groups[group_key] = group
+            site_cache.group_candidates += len(group)
+        while site_cache.group_candidates > MAX_GROUP_CANDIDATES:
+            _, group = site_cache.groups.popitem(last=False)
+            site_cache.group_candidates -= len(group)
+
+
+def _redis_get(hash_key, fields):
+    try:
+        cache = frappe.cache()
+        values = cache.hmget(cache.make_key(hash_key), fields)
+        return {field: json.loads(value) for field, value in zip(fields, values) if value is not None}
+    except Exception:
+        return {}
+
+
+def _redis_set(hash_key, values):
+    """Store rows read by this request, unless an invalidation was published since (it may predate them)."""
+    if not values:
+        return
+    try:
+        cache = frappe.cache()
+        with cache.pipeline() as pipe:
+            pipe.watch(cache.make_key(SEQ_KEY))
+            if int(pipe.get(cache.make_key(SEQ_KEY)) or 0) != frappe.flags.medicine_cache_seq:
+                return
+            pipe.multi()
+            pipe.hset(cache.make_key(hash_key), mapping={
+                field: json.dumps(value, default=str) for field, value in values.items()
+            })
+            pipe.execute()
+    except Exception:
+        pass
+
+
+def _load_groups(field, keys):
+    if field not in GROUP_KEYS:
+        raise ValueError(f"Medicines are not grouped by {field}")
+
+    columns = ", ".join(f"`{f}`" for f in RECORD_FIELDS)
+    rows = _get_db().sql(f"""
+        SELECT {columns} FROM (
+            SELECT {columns},
+                -- As substitute_ranking orders them: available first, then by the price per unit
+                ROW_NUMBER() OVER (
+                    PARTITION BY `{field}`
+                    ORDER BY is_discontinued, IFNULL(unit_price, 0) = 0, unit_price, price, name
+                ) AS _rank
+            FROM `tabMedicine`
+            WHERE `{field}` IN %(keys)s
+        ) ranked
+        WHERE _rank <= %(limit)s
+        ORDER BY `{field}`, _rank
+    """, {"keys": tuple(keys), "limit": MAX_GROUP_SIZE})
+
+    # The collation is case-insensitive, a row belongs to every key that differs only in case
+    requested = {}
+    for key in keys:
+        requested.setdefault(key.lower(), []).append(key)
+
+    groups = {key: [] for key in keys}
+    index = RECORD_FIELDS.index(field)
+    for row in rows:
+        for key in requested.get((row[index] or "").lower(), ()):
+            groups[key].append(tuple(row))
+    return groups
+
+
+def _get_db():
+    # Inside read_replica.read_from_replica the replica, unless the catalog changed within
+    # its allowed lag: the rows are cached as current, for every worker
+    if hasattr(frappe.local, "primary_db") and not is_read_current():
+        return frappe.local.primary_db
+    return frappe.db
+
+
+def _get_values(doc):
+    return tuple(doc.get(field) for field in RECORD_FIELDS)
+
+
+def _get_group_key(field, key):
+    return f"{field}:{key}"
@@ -0,0 +1,152 @@
+import json
+
+import frappe
+from frappe.utils import add_days, flt, now_datetime
+
+from genmedai.genmedai.utils.http_cache import bump_catalog_version
+from genmedai.genmedai.utils.medicine_search import resolve_medicines
+
+# Popular medicines get their AI details (explanation, normalized salt, typical pack
+# price) ahead of time, in batched prompts, so searches for them need no AI call.
+TOP_QUERIES = 300
+POPULARITY_DAYS = 7
+BATCH_SIZE = 10
+REFRESH_DAYS = 30
+
+ENRICHMENT_FIELDS = ("ai_explanation", "ai_normalized_salt", "ai_typical_pack_price", "ai_affiliate_link", "ai_enriched_on")
+
+
+def enrich_top_medicines():
+    """Daily: enrich the medicines behind the most searched queries, BATCH_SIZE per AI call."""
+    names = get_top_searched_medicines()
+    if not names:
+        return
+
+    stale = frappe.get_all(
+        "Medicine",
+        filters={"name": ("in", names)},
+        fields=["name", "brand_name", "salt_composition", "pack_size_label", "ai_enriched_on"],
+    )
+    cutoff = add_days(now_datetime(), -REFRESH_DAYS)
+    stale = [m for m in stale if not m.ai_enriched_on or m.ai_enriched_on < cutoff]
+
+    frappe.flags.ai_endpoint = "enrichment"
+    for i in range(0, len(stale), BATCH_SIZE):
+        enrich_medicines(stale[i:i + BATCH_SIZE])
+        # Cached search responses must pick up the new AI details
+        bump_catalog_version()
+        frappe.db.commit()
+
+
+def get_top_searched_medicines():
+    queries = frappe.db.sql("""
+        SELECT query
+        FROM `tabSearch Log`
+        WHERE searched_on >= %s AND result_count > 0
+        GROUP BY query
+        ORDER BY COUNT(*) DESC
+        LIMIT %s
+    """, (add_days(now_datetime(), -POPULARITY_DAYS), TOP_QUERIES), pluck=True)
+
+    # The medicine each popular query lands on, resolved in one query
+    names = []
+    for medicine in resolve_medicines(queries, fields=("name",)):
+        if medicine and medicine.name not in names:
+            names.append(medicine.name)
+    return names
+
+
+def enrich_medicines(medicines):
+    from genmedai.api import query_ai
+
+    by_id = {str(i): m for i, m in enumerate(medicines, start=1)}
+    items = [
+        {
+            "id": key,
+            "brand_name": m.brand_name,
+            "salt_composition": m.salt_composition or "",
+            "pack_size_label": m.pack_size_label or "",
+        }
+        for key, m in by_id.items()
+    ]
+
+    ai_text = query_ai(build_enrichment_prompt(items))
+    enrichments = parse_enrichments(ai_text)
+
+    now = now_datetime()
+    for enrichment in enrichments:
+        medicine = by_id.get(str(enrichment.get("id")))
+        if not medicine or not enrichment.get("explanation"):
+            continue
+
+        frappe.db.set_value("Medicine", medicine.name, {
+            "ai_explanation": enrichment.get("explanation"),
+            "ai_normalized_salt": (enrichment.get("normalized_salt") or "")[:140] or None,
+            "ai_typical_pack_price": flt(enrichment.get("typical_pack_price")) or None,
+            "ai_affiliate_link": enrichment.get("affiliate_link") or None,
+            "ai_enriched_on": now,
+        }, update_modified=False)
+
+
+def build_enrichment_prompt(items):
+    return f"""
+    You are a medical assistant JSON API.
+    For each medicine below (available in India), return its details.
+    Medicines:
+    {json.dumps(items, ensure_ascii=False)}
+
+    Return a JSON LIST (and ONLY JSON, no markdown) with one object per medicine:
+    [{{
+        "id": "the id given above",
+        "explanation": "A detailed explanation (3-4 sentences) of what this medicine is, its primary uses, how it works, and key precautions.",
+        "normalized_salt": "Active ingredients with strengths in standard INN names, e.g. Amoxycillin (500mg) + Clavulanic Acid (125mg)",
+        "typical_pack_price": 100.00,
+        "affiliate_link": "A search URL for the medicine on a major Indian online pharmacy (like 1mg, Pharmeasy, or Apollo)"
+    }}]
+
+    If you do not know a medicine, leave it out of the list.
+    """
+
+
+def parse_enrichments(ai_text):
+    if not ai_text:
+        return []
+
+    try:
+        start_index = ai_text.find('[')
+        end_index = ai_text.rfind(']')
+        data = json.loads(ai_text[start_index:end_index + 1] if start_index != -1 and end_index != -1 else ai_text)
+    except Exception as e:
+        frappe.log_error(message=f"GenMedAI Enrichment JSON Parse Error: {str(e)} | Text: {ai_text}", title="GenMedAI Debug")
+        return []
+
+    return [d for d in data if isinstance(d, dict)] if isinstance(data, list) else []
+
+
+def get_stored_enrichment(query, local_results):
+    """
+    AI-style result built from the stored enrichment of the medicine a search lands on,
+    when the query names it (exact or prefix brand match). None otherwise.
+    """
+    if not local_results:
+        return None
+
+    top = local_results[0]
+    query = " ".join((query or "").strip().strip('"').lower().split())
+    brand_name = " ".join((top.get("brand_name") or "").lower().split())
+    if not query or not brand_name.startswith(query):
+        return None
+
+    enrichment = frappe.db.get_value("Medicine", top.get("name"), ENRICHMENT_FIELDS, as_dict=True)
+    if not enrichment or not enrichment.ai_explanation:
+        return None
+
+    return {
+        **top,
+        "name": f"AI_GENERATED_{top.get('name')}",
+        "is_ai_generated": 1,
+        "salt_composition": enrichment.ai_normalized_salt or top.get("salt_composition"),
+        "price": enrichment.ai_typical_pack_price or top.get("price"),
+        "explanation": enrichment.ai_explanation,
+        "affiliate_link": enrichment.ai_affiliate_link,
+    }
@@ -0,0 +1,139 @@
+import re
+
+import frappe
+
+# FULLTEXT index used by the search box. Only the columns people actually type
+# into the search box are indexed; description/pack size are left out on purpose.
+SEARCH_INDEX_NAME = "medicine_search"
+SEARCH_FIELDS = (
+    "brand_name",
+    "salt_composition",
+    "short_composition1",
+    "short_composition2",
+    "manufacturer_name",
+)
+
+RESULT_FIELDS = (
+    "name", "brand_name", "salt_composition", "short_composition1", "short_composition2",
+    "strength", "dosage_form", "manufacturer_name", "type",
+    "price", "is_generic", "image", "is_discontinued", "pack_size_label", "composition_key"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_min_token_size = None
+
+
+def ensure_search_index():
+    """Create the FULLTEXT index on `tabMedicine` if it is missing (MariaDB only)."""
+    if frappe.db.db_type != "mariadb":
+        return
+
+    if frappe.db.sql("SHOW INDEX FROM `tabMedicine` WHERE Key_name = %s", SEARCH_INDEX_NAME):
+        return
+
+    # Medicine names are full of short "stopwords" (e.g. "On", "It"), build the index without them
+    frappe.db.sql("SET SESSION innodb_ft_enable_stopword = 0")
+    columns = ", ".join(f"`{field}`" for field in SEARCH_FIELDS)
+    frappe.db.sql_ddl(f"ALTER TABLE `tabMedicine` ADD FULLTEXT INDEX `{SEARCH_INDEX_NAME}` ({columns})")
+
+
+def get_min_token_size():
+    global _min_token_size
+    if _min_token_size is None:
+        try:
+            _min_token_size = int(frappe.db.sql("SELECT @@innodb_ft_min_token_size")[0][0])
+        except Exception:
+            _min_token_size = 3
+    return _min_token_size
+
+
+def build_boolean_query(query):
+    """
+    Convert free text into a BOOLEAN MODE expression where every term is
+    required and prefix matched, e.g. "dolo 65" -> "+dolo* +65*".
+    Terms shorter than the index's minimum token size can't be matched and are dropped.
+    """
+    min_size = get_min_token_size()
+    terms = [t for t in _TOKEN_RE.findall(query or "") if len(t) >= min_size]
+    return " ".join(f"+{t}*" for t in terms)
+
+
+def search_medicines(query, limit=20):
+    """Ranked, prefix-matching search over the Medicine FULLTEXT index."""
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    boolean_query = build_boolean_query(query) if frappe.db.db_type == "mariadb" else None
+    if not boolean_query:
+        return prefix_search(query, limit)
+
+    fields = ", ".join(RESULT_FIELDS)
+    match = f"MATCH({', '.join(SEARCH_FIELDS)}) AGAINST (%(terms)s IN BOOLEAN MODE)"
+
+    # Relevance: exact brand hit first, then brand prefix, then FULLTEXT score
+    return frappe.db.sql(f"""
+        SELECT {fields}, {match} AS score
+        FROM `tabMedicine`
+        WHERE {match}
+        ORDER BY (brand_name = %(query)s) DESC, (brand_name LIKE %(prefix)s) DESC, score DESC
+        LIMIT %(limit)s
+    """, {
+        "terms": boolean_query,
+        "query": query,
+        "prefix": f"{escape_like(query)}%",
+        "limit": int(limit),
+    }, as_dict=True)
+
+
+def resolve_medicines(names, fields=RESULT_FIELDS):
+    """
+    Best local match for each of `names` (e.g. read off a prescription), all in one
+    round trip: a UNION ALL of single-row searches ranked like search_medicines.
+    Returns a list aligned with `names`, None where nothing matched.
+    """
+    columns = ", ".join(fields)
+    match = f"MATCH({', '.join(SEARCH_FIELDS)}) AGAINST (%(terms_{{i}})s IN BOOLEAN MODE)"
+    use_fulltext = frappe.db.db_type == "mariadb"
+
+    parts, values = [], {}
+    for i, name in enumerate(names):
+        name = (name or "").strip()
+        boolean_query = build_boolean_query(name) if use_fulltext and name else None
+        values.update({f"query_{i}": name, f"prefix_{i}": f"{escape_like(name)}%"})
+
+        if boolean_query:
+            values[f"terms_{i}"] = boolean_query
+            where = match.format(i=i)
+            order = f"(brand_name = %(query_{i})s) DESC, (brand_name LIKE %(prefix_{i})s) DESC, {where} DESC"
+        elif name:
+            where = f"brand_name LIKE %(prefix_{i})s"
+            order = "brand_name"
+        else:
+            continue
+
+        parts.append(f"(SELECT {columns}, {i} AS _idx FROM `tabMedicine` WHERE {where} ORDER BY {order} LIMIT 1)")
+
+    resolved = [None] * len(names)
+    if not parts:
+        return resolved
+
+    for row in frappe.db.sql(" UNION ALL ".join(parts), values, as_dict=True):
+        resolved[row.pop("_idx")] = row
+    return resolved
+
+
+def prefix_search(query, limit=20):
+    """Brand name prefix lookup, served by the unique index on brand_name."""
+    fields = ", ".join(RESULT_FIELDS)
+    return frappe.db.sql(f"""
+        SELECT {fields}
+        FROM `tabMedicine`
+        WHERE brand_name LIKE %(prefix)s
+        ORDER BY brand_name
+        LIMIT %(limit)s
+    """, {"prefix": f"{escape_like(query)}%", "limit": int(limit)}, as_dict=True)
+
+
+def escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
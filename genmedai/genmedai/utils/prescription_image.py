@@ -0,0 +1,100 @@
+import base64
+import binascii
+import hashlib
+import io
+
+import frappe
+from frappe.utils import cint
+from PIL import Image, ImageOps
+
+DEFAULT_MAX_UPLOAD_MB = 8
+DEFAULT_MAX_DIMENSION = 1600
+DEFAULT_JPEG_QUALITY = 80
+
+# Phone photos are 12-50 MP; anything far beyond is not a prescription photo
+MAX_PIXELS = 80_000_000
+
+# Magic bytes of the formats Pillow decodes here
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def get_image_settings():
+    try:
+        settings = frappe.get_cached_doc("GenMedAI Settings")
+    except Exception:
+        settings = frappe._dict()
+
+    return frappe._dict(
+        max_bytes=cint(settings.get("prescription_max_upload_mb") or DEFAULT_MAX_UPLOAD_MB) * 1024 * 1024,
+        max_dimension=cint(settings.get("prescription_max_dimension") or DEFAULT_MAX_DIMENSION),
+        quality=min(max(cint(settings.get("prescription_jpeg_quality") or DEFAULT_JPEG_QUALITY), 1), 95),
+    )
+
+
+def sniff_mime_type(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime_type in SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    return None
+
+
+def prepare_prescription_image(image_base64):
+    """
+    Decode an uploaded prescription image (base64, optionally a data: URL) and shrink it
+    for the model: longest side at most `max_dimension`, grayscale JPEG.
+    Returns a _dict of the base64 `data`, its `mime_type`, and the `content_hash` of the
+    original upload, which identifies re-uploads of the same image.
+    """
+    settings = get_image_settings()
+
+    if "," in image_base64[:100]:
+        image_base64 = image_base64.split(",", 1)[1]
+
+    # Reject before decoding anything: base64 is 4 characters per 3 bytes
+    if len(image_base64) * 3 // 4 > settings.max_bytes:
+        frappe.throw(f"Image is larger than {settings.max_bytes // (1024 * 1024)} MB", frappe.ValidationError)
+
+    try:
+        raw = base64.b64decode(image_base64)
+    except (binascii.Error, ValueError):
+        frappe.throw("Invalid image data")
+
+    mime_type = sniff_mime_type(raw)
+    if not mime_type:
+        frappe.throw("Unsupported image format, please upload a JPEG, PNG or WebP photo")
+
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                frappe.throw("Image resolution is too large")
+
+            # Photos are often stored sideways with an EXIF rotation
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("L")
+            image.thumbnail((settings.max_dimension, settings.max_dimension), Image.LANCZOS)
+
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=settings.quality, optimize=True)
+    except frappe.ValidationError:
+        raise
+    except Exception:
+        frappe.throw("Could not read the image")
+
+    return frappe._dict(
+        data=base64.b64encode(output.getvalue()).decode(),
+        mime_type="image/jpeg",
+        content_hash=content_hash,
+        original_mime_type=mime_type,
+    )
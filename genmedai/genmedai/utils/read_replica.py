@@ -0,0 +1,108 @@
+import functools
+import threading
+import time
+
+import frappe
+from frappe.utils import cint
+from pymysql.err import InterfaceError, OperationalError
+
+# Guest catalog reads are served by the read replica of the site, when it has one
+# (site config: read_from_replica, replica_host, replica_db_port, see
+# frappe.connect_replica), so bulk imports on the primary don't slow search down.
+# A replica lagging more than `replica_max_lag` seconds, or failing, is left out for
+# CHECK_INTERVAL seconds and the reads go to the primary meanwhile.
+DEFAULT_MAX_LAG = 30
+CHECK_INTERVAL = 10
+
+# Connection lost or refused, lock wait timeouts: a read is safe to run again
+RETRY_ERRORS = (InterfaceError, OperationalError)
+
+_lock = threading.Lock()
+_health = {}  # per site: (checked at, usable)
+
+
+def read_from_replica(fn):
+    """
+    Run a read-only function on the read replica if the site has a healthy one, else
+    on the primary. Place below @http_cache, so a 304 never opens a connection.
+    The function must not write: the replica is read only, and a read that failed
+    on it runs again on the primary.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _connect_replica():
+            return fn(*args, **kwargs)
+
+        # Lets caches tell reads that may predate a recent change (http_cache.is_read_current)
+        frappe.flags.read_from_replica = get_max_lag()
+        try:
+            return fn(*args, **kwargs)
+        except RETRY_ERRORS:
+            _set_usable(False)
+        finally:
+            _restore_primary()
+
+        # Read again from the primary, current
+        frappe.flags.read_from_replica = False
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def get_max_lag():
+    return cint(frappe.conf.replica_max_lag) or DEFAULT_MAX_LAG
+
+
+def get_replica_lag():
+    """Seconds the replica (the current connection) is behind the primary, None if it isn't replicating."""
+    status = frappe.db.sql("SHOW REPLICA STATUS", as_dict=True)
+    if not status or status[0].get("Seconds_Behind_Master") is None:
+        return None
+    return cint(status[0]["Seconds_Behind_Master"])
+
+
+def _connect_replica():
+    """Switch frappe.db to the replica, True if it did."""
+    if not frappe.conf.read_from_replica or hasattr(frappe.local, "primary_db"):
+        return False
+
+    checked_on, usable = _health.get(frappe.local.site, (0, True))
+    due = time.monotonic() - checked_on >= CHECK_INTERVAL
+    if not usable and not due:
+        return False
+
+    try:
+        frappe.connect_replica()
+        if due:
+            lag = get_replica_lag()
+            usable = lag is not None and lag <= get_max_lag()
+            _set_usable(usable)
+            if not usable:
+                frappe.logger("genmedai").warning(f"Read replica skipped, replication lag: {lag}")
+    except Exception:
+        frappe.logger("genmedai").warning("Read replica skipped, not reachable", exc_info=True)
+        _set_usable(False)
+        usable = False
+
+    if not usable:
+        _restore_primary()
+    return usable
+
+
+def _restore_primary():
+    if not hasattr(frappe.local, "primary_db"):
+        return
+
+    try:
+        frappe.local.db.close()
+    except Exception:
+        pass
+    frappe.local.db = frappe.local.primary_db
+    # frappe.connect_replica only switches when these are not set
+    del frappe.local.primary_db
+    del frappe.local.replica_db
+
+
+def _set_usable(usable):
+    with _lock:
+        _health[frappe.local.site] = (time.monotonic(), usable)
@@ -0,0 +1,98 @@
+import json
+
+import frappe
+from frappe.utils import add_days, cint, now_datetime
+
+# Searches are pushed to a Redis list on the request path and written to
+# "Search Log" in batches by flush_search_log, so a search never writes to the DB.
+BUFFER_KEY = "genmedai:search_log:buffer"
+FLUSH_BATCH_SIZE = 1000
+# A busy minute should not turn the flush into a long job, the rest waits a minute
+MAX_BATCHES_PER_FLUSH = 50
+# Protects the buffer while the flush job is down
+MAX_BUFFERED = 200000
+RETENTION_DAYS = 180
+# Result count of each search's last full run, for the ones answered with a 304
+RESULT_COUNT_PREFIX = "genmedai:search_log:result_count"
+RESULT_COUNT_TTL = 7 * 86400
+
+LOG_FIELDS = ("name", "creation", "modified", "modified_by", "owner", "query", "searched_on", "result_count", "latency_ms", "ai_used")
+
+
+def log_search(query, result_count, latency_ms, ai_used):
+    query = (query or "").strip()[:140]
+    entry = json.dumps({
+        "query": query,
+        "searched_on": str(now_datetime()),
+        "result_count": cint(result_count),
+        "latency_ms": round(latency_ms, 1),
+        "ai_used": int(bool(ai_used)),
+    })
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(BUFFER_KEY)
+        pipe = cache.pipeline()
+        pipe.rpush(key, entry)
+        pipe.ltrim(key, -MAX_BUFFERED, -1)
+        pipe.set(cache.make_key(f"{RESULT_COUNT_PREFIX}:{query}"), cint(result_count), ex=RESULT_COUNT_TTL)
+        pipe.execute()
+    except Exception:
+        # Analytics are best effort, a search must not fail or slow down for them
+        pass
+
+
+def log_cached_search(query):
+    """
+    Log a search the browser revalidated (a 304, the endpoint didn't run): it shows
+    the results of the search's last full run, whose count is reused.
+    """
+    query = (query or "").strip()[:140]
+    try:
+        cache = frappe.cache()
+        result_count = cache.get(cache.make_key(f"{RESULT_COUNT_PREFIX}:{query}"))
+    except Exception:
+        return
+
+    # Unknown after RESULT_COUNT_TTL, better left out than counted as a zero result search
+    if result_count is not None:
+        log_search(query, result_count, 0, ai_used=False)
+
+
+def flush_search_log():
+    """Scheduled every minute: move buffered searches into "Search Log"."""
+    cache = frappe.cache()
+    key = cache.make_key(BUFFER_KEY)
+
+    for _ in range(MAX_BATCHES_PER_FLUSH):
+        # Read and remove a batch atomically, so concurrent flushes don't double insert
+        pipe = cache.pipeline(transaction=True)
+        pipe.lrange(key, 0, FLUSH_BATCH_SIZE - 1)
+        pipe.ltrim(key, FLUSH_BATCH_SIZE, -1)
+        entries = pipe.execute()[0]
+        if not entries:
+            break
+
+        now = frappe.utils.now()
+        rows = []
+        for entry in entries:
+            try:
+                e = json.loads(entry)
+            except ValueError:
+                continue
+            rows.append((
+                frappe.generate_hash(length=10), now, now, "Administrator", "Administrator",
+                e["query"], e["searched_on"], e["result_count"], e["latency_ms"], e["ai_used"],
+            ))
+
+        if rows:
+            frappe.db.bulk_insert("Search Log", LOG_FIELDS, rows)
+            frappe.db.commit()
+
+        if len(entries) < FLUSH_BATCH_SIZE:
+            break
+
+
+def trim_search_log():
+    """Daily: drop searches older than the retention period."""
+    frappe.db.delete("Search Log", {"searched_on": ("<", add_days(now_datetime(), -RETENTION_DAYS))})
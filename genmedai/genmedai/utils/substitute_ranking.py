@@ -0,0 +1,176 @@
+"""
+Ranking of substitute medicines.
+
+A candidate is compared with the source medicine on its ingredient set, the
+strengths of those ingredients (unit normalized, "0.5 g" == "500mg"), its dosage
+form, and its price per unit of the pack ("strip of 15 tablets" vs "strip of 10").
+
+Pure Python, no database access: the callers load candidate rows (see substitutes.py).
+"""
+
+import heapq
+import math
+import re
+
+# Match tiers, best first. Candidates have the source's ingredients (other
+# combinations of a salt are not substitutes), they differ in strength or form only.
+EXACT, SAME_FAMILY, OTHER_FORM, OTHER_STRENGTH = range(4)
+MATCH_LABELS = ("exact", "same_family", "other_form", "other_strength")
+
+# Strengths are compared in mg (mass), ml (volume) or mg/ml (concentration)
+_MASS_UNITS = {"mcg": 0.001, "µg": 0.001, "ug": 0.001, "mg": 1.0, "g": 1000.0, "gm": 1000.0, "gms": 1000.0, "kg": 1000000.0}
+_VOLUME_UNITS = {"ml": 1.0, "l": 1000.0, "ltr": 1000.0}
+_STRENGTH_RE = re.compile(
+    r"^(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[a-zµ%]+)?(?:\s*[wv]/[wv])?"
+    r"(?:\s*/\s*(?P<per_value>\d+(?:\.\d+)?)?\s*(?P<per_unit>[a-z]+))?$"
+)
+
+# "strip of 10 tablets", "bottle of 100 ml Syrup", "box of 3 x 10 capsules", "10 Tablet Strip"
+_PACK_RE = re.compile(r"(?:(?P<packs>\d+)\s*[x×*]\s*)?(?P<count>\d+(?:\.\d+)?)\s*(?P<unit>[a-z]+)?")
+_PACK_UNITS = {
+    "tablet": "tablet", "tablets": "tablet", "tab": "tablet", "tabs": "tablet",
+    "capsule": "capsule", "capsules": "capsule", "cap": "capsule", "caps": "capsule",
+    "sachet": "sachet", "sachets": "sachet",
+    "ml": "ml", "l": "ml", "ltr": "ml",
+    "g": "g", "gm": "g", "gms": "g", "gram": "g", "grams": "g",
+    "dose": "dose", "doses": "dose", "mdi": "dose",
+}
+_PACK_FACTORS = {"l": 1000.0, "ltr": 1000.0}
+
+_FORM_FAMILIES = {
+    "tablet": "oral_solid", "capsule": "oral_solid",
+    "syrup": "oral_liquid", "suspension": "oral_liquid", "solution": "oral_liquid", "liquid": "oral_liquid",
+    "sachet": "oral_powder", "powder": "oral_powder", "granules": "oral_powder",
+    "injection": "injection", "infusion": "injection", "vial": "injection",
+    "cream": "topical", "gel": "topical", "ointment": "topical", "lotion": "topical",
+    "drops": "drops", "drop": "drops",
+    "inhaler": "inhalation", "respules": "inhalation", "rotacap": "inhalation",
+}
+_FORM_ALIASES = {"tablets": "tablet", "capsules": "capsule", "sachets": "sachet", "drop": "drops", "respule": "respules", "rotacaps": "rotacap"}
+
+
+def parse_strength(strength):
+    """
+    A strength normalized for comparison: (value, unit), unit one of mg, ml, mg/ml,
+    or the unit as written (%, iu, ...). None when it can't be parsed.
+    """
+    text = " ".join((strength or "").lower().split())
+    match = _STRENGTH_RE.match(text)
+    if not match:
+        return None
+
+    value, unit = float(match.group("value")), match.group("unit") or ""
+    if unit in _MASS_UNITS:
+        value, unit = value * _MASS_UNITS[unit], "mg"
+    elif unit in _VOLUME_UNITS:
+        value, unit = value * _VOLUME_UNITS[unit], "ml"
+
+    per_unit = match.group("per_unit")
+    if per_unit:
+        per_value = float(match.group("per_value") or 1)
+        if unit == "mg" and per_unit in _VOLUME_UNITS and per_value:
+            value, unit = value / (per_value * _VOLUME_UNITS[per_unit]), "mg/ml"
+        else:
+            unit = f"{unit}/{per_value:g}{per_unit}"
+
+    return round(value, 6), unit
+
+
+def get_strength_profile(ingredients):
+    """
+    {ingredient: normalized strength} of parsed ingredients ([{"ingredient", "strength"}]).
+    Strengths that can't be parsed are compared as written.
+    """
+    profile = {}
+    for d in ingredients:
+        strength = d.get("strength") or ""
+        profile[d["ingredient"].lower()] = parse_strength(strength) or "".join(strength.lower().split())
+    return profile
+
+
+def parse_pack_size(pack_size_label):
+    """(unit count, unit) of a pack label, e.g. "strip of 15 tablets" -> (15, "tablet"). None if unknown."""
+    text = (pack_size_label or "").lower()
+    for match in _PACK_RE.finditer(text):
+        unit = match.group("unit")
+        if unit not in _PACK_UNITS:
+            continue
+
+        count = float(match.group("count")) * _PACK_FACTORS.get(unit, 1.0)
+        if match.group("packs"):
+            count *= int(match.group("packs"))
+        if count > 0:
+            return count, _PACK_UNITS[unit]
+    return None
+
+
+def get_unit_price(price, pack):
+    if not price or price <= 0 or not pack:
+        return None
+    return round(price / pack[0], 4)
+
+
+def normalize_form(dosage_form, pack_size_label=None):
+    """Dosage form as a lowercase word, from the field or else the pack label ("... Syrup")."""
+    for text in (dosage_form, pack_size_label):
+        for word in reversed((text or "").lower().split()):
+            word = _FORM_ALIASES.get(word, word)
+            if word in _FORM_FAMILIES:
+                return word
+    return None
+
+
+class Candidate:
+    __slots__ = ("name", "ingredients", "strengths", "form", "pack", "price", "unit_price", "is_discontinued", "row")
+
+    def __init__(self, row, ingredients):
+        self.name = row.get("name")
+        self.strengths = get_strength_profile(ingredients)
+        self.ingredients = frozenset(self.strengths)
+        self.form = normalize_form(row.get("dosage_form") or row.get("type"), row.get("pack_size_label"))
+        self.pack = parse_pack_size(row.get("pack_size_label"))
+        self.price = float(row.get("price") or 0)
+        self.unit_price = get_unit_price(self.price, self.pack)
+        self.is_discontinued = 1 if row.get("is_discontinued") else 0
+        self.row = row
+
+
+def get_savings(source, candidate):
+    """
+    What the candidate saves on the source's pack, in currency: compared per unit for
+    the same quantity when both packs are counted in the same unit, else pack to pack.
+    """
+    if source.unit_price and candidate.unit_price and source.pack[1] == candidate.pack[1]:
+        return round((source.unit_price - candidate.unit_price) * source.pack[0], 2)
+    if source.price and candidate.price:
+        return round(source.price - candidate.price, 2)
+    return None
+
+
+def get_tier(source, candidate):
+    if candidate.strengths != source.strengths:
+        return OTHER_STRENGTH
+    if not source.form or candidate.form == source.form:
+        return EXACT
+    if candidate.form and _FORM_FAMILIES[candidate.form] == _FORM_FAMILIES[source.form]:
+        return SAME_FAMILY
+    return OTHER_FORM
+
+
+def rank_substitutes(source, candidates, limit=None):
+    """
+    Candidates (with the source's ingredients) ordered best first: by match tier, available before discontinued, then
+    by the cheapest price per unit (pack price when the pack size is unknown).
+    Returns [(tier, candidate)], only the best `limit` when given.
+    """
+    ranked = []
+    for candidate in candidates:
+        tier = get_tier(source, candidate)
+        price = candidate.unit_price if candidate.unit_price is not None else candidate.price or math.inf
+        ranked.append(((tier, candidate.is_discontinued, candidate.unit_price is None, price, candidate.name or ""), candidate))
+
+    if limit is not None:
+        ranked = heapq.nsmallest(limit, ranked, key=lambda r: r[0])
+    else:
+        ranked.sort(key=lambda r: r[0])
+    return [(key[0], candidate) for key, candidate in ranked]
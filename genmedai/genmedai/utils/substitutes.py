@@ -0,0 +1,72 @@
+from genmedai.genmedai.utils.composition import derive_composition
+from genmedai.genmedai.utils.medicine_cache import GROUP_KEYS, get_groups
+from genmedai.genmedai.utils.substitute_ranking import (
+    EXACT, MATCH_LABELS, SAME_FAMILY, Candidate, get_savings, rank_substitutes,
+)
+
+# Substitute candidates are loaded per composition group (the Medicines of one
+# composition key or one base salt) from the medicine cache, parsed once per worker,
+# so ranking a popular medicine needs no query at all.
+SUBSTITUTE_FIELDS = (
+    "name", "brand_name", "salt_composition", "strength", "dosage_form", "manufacturer_name",
+    "type", "price", "is_generic", "image", "pack_size_label", "is_discontinued",
+)
+MAX_PAGE_LENGTH = 50
+# Tiers that can replace the source as prescribed, the only ones savings are given for
+EQUIVALENT_TIERS = (EXACT, SAME_FAMILY)
+
+
+def find_substitutes(source_row, salt_composition, exclude=None, start=0, page_length=10):
+    """
+    Ranked substitutes of a medicine (a row with price, dosage_form and pack_size_label):
+    the medicines of its exact composition group, and of its base salt group with the
+    same ingredients (other strengths or forms). Each row is annotated with
+    its `match` tier, `unit_count`, `unit_price` and the `savings` on the source's pack
+    (None for other strengths or forms, which are not a like for like replacement).
+    """
+    composition = derive_composition(salt_composition)
+    groups = {field: get_groups(field, [composition.get(field)]) for field in GROUP_KEYS}
+    return _rank(source_row, composition, groups, exclude, start, page_length)
+
+
+def find_substitutes_bulk(sources, start=0, page_length=3):
+    """
+    {name: ranked substitutes} of several catalog medicines (MedicineRecords), as
+    find_substitutes. The groups of all of them are loaded together.
+    """
+    compositions = {source.name: derive_composition(source.salt_composition) for source in sources}
+    groups = {
+        field: get_groups(field, [composition.get(field) for composition in compositions.values()])
+        for field in GROUP_KEYS
+    }
+    return {
+        source.name: _rank(source, compositions[source.name], groups, source.name, start, page_length)
+        for source in sources
+    }
+
+
+def _rank(source_row, composition, groups, exclude, start, page_length):
+    source = Candidate(source_row, composition.ingredients)
+
+    candidates = {}
+    for field in GROUP_KEYS:
+        for candidate in groups[field].get(composition.get(field), ()):
+            # A base salt group also holds the other combinations of the salt
+            # (Amoxycillin for Amoxycillin + Clavulanic Acid): same ingredients only
+            if candidate.name != exclude and candidate.ingredients == source.ingredients:
+                candidates[candidate.name] = candidate
+
+    start = max(start, 0)
+    page_length = min(max(page_length, 1), MAX_PAGE_LENGTH)
+    ranked = rank_substitutes(source, candidates.values(), limit=start + page_length)[start:]
+
+    return [
+        {
+            **candidate.row.as_dict(SUBSTITUTE_FIELDS),
+            "match": MATCH_LABELS[tier],
+            "unit_count": candidate.pack[0] if candidate.pack else None,
+            "unit_price": candidate.unit_price,
+            "savings": get_savings(source, candidate) if tier in EQUIVALENT_TIERS else None,
+        }
+        for tier, candidate in ranked
+    ]
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import frappe
+from frappe.utils import cint
+
+from genmedai.genmedai.utils.suggest_index import SuggestIndex
+
+# Every worker process holds its own SuggestIndex. Medicine changes are appended to a
+# Redis stream that each worker replays (at most every SYNC_INTERVAL seconds); bumping
+# the generation (after bulk imports) makes every worker rebuild from the table.
+# Builds run in a background thread, started by the worker's first request: the
+# previous index (or none, at start) is served meanwhile.
+CHANGES_KEY = "genmedai:suggest:changes"
+GENERATION_KEY = "genmedai:suggest:generation"
+MAX_CHANGES = 10000
+SYNC_INTERVAL = 1.0
+# About 100 MB per worker (site config: suggest_max_medicines), available medicines first
+DEFAULT_MAX_MEDICINES = 250000
+
+_lock = threading.Lock()
+_states = {}  # per site, a bench process serves several
+
+
+def suggest(query, limit=10):
+    index = get_suggest_index()
+    if index is None:
+        # First build of this worker still running
+        return []
+    with _lock:
+        return index.search(query, limit)
+
+
+def warm_suggest_index():
+    """before_request: start building the worker's index, so no keystroke waits for it."""
+    state = _get_state()
+    if state["index"] is None and not state["building"]:
+        get_suggest_index()
+
+
+def get_suggest_index():
+    """The worker's index, None until its first build is done."""
+    state = _get_state()
+    if state["index"] is not None and time.monotonic() - state["synced_at"] < SYNC_INTERVAL:
+        return state["index"]
+
+    with _lock:
+        try:
+            cache = frappe.cache()
+            generation = frappe.safe_decode(cache.get(cache.make_key(GENERATION_KEY)))
+        except Exception:
+            # Without Redis the index is never refreshed, build it once and serve that
+            cache = generation = None
+
+        if state["index"] is None or generation != state["generation"] or not _replay_changes(state, cache):
+            _start_build(state)
+
+        state["synced_at"] = time.monotonic()
+        return state["index"]
+
+
+def record_medicine_change(doc, deleted=False):
+    """Publish a Medicine insert / update / delete to the suggest indexes of all workers."""
+    if not deleted:
+        before = doc.get_doc_before_save()
+        if before and before.brand_name == doc.brand_name and before.base_salt == doc.base_salt:
+            return
+
+    change = {
+        "name": doc.name,
+        "brand_name": doc.brand_name or "",
+        "base_salt": doc.base_salt or "",
+        "deleted": int(deleted),
+    }
+
+    def publish():
+        try:
+            cache = frappe.cache()
+            cache.xadd(cache.make_key(CHANGES_KEY), change, maxlen=MAX_CHANGES, approximate=True)
+        except Exception:
+            pass
+
+    # Workers must not pick up a change that is rolled back
+    frappe.db.after_commit.add(publish)
+
+
+def reset_suggest_index():
+    """Make every worker rebuild its index, e.g. after a bulk import bypassed Medicine events."""
+    try:
+        cache = frappe.cache()
+        cache.incr(cache.make_key(GENERATION_KEY))
+    except Exception:
+        pass
+
+
+def _get_state():
+    return _states.setdefault(frappe.local.site, {
+        "index": None, "generation": None, "last_id": None, "synced_at": 0, "building": False,
+    })
+
+
+def _start_build(state):
+    if state["building"]:
+        return
+
+    state["building"] = True
+    site, sites_path = frappe.local.site, frappe.local.sites_path
+    threading.Thread(target=_build_in_background, args=(state, site, sites_path), daemon=True).start()
+
+
+def _build_in_background(state, site, sites_path):
+    try:
+        frappe.init(site=site, sites_path=sites_path)
+        frappe.connect()
+        _build(state)
+    except Exception:
+        frappe.logger("genmedai").warning("Suggest index build failed", exc_info=True)
+    finally:
+        state["building"] = False
+        frappe.destroy()
+
+
+def _build(state):
+    # Changes made while loading are replayed on top, applying them is idempotent
+    generation, last_id = None, "0-0"
+    try:
+        cache = frappe.cache()
+        generation = frappe.safe_decode(cache.get(cache.make_key(GENERATION_KEY)))
+        latest = cache.xrevrange(cache.make_key(CHANGES_KEY), count=1)
+        if latest:
+            last_id = frappe.safe_decode(latest[0][0])
+    except Exception:
+        pass
+
+    max_medicines = cint(frappe.conf.suggest_max_medicines) or DEFAULT_MAX_MEDICINES
+    index = SuggestIndex(max_medicines=max_medicines)
+    index.load(frappe.db.sql("""
+        SELECT name, brand_name, base_salt FROM `tabMedicine`
+        ORDER BY is_discontinued, name
+        LIMIT %s
+    """, max_medicines))
+
+    with _lock:
+        # Synced (changes replayed) by the next request
+        state.update(index=index, generation=generation, last_id=last_id, synced_at=0)
+
+
+def _replay_changes(state, cache):
+    """Apply the changes since the last sync. False if some were trimmed already."""
+    if cache is None:
+        return True
+
+    try:
+        entries = cache.xrange(cache.make_key(CHANGES_KEY), min=state["last_id"], max="+", count=MAX_CHANGES)
+    except Exception:
+        return True
+
+    entries = [(frappe.safe_decode(entry_id), fields) for entry_id, fields in entries]
+    if state["last_id"] != "0-0":
+        # The range starts at the last applied entry, if that is gone the stream moved past us
+        if not entries or entries[0][0] != state["last_id"]:
+            return False
+        entries = entries[1:]
+
+    index = state["index"]
+    for entry_id, fields in entries:
+        fields = {frappe.safe_decode(k): frappe.safe_decode(v) for k, v in fields.items()}
+        if int(fields["deleted"]):
+            index.remove_medicine(fields["name"])
+        else:
+            index.set_medicine(fields["name"], fields["brand_name"], fields["base_salt"] or None)
+        state["last_id"] = entry_id
+
+    return True
@@ -0,0 +1,300 @@
+"""
+In-process autocomplete index over Medicine brand names and base salts.
+
+Terms are matched three ways, best first: the whole name starting with the query,
+every query word matching a word of the name (the last one as a prefix), and
+words within a small edit distance ("augmentn" -> "augmentin"), whose candidates
+come from a trigram index over the word vocabulary.
+
+Everything lives in flat lists and `array`s indexed by term / word id (no per-term
+objects); 2.5 lakh medicines take about 100 MB per worker, loaded in a few seconds.
+`max_medicines` bounds that: medicines beyond it are left out.
+"""
+
+import bisect
+import re
+from array import array
+from collections import Counter
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+MEDICINE, SALT = 0, 1
+
+# Fuzzy matching: only the words sharing the most trigrams are compared
+FUZZY_CANDIDATES = 50
+# Trigrams shared by more words than this say little and cost a lot to count
+MAX_TRIGRAM_POSTINGS = 5000
+# Terms scored per query word, bounds the work on very common words ("tablet")
+MAX_CANDIDATES = 500
+
+
+def normalize(text):
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def get_trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_max_distance(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein distance, or max_distance + 1 as soon as it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return previous[-1]
+
+
+class SuggestIndex:
+    __slots__ = (
+        "labels", "values", "kinds", "keys", "salt_of", "salt_refs",
+        "sorted_keys", "sorted_ids", "medicine_ids", "salt_ids",
+        "word_ids", "words", "sorted_words", "word_terms", "trigram_words", "loading", "max_medicines",
+    )
+
+    def __init__(self, max_medicines=None):
+        self.max_medicines = max_medicines
+
+        # Per term id. Deleted terms keep their id with label None.
+        self.labels = []
+        self.values = []  # None when the same as the label
+        self.kinds = bytearray()
+        self.keys = []
+        self.salt_of = array("i")  # medicine term -> salt term, -1 if none
+        self.salt_refs = array("I")  # salt term -> medicines referencing it
+
+        # Whole-name prefix lookup: normalized keys kept sorted, with their term ids
+        self.sorted_keys = []
+        self.sorted_ids = array("I")
+
+        self.medicine_ids = {}  # Medicine name -> term id
+        self.salt_ids = {}  # normalized salt -> term id
+
+        # Word vocabulary. Words are never removed, their postings are.
+        self.word_ids = {}
+        self.words = []
+        self.sorted_words = []
+        self.word_terms = []  # word id -> array of term ids
+        self.trigram_words = {}  # trigram -> array of word ids
+
+        # While bulk loading, the sorted lists are sorted once at the end
+        self.loading = False
+
+    def __len__(self):
+        return len(self.medicine_ids) + len(self.salt_ids)
+
+    def load(self, rows):
+        """Add (name, brand_name, base_salt) rows in bulk."""
+        self.loading = True
+        try:
+            for name, brand_name, base_salt in rows:
+                self.set_medicine(name, brand_name, base_salt)
+        finally:
+            self.loading = False
+
+        pairs = sorted(zip(self.sorted_keys, self.sorted_ids))
+        self.sorted_keys = [key for key, _ in pairs]
+        self.sorted_ids = array("I", (term_id for _, term_id in pairs))
+        self.sorted_words.sort()
+
+    def set_medicine(self, name, brand_name, base_salt):
+        """Add or update a medicine (and its salt). A new one is left out when the index is full."""
+        if self.max_medicines is not None and name not in self.medicine_ids and len(self.medicine_ids) >= self.max_medicines:
+            return
+
+        self.remove_medicine(name)
+
+        key = normalize(brand_name)
+        if not key:
+            return
+
+        salt_id = self._add_salt(base_salt)
+        term_id = self._add_term(MEDICINE, brand_name, name, key)
+        self.salt_of[term_id] = salt_id
+        self.medicine_ids[name] = term_id
+
+    def remove_medicine(self, name):
+        term_id = self.medicine_ids.pop(name, None)
+        if term_id is None:
+            return
+
+        salt_id = self.salt_of[term_id]
+        self._remove_term(term_id)
+
+        if salt_id >= 0:
+            self.salt_refs[salt_id] -= 1
+            if not self.salt_refs[salt_id]:
+                del self.salt_ids[self.keys[salt_id]]
+                self._remove_term(salt_id)
+
+    def search(self, query, limit=10):
+        """Returns [{"label", "value", "type"}], best matches first."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        scores = {}
+
+        # 1. Names starting with the whole query
+        start = bisect.bisect_left(self.sorted_keys, query)
+        for i in range(start, min(start + limit, len(self.sorted_keys))):
+            if not self.sorted_keys[i].startswith(query):
+                break
+            scores[self.sorted_ids[i]] = 0
+
+        # 2. Word by word, with typos
+        if len(scores) < limit:
+            tokens = query.split()
+            matches = [self._match_word(token, is_last=i == len(tokens) - 1) for i, token in enumerate(tokens)]
+
+            if all(matches):
+                for term_id, score in self._match_terms(matches):
+                    if term_id not in scores:
+                        scores[term_id] = score
+
+        ranked = sorted(scores, key=lambda t: (scores[t], self.kinds[t], len(self.labels[t]), self.keys[t]))
+        return [
+            {
+                "label": self.labels[t],
+                "value": self.values[t] or self.labels[t],
+                "type": "salt" if self.kinds[t] == SALT else "medicine",
+            }
+            for t in ranked[:limit]
+        ]
+
+    def _match_word(self, token, is_last):
+        """Vocabulary words matching a query word: {word id: cost}."""
+        matches = {}
+
+        word_id = self.word_ids.get(token)
+        if word_id is not None:
+            matches[word_id] = 0
+
+        if is_last:
+            start = bisect.bisect_left(self.sorted_words, token)
+            for word in self.sorted_words[start:start + FUZZY_CANDIDATES]:
+                if not word.startswith(token):
+                    break
+                matches.setdefault(self.word_ids[word], 0.5)
+
+        max_distance = get_max_distance(token)
+        if max_distance and len(matches) < FUZZY_CANDIDATES:
+            overlap = Counter()
+            for trigram in get_trigrams(token):
+                postings = self.trigram_words.get(trigram)
+                if postings is not None and len(postings) <= MAX_TRIGRAM_POSTINGS:
+                    overlap.update(postings)
+
+            for word_id, _ in overlap.most_common(FUZZY_CANDIDATES):
+                if word_id in matches:
+                    continue
+                word = self.words[word_id]
+                distance = edit_distance(token, word, max_distance)
+                if is_last and len(word) > len(token):
+                    # Still typing: compare against the start of the word too
+                    distance = min(distance, edit_distance(token, word[:len(token)], max_distance) + 0.5)
+                if distance <= max_distance:
+                    matches[word_id] = distance
+
+        return matches
+
+    def _match_terms(self, matches):
+        # Drive from the query word with the fewest postings, check the others per term
+        driver = min(range(len(matches)), key=lambda i: sum(len(self.word_terms[w]) for w in matches[i]))
+        others = [m for i, m in enumerate(matches) if i != driver]
+
+        seen = 0
+        for word_id, cost in sorted(matches[driver].items(), key=lambda item: item[1]):
+            for term_id in self.word_terms[word_id]:
+                seen += 1
+                if seen > MAX_CANDIDATES:
+                    return
+
+                term_words = [self.word_ids[w] for w in self.keys[term_id].split()]
+                total = 1 + cost
+                for other in others:
+                    best = min((other[w] for w in term_words if w in other), default=None)
+                    if best is None:
+                        break
+                    total += best
+                else:
+                    yield term_id, total
+
+    def _add_salt(self, base_salt):
+        key = normalize(base_salt)
+        if not key:
+            return -1
+
+        salt_id = self.salt_ids.get(key)
+        if salt_id is None:
+            salt_id = self._add_term(SALT, base_salt, base_salt, key)
+            self.salt_ids[key] = salt_id
+        self.salt_refs[salt_id] += 1
+        return salt_id
+
+    def _add_term(self, kind, label, value, key):
+        term_id = len(self.labels)
+        self.labels.append(label)
+        self.values.append(None if value == label else value)
+        self.kinds.append(kind)
+        self.keys.append(key)
+        self.salt_of.append(-1)
+        self.salt_refs.append(0)
+
+        if self.loading:
+            self.sorted_keys.append(key)
+            self.sorted_ids.append(term_id)
+        else:
+            position = bisect.bisect_left(self.sorted_keys, key)
+            self.sorted_keys.insert(position, key)
+            self.sorted_ids.insert(position, term_id)
+
+        for word in set(key.split()):
+            self.word_terms[self._get_word_id(word)].append(term_id)
+
+        return term_id
+
+    def _remove_term(self, term_id):
+        key = self.keys[term_id]
+
+        if self.loading:
+            position = self.sorted_ids.index(term_id)
+        else:
+            position = bisect.bisect_left(self.sorted_keys, key)
+            while self.sorted_ids[position] != term_id:
+                position += 1
+        del self.sorted_keys[position]
+        del self.sorted_ids[position]
+
+        for word in set(key.split()):
+            self.word_terms[self.word_ids[word]].remove(term_id)
+
+        self.labels[term_id] = self.values[term_id] = self.keys[term_id] = None
+
+    def _get_word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.word_ids[word] = word_id
+            self.words.append(word)
+            self.word_terms.append(array("I"))
+            if self.loading:
+                self.sorted_words.append(word)
+            else:
+                bisect.insort(self.sorted_words, word)
+            for trigram in get_trigrams(word):
+                self.trigram_words.setdefault(trigram, array("I")).append(word_id)
+        return word_id
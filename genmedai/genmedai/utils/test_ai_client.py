@@ -0,0 +1,147 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and Contributors
+# See license.txt
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from genmedai.genmedai.utils.ai_client import CircuitBreaker, CircuitOpenError, ProviderClient
+
+
+class StubProvider(BaseHTTPRequestHandler):
+	"""Answers with the scripted status codes in order, then 200."""
+
+	protocol_version = "HTTP/1.1"
+
+	def do_POST(self):
+		server = self.server
+		self.rfile.read(int(self.headers.get("Content-Length") or 0))
+		server.client_ports.append(self.client_address[1])
+
+		status = server.script.pop(0) if server.script else 200
+		body = json.dumps({"ok": status == 200}).encode()
+
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+class TestAIClient(unittest.TestCase):
+	def setUp(self):
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubProvider)
+		self.server.script = []
+		self.server.client_ports = []
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.url = f"http://127.0.0.1:{self.server.server_port}/generate"
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+	def get_client(self, **kwargs):
+		kwargs.setdefault("backoff", 0.01)
+		return ProviderClient("Stub", **kwargs)
+
+	def test_retries_retryable_status(self):
+		self.server.script = [503, 429]
+		client = self.get_client(max_retries=2)
+
+		response = client.post(self.url, json={})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(client.retries, 2)
+		self.assertEqual(len(self.server.client_ports), 3)
+
+	def test_gives_up_after_max_retries(self):
+		self.server.script = [500, 500, 500, 500]
+		client = self.get_client(max_retries=1)
+
+		response = client.post(self.url, json={})
+
+		self.assertEqual(response.status_code, 500)
+		self.assertEqual(len(self.server.client_ports), 2)
+		self.assertEqual(client.get_metrics()["errors"], 1)
+
+	def test_does_not_retry_client_errors(self):
+		self.server.script = [400]
+		client = self.get_client(max_retries=2)
+
+		self.assertEqual(client.post(self.url, json={}).status_code, 400)
+		self.assertEqual(len(self.server.client_ports), 1)
+
+	def test_closes_retried_streams(self):
+		self.server.script = [503]
+		client = self.get_client(max_retries=1)
+		responses = []
+		post = client.session.post
+
+		def record(*args, **kwargs):
+			responses.append(post(*args, **kwargs))
+			return responses[-1]
+
+		with patch.object(client.session, "post", side_effect=record):
+			with client.post(self.url, json={}, stream=True) as response:
+				self.assertEqual(response.status_code, 200)
+				self.assertTrue(responses[0].raw.closed)
+				self.assertFalse(response.raw.closed)
+
+	def test_reuses_connection(self):
+		client = self.get_client()
+		for _ in range(3):
+			client.post(self.url, json={})
+
+		self.assertEqual(len(set(self.server.client_ports)), 1)
+
+	def test_circuit_opens_and_recovers(self):
+		breaker = CircuitBreaker(window=4, min_calls=2, failure_rate=0.5, cooldown=0.2)
+		client = self.get_client(max_retries=0, breaker=breaker)
+		self.server.script = [503, 503]
+
+		client.post(self.url, json={})
+		client.post(self.url, json={})
+		self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+		# Short-circuited without touching the provider
+		with self.assertRaises(CircuitOpenError):
+			client.post(self.url, json={})
+		self.assertEqual(len(self.server.client_ports), 2)
+
+		time.sleep(0.25)
+		self.assertEqual(client.post(self.url, json={}).status_code, 200)
+		self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+	def test_unexpected_error_ends_half_open_trial(self):
+		breaker = CircuitBreaker(window=4, min_calls=1, failure_rate=0.5, cooldown=0.1)
+		client = self.get_client(max_retries=0, breaker=breaker)
+		breaker._open()
+		time.sleep(0.15)
+
+		# The trial fails with an error that is not a connection error
+		with self.assertRaises(requests.exceptions.InvalidURL):
+			client.post("http://", json={})
+		self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+		self.assertEqual(client.get_metrics()["errors"], 1)
+
+		# Not stuck half open: the next trial goes through after the cooldown
+		time.sleep(0.15)
+		self.assertEqual(client.post(self.url, json={}).status_code, 200)
+		self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+	def test_connection_error_is_raised_and_counted(self):
+		self.server.shutdown()
+		self.server.server_close()
+		client = self.get_client(max_retries=1)
+
+		with self.assertRaises(requests.ConnectionError):
+			client.post(self.url, json={}, timeout=1)
+		self.assertEqual(client.get_metrics()["errors"], 1)
@@ -0,0 +1,53 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from genmedai.genmedai.utils.http_cache import http_cache
+
+
+class TestHTTPCache(FrappeTestCase):
+	def setUp(self):
+		self.calls = []
+		# A version of its own, so bodies cached by other runs never match
+		version = frappe.generate_hash()
+
+		@http_cache(max_age=60, server_cache_ttl=60, get_version=lambda: version)
+		def list_page(page=0):
+			self.calls.append(page)
+			frappe.response["next_after"] = f"cursor-{page}"
+			return [page]
+
+		self.list_page = list_page
+		self.addCleanup(setattr, frappe.local, "request", getattr(frappe.local, "request", None))
+
+	def get(self, headers=None, **kwargs):
+		frappe.local.request = Request(EnvironBuilder(method="GET", headers=headers).get_environ())
+		frappe.local.response = frappe._dict({"docs": []})
+		return self.list_page(**kwargs)
+
+	def test_sends_response_keys(self):
+		response = self.get(page=1)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(json.loads(response.get_data()), {"message": [1], "next_after": "cursor-1"})
+		self.assertIn("public", response.headers["Cache-Control"])
+
+	def test_caches_response_keys(self):
+		self.get(page=2)
+		response = self.get(page=2)
+
+		self.assertEqual(self.calls, [2])
+		self.assertEqual(json.loads(response.get_data()), {"message": [2], "next_after": "cursor-2"})
+
+	def test_not_modified(self):
+		etag = self.get(page=3).get_etag()[0]
+		response = self.get(headers={"If-None-Match": f'"{etag}"'}, page=3)
+
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(self.calls, [3])
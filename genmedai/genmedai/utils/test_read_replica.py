@@ -0,0 +1,64 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from pymysql.err import OperationalError
+
+from genmedai.genmedai.utils import read_replica
+from genmedai.genmedai.utils.read_replica import read_from_replica
+
+
+def get_server_id():
+	return frappe.db.sql("SELECT @@server_id")[0][0]
+
+
+@read_from_replica
+def get_server_id_from_replica():
+	return get_server_id()
+
+
+class TestReadReplica(FrappeTestCase):
+	"""Needs a read replica of the site, on a second local MariaDB: see setup_replica.sh."""
+
+	def setUp(self):
+		if not frappe.conf.read_from_replica:
+			self.skipTest("The site has no read replica (read_from_replica)")
+		read_replica._health.clear()
+		self.primary_id = get_server_id()
+
+	def test_reads_from_replica(self):
+		self.assertNotEqual(get_server_id_from_replica(), self.primary_id)
+		# Back on the primary afterwards
+		self.assertEqual(get_server_id(), self.primary_id)
+
+	def test_lagging_replica_is_skipped(self):
+		with patch.object(read_replica, "get_replica_lag", return_value=read_replica.get_max_lag() + 1):
+			self.assertEqual(get_server_id_from_replica(), self.primary_id)
+
+		# Until the next check
+		self.assertEqual(get_server_id_from_replica(), self.primary_id)
+
+	def test_unreachable_replica_is_skipped(self):
+		with patch.dict(frappe.conf, {"replica_db_port": 1}):
+			self.assertEqual(get_server_id_from_replica(), self.primary_id)
+
+	def test_failed_read_runs_on_primary(self):
+		server_ids = []
+		replica_flags = []
+
+		@read_from_replica
+		def lose_connection_once():
+			server_ids.append(get_server_id())
+			replica_flags.append(frappe.flags.read_from_replica)
+			if len(server_ids) == 1:
+				raise OperationalError(2013, "Lost connection to server during query")
+			return server_ids[-1]
+
+		self.assertEqual(lose_connection_once(), self.primary_id)
+		self.assertNotEqual(server_ids[0], self.primary_id)
+		# The read on the primary is current, caches may keep it
+		self.assertTrue(replica_flags[0])
+		self.assertFalse(replica_flags[1])
@@ -0,0 +1,69 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and Contributors
+# See license.txt
+
+import unittest
+
+from genmedai.genmedai.utils.substitute_ranking import (
+	EXACT,
+	OTHER_FORM,
+	OTHER_STRENGTH,
+	SAME_FAMILY,
+	Candidate,
+	get_savings,
+	parse_pack_size,
+	parse_strength,
+	rank_substitutes,
+)
+
+
+def candidate(name, ingredients, price, pack_size_label, dosage_form=None):
+	row = {"name": name, "price": price, "pack_size_label": pack_size_label, "dosage_form": dosage_form}
+	return Candidate(row, [{"ingredient": i, "strength": s} for i, s in ingredients])
+
+
+class TestSubstituteRanking(unittest.TestCase):
+	def test_parse_strength(self):
+		self.assertEqual(parse_strength("500mg"), (500.0, "mg"))
+		self.assertEqual(parse_strength("0.5 g"), (500.0, "mg"))
+		self.assertEqual(parse_strength("250mcg"), (0.25, "mg"))
+		self.assertEqual(parse_strength("125mg/5ml"), (25.0, "mg/ml"))
+		self.assertEqual(parse_strength("1% w/w"), (1.0, "%"))
+		self.assertIsNone(parse_strength("NA"))
+
+	def test_parse_pack_size(self):
+		self.assertEqual(parse_pack_size("strip of 15 tablets"), (15.0, "tablet"))
+		self.assertEqual(parse_pack_size("bottle of 100 ml Syrup"), (100.0, "ml"))
+		self.assertEqual(parse_pack_size("box of 3 x 10 capsules"), (30.0, "capsule"))
+		self.assertEqual(parse_pack_size("10 Tablet Strip"), (10.0, "tablet"))
+		self.assertIsNone(parse_pack_size("1 Kit"))
+
+	def test_ranking(self):
+		source = candidate("Augmentin 625", [("Amoxycillin", "500mg"), ("Clavulanic Acid", "125mg")], 200, "strip of 10 tablets", "Tablet")
+		candidates = [
+			candidate("Other Strength", [("Amoxycillin", "250mg"), ("Clavulanic Acid", "125mg")], 50, "strip of 10 tablets"),
+			candidate("Syrup", [("Clavulanic Acid", "125 mg"), ("Amoxycillin", "0.5g")], 60, "bottle of 30 ml Syrup"),
+			candidate("Capsule", [("Amoxycillin", "500mg"), ("Clavulanic Acid", "125mg")], 90, "strip of 10 capsules"),
+			# Dearer strip, cheaper per tablet
+			candidate("Big Strip", [("Amoxycillin", "500 mg"), ("Clavulanic Acid", "125 mg")], 150, "strip of 15 tablets"),
+			candidate("Small Strip", [("Amoxycillin", "500mg"), ("Clavulanic Acid", "125mg")], 120, "strip of 10 tablets"),
+		]
+		ranked = rank_substitutes(source, candidates)
+
+		self.assertEqual(
+			[(tier, c.name) for tier, c in ranked],
+			[
+				(EXACT, "Big Strip"),
+				(EXACT, "Small Strip"),
+				(SAME_FAMILY, "Capsule"),
+				(OTHER_FORM, "Syrup"),
+				(OTHER_STRENGTH, "Other Strength"),
+			],
+		)
+		self.assertEqual(ranked[0][1].unit_price, 10.0)
+
+		# Per tablet for the source's 10 tablets, not strip against strip
+		self.assertEqual(get_savings(source, ranked[0][1]), 100.0)
+		self.assertEqual(get_savings(source, ranked[3][1]), 140.0)
+
+		# The best few only, in the same order
+		self.assertEqual(rank_substitutes(source, candidates, limit=3), ranked[:3])
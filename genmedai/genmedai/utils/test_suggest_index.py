@@ -0,0 +1,63 @@
+# Copyright (c) 2026, Adimyra Systems Private Limited and Contributors
+# See license.txt
+
+import unittest
+
+from genmedai.genmedai.utils.suggest_index import SuggestIndex, edit_distance
+
+
+class TestSuggestIndex(unittest.TestCase):
+	def setUp(self):
+		self.index = SuggestIndex()
+		self.index.set_medicine("Augmentin 625 Duo Tablet", "Augmentin 625 Duo Tablet", "Amoxycillin")
+		self.index.set_medicine("Azithral 500 Tablet", "Azithral 500 Tablet", "Azithromycin")
+		self.index.set_medicine("Dolo 650 Tablet", "Dolo 650 Tablet", "Paracetamol")
+		self.index.set_medicine("Crocin Advance Tablet", "Crocin Advance Tablet", "Paracetamol")
+
+	def labels(self, query, limit=10):
+		return [s["label"] for s in self.index.search(query, limit)]
+
+	def test_prefix(self):
+		self.assertEqual(self.labels("dolo"), ["Dolo 650 Tablet"])
+		self.assertEqual(self.labels("para"), ["Paracetamol"])
+
+	def test_word_match(self):
+		self.assertEqual(self.labels("650 dolo"), ["Dolo 650 Tablet"])
+		self.assertIn("Crocin Advance Tablet", self.labels("advance"))
+
+	def test_typos(self):
+		self.assertEqual(self.labels("augmentn")[0], "Augmentin 625 Duo Tablet")
+		self.assertEqual(self.labels("azitrhal")[0], "Azithral 500 Tablet")
+		self.assertEqual(self.labels("paracetmol")[0], "Paracetamol")
+
+	def test_max_medicines(self):
+		index = SuggestIndex(max_medicines=2)
+		index.load([
+			("Dolo 650 Tablet", "Dolo 650 Tablet", "Paracetamol"),
+			("Crocin Advance Tablet", "Crocin Advance Tablet", "Paracetamol"),
+			("Azithral 500 Tablet", "Azithral 500 Tablet", "Azithromycin"),
+		])
+		self.assertEqual(len(index.medicine_ids), 2)
+		self.assertEqual([s["label"] for s in index.search("azithral")], [])
+
+		# Medicines already in can still be updated, and removals make room
+		index.set_medicine("Dolo 650 Tablet", "Dolo 650 Tablet", "Paracetamol")
+		self.assertIn("Dolo 650 Tablet", index.medicine_ids)
+		index.remove_medicine("Crocin Advance Tablet")
+		index.set_medicine("Azithral 500 Tablet", "Azithral 500 Tablet", "Azithromycin")
+		self.assertEqual([s["label"] for s in index.search("azithral")], ["Azithral 500 Tablet"])
+
+	def test_update_and_remove(self):
+		self.index.set_medicine("Dolo 650 Tablet", "Dolo 650 Tablet", "Paracetamol")
+		self.assertEqual(self.labels("dolo"), ["Dolo 650 Tablet"])
+
+		self.index.remove_medicine("Dolo 650 Tablet")
+		self.index.remove_medicine("Crocin Advance Tablet")
+		self.assertEqual(self.labels("dolo"), [])
+		# The salt goes with its last medicine
+		self.assertEqual(self.labels("paracetamol"), [])
+		self.assertEqual(len(self.index), 4)
+
+	def test_edit_distance(self):
+		self.assertEqual(edit_distance("augmentn", "augmentin", 2), 1)
+		self.assertEqual(edit_distance("dolo", "crocin", 1), 2)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+
+import frappe
+from frappe.utils import now, strip_html
+
+from genmedai.genmedai.utils.medicine_enrichment import get_top_searched_medicines
+
+# Translations are stored per (source text hash, target language) in "Translation
+# Memory", with Redis in front, so a text is sent to the provider once per language
+# and every later request for it is a lookup.
+LANGUAGES = (
+    "Hindi", "Bengali", "Marathi", "Telugu", "Tamil", "Gujarati",
+    "Kannada", "Malayalam", "Punjabi", "Odia", "Assamese", "Urdu",
+)
+MEMORY_PREFIX = "genmedai:translation"
+REDIS_TTL = 7 * 86400
+
+# Texts per batch prompt, the answers grow with every text
+BATCH_SIZE = 10
+DEFAULT_PREWARM_LANGUAGES = "Hindi"
+
+MEMORY_FIELDS = (
+    "name", "creation", "modified", "modified_by", "owner",
+    "memory_key", "source_hash", "target_language", "source_text", "translated_text",
+)
+
+
+def validate_language(language):
+    if language not in LANGUAGES:
+        frappe.throw(f"Translation to {language} is not supported", frappe.ValidationError)
+
+
+def normalize_text(text):
+    return " ".join((text or "").split())
+
+
+def get_memory_key(text, language):
+    source_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return hashlib.sha1(f"{source_hash}\0{language}".encode("utf-8")).hexdigest(), source_hash
+
+
+def get_translations(texts, language):
+    """{normalized text: translation} for the texts already in the memory."""
+    keys = {get_memory_key(text, language)[0]: normalize_text(text) for text in texts if normalize_text(text)}
+    if not keys:
+        return {}
+
+    found = {}
+    try:
+        cache = frappe.cache()
+        values = cache.mget([cache.make_key(f"{MEMORY_PREFIX}:{key}") for key in keys])
+        for key, value in zip(list(keys), values):
+            if value is not None:
+                found[keys.pop(key)] = frappe.safe_decode(value)
+    except Exception:
+        pass
+
+    if keys:
+        rows = frappe.get_all(
+            "Translation Memory",
+            filters={"name": ("in", list(keys))},
+            fields=["name", "translated_text"],
+        )
+        for row in rows:
+            found[keys[row.name]] = row.translated_text
+        _redis_set({row.name: row.translated_text for row in rows})
+
+    return found
+
+
+def set_translations(translations, language):
+    """Store {text: translation} pairs; texts already in the memory keep their translation."""
+    timestamp = now()
+    rows, cached = [], {}
+    for text, translation in translations.items():
+        if not normalize_text(text) or not translation:
+            continue
+        key, source_hash = get_memory_key(text, language)
+        rows.append((key, timestamp, timestamp, "Administrator", "Administrator", key, source_hash, language, normalize_text(text), translation))
+        cached[key] = translation
+
+    if not rows:
+        return
+
+    frappe.db.bulk_insert("Translation Memory", MEMORY_FIELDS, rows, ignore_duplicates=True)
+    _redis_set(cached)
+
+    # Guest translations are GET / streamed requests, which Frappe doesn't commit by default
+    frappe.local.flags.commit = True
+
+
+def translate_texts(texts, language):
+    """
+    Translations of `texts` in order (None where the provider gave none): from the
+    memory, the rest BATCH_SIZE texts per AI call.
+    """
+    from genmedai.api import query_ai
+
+    validate_language(language)
+
+    unique = list(dict.fromkeys(normalize_text(text) for text in texts if normalize_text(text)))
+    found = get_translations(unique, language)
+    missing = [text for text in unique if text not in found]
+
+    for i in range(0, len(missing), BATCH_SIZE):
+        batch = missing[i:i + BATCH_SIZE]
+        if len(batch) == 1:
+            translations = [query_ai(build_translate_prompt(batch[0], language))]
+        else:
+            translations = parse_translations(query_ai(build_batch_translate_prompt(batch, language)), len(batch))
+
+        translated = {text: translation for text, translation in zip(batch, translations) if translation}
+        set_translations(translated, language)
+        found.update(translated)
+
+    return [found.get(normalize_text(text)) if normalize_text(text) else "" for text in texts]
+
+
+def build_translate_prompt(text, language):
+    return f"Translate the following medical text to {language}. Keep it simple and easy to understand. Return ONLY the translated text.\n\nText: {normalize_text(text)}"
+
+
+def build_batch_translate_prompt(texts, language):
+    return f"""
+    Translate each of the following medical texts to {language}. Keep them simple and easy to understand.
+    Texts:
+    {json.dumps(texts, ensure_ascii=False)}
+
+    Return a JSON LIST (and ONLY JSON, no markdown) of the translated texts, exactly one per text, in the same order.
+    """
+
+
+def parse_translations(ai_text, count):
+    try:
+        start_index = ai_text.find('[')
+        end_index = ai_text.rfind(']')
+        translations = json.loads(ai_text[start_index:end_index + 1])
+    except Exception:
+        return [None] * count
+
+    if not isinstance(translations, list) or len(translations) != count:
+        return [None] * count
+    return [t.strip() if isinstance(t, str) and t.strip() else None for t in translations]
+
+
+def prewarm_translations():
+    """Daily: translate the explanations and descriptions of the most searched medicines."""
+    try:
+        settings = frappe.get_cached_doc("GenMedAI Settings")
+    except Exception:
+        settings = frappe._dict()
+
+    languages = (settings.get("prewarm_translation_languages") or DEFAULT_PREWARM_LANGUAGES).replace(",", "\n").split("\n")
+    languages = [lang.strip() for lang in languages if lang.strip() in LANGUAGES]
+
+    names = get_top_searched_medicines()
+    if not names or not languages:
+        return
+
+    texts = []
+    for medicine in frappe.get_all("Medicine", filters={"name": ("in", names)}, fields=["ai_explanation", "description"]):
+        texts.append(medicine.ai_explanation)
+        texts.append(strip_html(medicine.description or ""))
+
+    frappe.flags.ai_endpoint = "translate"
+    for language in languages:
+        translate_texts([text for text in texts if text], language)
+        frappe.db.commit()
+
+
+def _redis_set(translations):
+    if not translations:
+        return
+    try:
+        cache = frappe.cache()
+        pipe = cache.pipeline()
+        for key, translation in translations.items():
+            pipe.set(cache.make_key(f"{MEMORY_PREFIX}:{key}"), translation, ex=REDIS_TTL)
+        pipe.execute()
+    except Exception:
+        pass
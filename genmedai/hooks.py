@@ -144,34 +144,29 @@ after_migrate = "genmedai.install.after_migrate"
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-# 	"*": {
-# 		"on_update": "method",
-# 		"on_cancel": "method",
-# 		"on_trash": "method"
-# 	}
-# }
+doc_events = {
+	"Contact Us Settings": {
+		"on_update": "genmedai.genmedai.utils.http_cache.on_public_settings_update"
+	}
+}
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"genmedai.tasks.all"
-# 	],
-# 	"daily": [
-# 		"genmedai.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"genmedai.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"genmedai.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"genmedai.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"cron": {
+		"* * * * *": [
+			"genmedai.genmedai.utils.search_log.flush_search_log"
+		],
+	},
+	"daily": [
+		"genmedai.genmedai.utils.ai_cache.trim_db_cache",
+		"genmedai.genmedai.utils.catalog_facets.rebuild_facets",
+		"genmedai.genmedai.utils.search_log.trim_search_log",
+		"genmedai.genmedai.utils.medicine_enrichment.enrich_top_medicines",
+		"genmedai.genmedai.utils.translation_memory.prewarm_translations"
+	],
+}
 
 # Testing
 # -------
@@ -203,7 +198,7 @@ after_migrate = "genmedai.install.after_migrate"
 
 # Request Events
 # ----------------
-# before_request = ["genmedai.utils.before_request"]
+before_request = ["genmedai.genmedai.utils.suggest.warm_suggest_index"]
 # after_request = ["genmedai.utils.after_request"]
 
 # Job Events
@@ -1,7 +1,13 @@
 import frappe
 
+from genmedai.genmedai.utils.catalog_facets import rebuild_facets
+from genmedai.genmedai.utils.medicine_search import ensure_search_index
+
 def after_install():
 	setup_defaults()
+	# Patches are marked as done on fresh installs, so build indexes here too
+	ensure_search_index()
+	rebuild_facets()
 
 def after_migrate():
 	setup_defaults()
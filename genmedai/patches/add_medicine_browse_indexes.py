@@ -0,0 +1,6 @@
+from genmedai.genmedai.doctype.medicine.medicine import on_doctype_update
+
+
+def execute():
+    """on_doctype_update only runs when the DocType changes, add the browse indexes on existing sites."""
+    on_doctype_update()
@@ -0,0 +1,5 @@
+from genmedai.genmedai.utils.medicine_search import ensure_search_index
+
+
+def execute():
+    ensure_search_index()
@@ -0,0 +1,5 @@
+from genmedai.genmedai.utils.catalog_facets import rebuild_facets
+
+
+def execute():
+    rebuild_facets()
@@ -0,0 +1,21 @@
+from collections import defaultdict
+
+import frappe
+
+from genmedai.genmedai.utils.composition import get_base_salt
+
+
+def execute():
+    names_by_salt = defaultdict(list)
+    for name, salt_composition in frappe.db.sql("SELECT name, salt_composition FROM `tabMedicine`"):
+        base_salt = get_base_salt(salt_composition)
+        if base_salt:
+            names_by_salt[base_salt].append(name)
+
+    # Most salts are shared by many brands, so update per salt rather than per row
+    for base_salt, names in names_by_salt.items():
+        for i in range(0, len(names), 1000):
+            frappe.db.sql(
+                "UPDATE `tabMedicine` SET base_salt = %s WHERE name IN %s",
+                (base_salt, tuple(names[i:i + 1000]))
+            )
@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+import frappe
+
+from genmedai.genmedai.utils.composition import derive_composition
+
+INGREDIENT_FIELDS = (
+    "name", "creation", "modified", "modified_by", "owner", "docstatus",
+    "parent", "parentfield", "parenttype", "idx", "ingredient", "strength"
+)
+
+
+def execute():
+    """Backfill composition_key and the Medicine Ingredient rows without saving each Medicine."""
+    frappe.db.sql("DELETE FROM `tabMedicine Ingredient` WHERE parenttype = 'Medicine'")
+
+    now = frappe.utils.now()
+    names_by_key = defaultdict(list)
+    ingredient_rows = []
+
+    for name, salt_composition in frappe.db.sql("SELECT name, salt_composition FROM `tabMedicine`"):
+        composition = derive_composition(salt_composition)
+        if composition.composition_key:
+            names_by_key[composition.composition_key].append(name)
+
+        for idx, d in enumerate(composition.ingredients, start=1):
+            ingredient_rows.append((
+                frappe.generate_hash(length=10), now, now, "Administrator", "Administrator", 0,
+                name, "ingredients", "Medicine", idx, d["ingredient"], d["strength"]
+            ))
+
+    frappe.db.bulk_insert("Medicine Ingredient", INGREDIENT_FIELDS, ingredient_rows)
+
+    for composition_key, names in names_by_key.items():
+        for i in range(0, len(names), 1000):
+            frappe.db.sql(
+                "UPDATE `tabMedicine` SET composition_key = %s WHERE name IN %s",
+                (composition_key, tuple(names[i:i + 1000]))
+            )
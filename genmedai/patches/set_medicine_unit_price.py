@@ -0,0 +1,31 @@
+from collections import defaultdict
+
+import frappe
+
+from genmedai.genmedai.utils.cheapest_equivalent import rebuild_cheapest_equivalents
+from genmedai.genmedai.utils.substitute_ranking import parse_pack_size
+
+
+def execute():
+    """Backfill unit_count / pack_unit / unit_price without saving each Medicine, then build Cheapest Equivalent."""
+    # Pack labels repeat a lot ("strip of 10 tablets"), so update per distinct pack
+    names_by_pack = defaultdict(list)
+    for name, pack_size_label in frappe.db.sql("SELECT name, pack_size_label FROM `tabMedicine`"):
+        pack = parse_pack_size(pack_size_label)
+        if pack:
+            names_by_pack[pack].append(name)
+
+    for (unit_count, pack_unit), names in names_by_pack.items():
+        for i in range(0, len(names), 1000):
+            frappe.db.sql(
+                "UPDATE `tabMedicine` SET unit_count = %s, pack_unit = %s WHERE name IN %s",
+                (unit_count, pack_unit, tuple(names[i:i + 1000]))
+            )
+
+    frappe.db.sql("""
+        UPDATE `tabMedicine`
+        SET unit_price = ROUND(price / unit_count, 4)
+        WHERE unit_count > 0 AND price > 0
+    """)
+
+    rebuild_cheapest_equivalents()
@@ -0,0 +1,73 @@
+#!/bin/bash
+
+# Starts a second local MariaDB instance as a read replica of the bench's MariaDB and
+# points a site at it (read_from_replica), to run the replica routing tests:
+#   bench --site <site> run-tests --module genmedai.genmedai.utils.test_read_replica
+# The primary needs binary logging: log_bin and server_id=1 in its my.cnf.
+
+set -e
+
+read -p "Enter Site Name (default: genmedainew.dev): " site_name
+SITE=${site_name:-genmedainew.dev}
+
+read -p "Enter Bench Directory (default: current directory): " bench_dir
+BENCH_DIR=${bench_dir:-$(pwd)}
+
+read -p "Enter Replica Port (default: 3307): " replica_port
+REPLICA_PORT=${replica_port:-3307}
+
+read -s -p "Enter Primary MariaDB Root Password: " root_password
+echo
+
+REPLICA_DIR=/tmp/genmedai-replica
+SITE_CONFIG="$BENCH_DIR/sites/$SITE/site_config.json"
+DB_NAME=$(python3 -c "import json; print(json.load(open('$SITE_CONFIG'))['db_name'])")
+DB_USER=$(python3 -c "import json; c = json.load(open('$SITE_CONFIG')); print(c.get('db_user') or c['db_name'])")
+DB_PASSWORD=$(python3 -c "import json; print(json.load(open('$SITE_CONFIG'))['db_password'])")
+
+primary() { mariadb -h 127.0.0.1 -P 3306 -u root -p"$root_password" "$@"; }
+replica() { mariadb --socket="$REPLICA_DIR/mysqld.sock" -u root "$@"; }
+
+echo "🔎 Checking binary logging on the primary..."
+if [ "$(primary -N -e 'SELECT @@log_bin')" != "1" ]; then
+    echo "❌ Enable log_bin (and server_id=1) in the primary's my.cnf, restart MariaDB and run again."
+    exit 1
+fi
+
+echo "🗄️ Starting the replica on port $REPLICA_PORT ($REPLICA_DIR)..."
+mkdir -p "$REPLICA_DIR"
+mariadb-install-db --user="$(whoami)" --datadir="$REPLICA_DIR/data" > /dev/null
+mariadbd --user="$(whoami)" --datadir="$REPLICA_DIR/data" --port="$REPLICA_PORT" \
+    --socket="$REPLICA_DIR/mysqld.sock" --pid-file="$REPLICA_DIR/mysqld.pid" \
+    --log-error="$REPLICA_DIR/error.log" --server-id=2 --read-only=1 \
+    --character-set-server=utf8mb4 --collation-server=utf8mb4_unicode_ci &
+until replica -e "SELECT 1" > /dev/null 2>&1; do sleep 1; done
+
+echo "👤 Creating the replication user on the primary..."
+primary -e "CREATE USER IF NOT EXISTS 'genmedai_repl'@'%' IDENTIFIED BY 'genmedai_repl';
+    GRANT REPLICATION SLAVE ON *.* TO 'genmedai_repl'@'%';"
+
+echo "📦 Copying $DB_NAME to the replica..."
+mariadb-dump -h 127.0.0.1 -P 3306 -u root -p"$root_password" \
+    --single-transaction --gtid --master-data=1 --databases "$DB_NAME" | replica
+
+echo "🔁 Starting replication..."
+replica -e "CHANGE MASTER TO MASTER_HOST='127.0.0.1', MASTER_PORT=3306,
+    MASTER_USER='genmedai_repl', MASTER_PASSWORD='genmedai_repl', MASTER_USE_GTID=slave_pos;
+    START SLAVE;"
+
+echo "👤 Giving the site's database user read access on the replica..."
+replica -e "CREATE USER IF NOT EXISTS '$DB_USER'@'%' IDENTIFIED BY '$DB_PASSWORD';
+    GRANT SELECT ON \`$DB_NAME\`.* TO '$DB_USER'@'%';
+    GRANT SLAVE MONITOR ON *.* TO '$DB_USER'@'%';"
+
+echo "📝 Pointing $SITE at the replica..."
+cd "$BENCH_DIR"
+bench --site "$SITE" set-config -p read_from_replica 1
+bench --site "$SITE" set-config replica_host 127.0.0.1
+bench --site "$SITE" set-config -p replica_db_port "$REPLICA_PORT"
+
+echo "✅ Replica running!"
+echo "   - Tests: bench --site $SITE run-tests --module genmedai.genmedai.utils.test_read_replica"
+echo "   - Lag: replica_max_lag in site_config.json (default: 30 seconds)"
+echo "   - Stop: kill \$(cat $REPLICA_DIR/mysqld.pid) && bench --site $SITE set-config -p read_from_replica 0"